@@ -0,0 +1,130 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Registro de último acesso em lote.
+#
+# Abrir um chat não deve ser uma transação de escrita. Os acessos ("chat X tocado
+# no instante T") ficam em memória, coalescidos por chat, e são gravados com um
+# único UPDATE em lote a cada N segundos ou quando M chats estão pendentes.
+#
+# A lista de chats aplica os acessos pendentes do usuário por cima do banco
+# (pending_for_user), na ordenação e no ETag, sem gravar nada no GET. Os pendentes
+# são de cada processo: nos demais workers o acesso aparece depois da próxima
+# gravação (até ACCESS_FLUSH_INTERVAL_SECONDS).
+
+from datetime import datetime, timezone
+from sqlalchemy import bindparam
+import atexit
+import threading
+
+class AccessTimeRecorder:
+    def __init__(self, db, table, app=None):
+        self._db = db
+        self._table = table
+        self._app = None
+        self._pending = {} # chat_id -> (user_id, instante)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.flush_interval = 5.0
+        self.max_pending = 100
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        self.flush_interval = app.config.get('ACCESS_FLUSH_INTERVAL_SECONDS', 5.0)
+        self.max_pending = app.config.get('ACCESS_FLUSH_MAX_EVENTS', 100)
+        app.extensions['access_recorder'] = self
+        atexit.register(self._flush_at_exit)
+
+    def touch(self, chat_id, user_id, when=None):
+        when = when or datetime.now(timezone.utc)
+        with self._lock:
+            current = self._pending.get(chat_id)
+            if current is None or current[1] < when:
+                self._pending[chat_id] = (user_id, when)
+            pending_count = len(self._pending)
+        self._ensure_thread()
+        if pending_count >= self.max_pending:
+            self._wakeup.set() # A gravação acontece na thread de fundo, nunca no request
+
+    def pending_for_user(self, user_id):
+        # chat_id -> instante dos acessos ainda não gravados de um usuário
+        with self._lock:
+            return {chat_id: when for chat_id, (owner, when) in self._pending.items() if owner == user_id}
+
+    def discard(self, chat_ids):
+        # Chats excluídos não precisam mais ter o acesso gravado
+        with self._lock:
+            for chat_id in chat_ids:
+                self._pending.pop(chat_id, None)
+
+    def flush(self, user_id=None):
+        # Grava os acessos pendentes (todos ou só os de um usuário). Precisa de app context.
+        with self._lock:
+            if user_id is None:
+                batch, self._pending = self._pending, {}
+            else:
+                batch = {chat_id: entry for chat_id, entry in self._pending.items() if entry[0] == user_id}
+                for chat_id in batch:
+                    del self._pending[chat_id]
+        if not batch:
+            return 0
+
+        table = self._table
+        statement = (table.update()
+                     .where(table.c.id == bindparam('b_chat_id'))
+                     .where(table.c.last_accessed_at < bindparam('b_accessed_at'))
+                     .values(last_accessed_at=bindparam('b_accessed_at')))
+        params = [{'b_chat_id': chat_id, 'b_accessed_at': when} for chat_id, (_, when) in batch.items()]
+        try:
+            self._db.session.execute(statement, params)
+            self._db.session.commit()
+        except Exception:
+            self._db.session.rollback()
+            # Devolve os acessos para a próxima tentativa sem sobrescrever os mais novos
+            with self._lock:
+                for chat_id, entry in batch.items():
+                    current = self._pending.get(chat_id)
+                    if current is None or current[1] < entry[1]:
+                        self._pending[chat_id] = entry
+            raise
+        return len(params)
+
+    def _ensure_thread(self):
+        # Iniciada sob demanda para funcionar também depois do fork dos workers
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='jogai-access-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                with self._app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"Erro ao gravar últimos acessos dos chats: {e}")
+
+    def _flush_at_exit(self):
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            print(f"Erro ao gravar últimos acessos dos chats: {e}")
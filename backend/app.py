@@ -12,34 +12,177 @@
 # de software.
 # -----------------------------------------------------------------------------
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_migrate import Migrate
 from flask_cors import CORS
 from datetime import datetime, timezone
 from config import Config
-from models import db, User, Chat, Message
-import google.generativeai as genai
+from sqlalchemy import case, create_engine, delete, func, insert, select, tuple_, update
+from models import db, User, Chat, ChatArchive, Message, CHAT_STATUSES, CHAT_SUMMARY_COLUMNS, chat_summary_to_dict
+from context_window import load_history_window, fold_history_window
+from chat_sessions import ChatSession, ChatSessionCache, chat_session_fingerprint
+from context_cache import ContextCacheManager
+from prompt_templates import PromptTemplateRegistry
+from background import background_tasks
+from password_hashing import PasswordHasherBusyError, password_hasher
+from auth import token_auth
+from transcript_archive import TranscriptArchiver
+from search import build_match_query, rebuild_search_index, register_search_schema, search_chats, search_messages, search_supported
+from query_plans import check_query_plans
+from access_tracker import AccessTimeRecorder
+from database import configure_database, log_database_settings
+from llm import InstrumentedProvider, LLMOverloadedError, create_llm_provider
+from llm_dispatcher import create_llm_dispatcher, error_status_code
+from llm_cache import create_llm_response_cache
+from metrics import registry as metrics_registry
+from sql_instrumentation import SQLInstrumentation
+import base64
+import click
+import hashlib
+import json
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
+# Primeiro: os processos do pool de hash são criados com fork, antes de existirem outras threads
+password_hasher.init_app(app)
 CORS(app)
 
 db.init_app(app)
+configure_database(app, db)
+# Índices de busca (FTS5) criados junto com as tabelas em db.create_all()
+register_search_schema(db.metadata)
 migrate = Migrate(app, db)
+background_tasks.init_app(app)
+token_auth.init_app(app)
 
-# Configuração da API do Gemini
-if Config.GEMINI_API_KEY:
-    genai.configure(api_key=Config.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-else:
-    model = None
+# Contagem de SQL por request (Server-Timing, /metrics e /metrics/sql), se habilitada
+sql_instrumentation = SQLInstrumentation(db, metrics_registry, app)
+
+# Último acesso dos chats gravado em lote, fora do caminho de leitura
+access_recorder = AccessTimeRecorder(db, Chat.__table__, app)
+
+# Templates de prompt compilados uma vez (recarregados só quando o arquivo muda).
+# Usa o ambiente Jinja do Flask para manter o mesmo comportamento do render_template_string.
+prompt_templates = PromptTemplateRegistry(app.jinja_env, Config.PROMPT_TEMPLATES, Config.PROMPT_RENDER_CACHE_SIZE)
+
+if Config.DATABASE_SELF_CHECK:
+    log_database_settings(app, db)
+
+# Provedor de LLM (Gemini por padrão; 'fake' para testes de carga sem rede)
+llm = create_llm_provider(app.config)
+if llm is None:
     print("Chave da API do Gemini não configurada. Funcionalidades de chat estarão desabilitadas.")
+else:
+    # Latência, tokens e erros por tipo de chamada, expostos em /metrics; o despachante
+    # limita concorrência e taxa das chamadas e repete as que falham com 429/5xx
+    llm = create_llm_dispatcher(InstrumentedProvider(llm, metrics_registry), metrics_registry, app.config)
+
+# Sessões de chat ativas (histórico pronto para o Gemini) entre turnos consecutivos
+chat_sessions = ChatSessionCache(metrics_registry, Config.CHAT_SESSION_CACHE_MAX_BYTES)
+
+# Prefixo estável do histórico guardado no provedor (context caching), se habilitado
+context_cache = ContextCacheManager(
+    llm, metrics_registry, background_tasks,
+    enabled=Config.CONTEXT_CACHE_ENABLED,
+    ttl_seconds=Config.CONTEXT_CACHE_TTL_SECONDS,
+    min_tokens=Config.CONTEXT_CACHE_MIN_TOKENS,
+    refresh_tokens=Config.CONTEXT_CACHE_REFRESH_TOKENS,
+    expiry_margin_seconds=Config.CONTEXT_CACHE_EXPIRY_MARGIN_SECONDS,
+    failure_backoff_seconds=Config.CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS,
+    failure_backoff_max_seconds=Config.CONTEXT_CACHE_FAILURE_BACKOFF_MAX_SECONDS,
+)
+
+# Mensagens de chats encerrados compactadas em chat_archive (ver transcript_archive.py)
+transcript_archiver = TranscriptArchiver(db, Chat, Message, ChatArchive, app, access_recorder=access_recorder)
+transcript_archiver.on_archived = lambda chat_id: chat_sessions.invalidate([chat_id])
+
+# Títulos já gerados para a mesma configuração de chat (ver llm_cache.py)
+title_cache = create_llm_response_cache(metrics_registry, app.config)
+
+# Dono de cada chat para a verificação de propriedade (em cache no token_auth)
+@token_auth.chat_owner_loader
+def load_chat_owner(chat_id):
+    return db.session.query(Chat.user_id).filter(Chat.id == chat_id).scalar()
+
+@token_auth.token_version_loader
+def load_token_version(user_id):
+    return db.session.query(User.token_version).filter(User.id == user_id).scalar()
+
+def get_owned_chat(chat_id, user_id=None):
+    # O cache de donos só adianta a recusa; o user_id da linha carregada é a palavra final
+    user_id = g.user_id if user_id is None else user_id
+    chat = db.session.get(Chat, chat_id)
+    if chat is None or chat.user_id != user_id:
+        token_auth.chat_owners.discard([chat_id])
+        return None
+    return chat
+
+@app.errorhandler(LLMOverloadedError)
+def llm_overloaded(e):
+    response = jsonify({'error': 'Muitas requisições ao modelo no momento. Tente novamente em instantes.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+@app.errorhandler(PasswordHasherBusyError)
+def password_hasher_busy(e):
+    response = jsonify({'error': 'Servidor ocupado no momento. Tente novamente em instantes.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
 
 @app.route('/')
 def hello():
     return "Hello, JogAI!"
 
+# --- Métricas ---
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/metrics/sql', methods=['GET'])
+def sql_metrics():
+    if not sql_instrumentation.enabled:
+        return jsonify({'error': 'Instrumentação de SQL desabilitada (SQL_INSTRUMENTATION_ENABLED).'}), 404
+    return jsonify(sql_instrumentation.snapshot()), 200
+
+# --- Busca ---
+@app.route('/api/search', methods=['GET'])
+@token_auth.login_required
+def search():
+    if not search_supported(db.engine):
+        return jsonify({'error': 'Busca disponível apenas com SQLite (FTS5).'}), 501
+
+    match_query = build_match_query(request.args.get('q'))
+    if not match_query:
+        return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+    try:
+        limit = int(request.args.get('limit') or Config.SEARCH_PAGE_DEFAULT_LIMIT)
+        offset = int(request.args.get('offset') or 0)
+    except ValueError:
+        return jsonify({'error': 'limit e offset devem ser números inteiros.'}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit ou offset inválido.'}), 400
+    limit = min(limit, Config.SEARCH_PAGE_MAX_LIMIT)
+
+    search_type = request.args.get('type') or 'all'
+    if search_type not in ('all', 'chats', 'messages'):
+        return jsonify({'error': "Parâmetro type inválido. Válidos: ['all', 'chats', 'messages']"}), 400
+
+    # Cada lista tem o seu ranking e a sua paginação (limit e offset valem para cada uma)
+    response = {}
+    for name, search_fn in (('chats', search_chats), ('messages', search_messages)):
+        if search_type not in ('all', name):
+            continue
+        results, has_more = search_fn(db.session, g.user_id, match_query, limit, offset)
+        response[name] = {
+            'results': results,
+            'pagination': {'limit': limit, 'offset': offset, 'has_more': has_more,
+                           'next_offset': offset + limit if has_more else None},
+        }
+    return jsonify(response), 200
+
 # --- Autenticação ---
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -68,26 +211,266 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     if user and user.check_password(password):
-        return jsonify({'message': 'Login bem-sucedido!', 'user_id': user.id, 'username': user.username}), 200
+        # Hash gravado com parâmetros antigos: regrava com os atuais (PASSWORD_HASH_METHOD)
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        return jsonify({
+            'message': 'Login bem-sucedido!', 'user_id': user.id, 'username': user.username,
+            # Enviado pelo cliente em "Authorization: Bearer <token>" nas demais rotas
+            'access_token': token_auth.issue_token(user.id, user.token_version), 'token_type': 'Bearer',
+            'expires_in': token_auth.max_age_seconds,
+        }), 200
     
     return jsonify({'error': 'Credenciais inválidas'}), 401
 
 # --- Chats ---
-def format_initial_prompt(chat_config):
+def build_chat_config_for_prompt(chat):
+    return {
+        "universo": chat.universo, "universo_outro": chat.universo_outro,
+        "genero": chat.genero, "genero_outro": chat.genero_outro,
+        "nome_protagonista": chat.nome_protagonista,
+        "nome_universo_jogo": chat.nome_universo_jogo,
+        "nome_antagonista": chat.nome_antagonista,
+        "inspiracao": chat.inspiracao,
+        "age": chat.age # Adicionar idade ao prompt inicial
+    }
+
+def build_scenario_entries(chat, chat_config):
+    # 1. Adicionar o prompt de cenário silencioso ao histórico do Gemini
+    base_scenario_prompt = format_initial_prompt(chat_config)
+
+    # Este é o prompt que configura o Gemini sobre o cenário, mas não é uma mensagem visível.
+    # Em seguida, uma resposta placeholder do modelo para o prompt de cenário.
+    # Isso ajuda o Gemini a entender que o prompt de cenário foi processado.
+    return [
+        {"role": "user", "parts": [base_scenario_prompt]},
+        {"role": "model", "parts": ["Entendido. Estou ciente do cenário e pronto para prosseguir com a aventura."]},
+    ]
+
+def summarize_history(prompt):
+    return llm.generate(prompt, call_type='summary').text
+
+def window_message_stats(chat):
+    # Contagem e maior id das mensagens posteriores ao resumo, para validar a sessão em cache
+    return (db.session.query(func.count(Message.id), func.max(Message.id))
+            .filter(Message.chat_id == chat.id, Message.id > (chat.summarized_until_id or 0))
+            .one())
+
+def prepare_turn(chat, chat_config):
+    # Retorna a sessão do chat com o histórico pronto para o Gemini:
+    # 2. resumo contínuo (se houver) e as mensagens recentes da janela.
+    # Em turnos consecutivos a sessão vem do cache; senão é montada a partir do banco.
+    session = None
+    if chat_sessions.enabled:
+        message_count, last_message_id = window_message_stats(chat)
+        fingerprint = chat_session_fingerprint(chat.status, chat.summarized_until_id, chat.history_summary, chat_config)
+        session = chat_sessions.checkout(chat.id, fingerprint, message_count, last_message_id)
+    if session is None:
+        session = ChatSession(chat.id, load_history_window(chat), build_scenario_entries(chat, chat_config),
+                              has_user_message=not is_first_user_message(chat))
+
+    # Se a janela passou do orçamento de tokens, incorpora as mensagens mais antigas ao resumo do chat
+    if fold_history_window(chat, session.window, summarize_history,
+                           Config.CHAT_HISTORY_TOKEN_BUDGET, Config.CHAT_HISTORY_MIN_RECENT_MESSAGES):
+        # O resumo vale independentemente do sucesso do turno
+        db.session.commit()
+        session.rebuild_history()
+    return session
+
+def is_first_user_message(chat):
+    # O chat passa para 'started' quando o jogador responde pela primeira vez
+    if chat.status != 'new':
+        return False
+    return Message.query.with_entities(Message.id).filter_by(chat_id=chat.id, sender='user').first() is None
+
+def sse_event(event, payload):
+    # Formata um evento Server-Sent Events com payload JSON
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def format_initial_prompt(chat_config, template_name='default'):
     try:
-        with open(Config.INITIAL_CHAT_PROMPT_FILE, 'r', encoding='utf-8') as f:
-            template_string = f.read()
         # Renderiza o template com os dados do chat_config
         # Garante que apenas chaves existentes em chat_config e no template sejam usadas
         # e que valores None sejam tratados (Jinja2 faz isso bem por padrão)
-        return render_template_string(template_string, **chat_config)
+        return prompt_templates.render(template_name, chat_config)
     except FileNotFoundError:
         return "Como posso te ajudar hoje?"
     except Exception as e:
         print(f"Erro ao formatar prompt inicial: {e}")
         return "Como posso te ajudar hoje?" # Fallback
 
+def build_title_generation_prompt(config_data):
+    prompt_elements = []
+    if config_data.get("universo") and config_data["universo"].lower() != 'outro':
+        prompt_elements.append(f"universo de {config_data['universo']}")
+    elif config_data.get("universo_outro"):
+         prompt_elements.append(f"universo de {config_data['universo_outro']}")
+    
+    if config_data.get("genero") and config_data["genero"].lower() != 'outro':
+        prompt_elements.append(f"gênero {config_data['genero']}")
+    elif config_data.get("genero_outro"):
+        prompt_elements.append(f"gênero {config_data['genero_outro']}")
+
+    if config_data.get("nome_protagonista"):
+        prompt_elements.append(f"com protagonista {config_data['nome_protagonista']}")
+    
+    description_for_title = ", ".join(prompt_elements)
+    if not description_for_title:
+        description_for_title = "uma aventura de RPG"
+    
+    return (
+        f"Sugira um título curto e criativo (entre 3 e 7 palavras) para uma aventura de RPG sobre {description_for_title}. "
+        f"O título deve ser instigante. Exemplos: 'A Lança do Dragão Ancestral', 'Sombras em Neonville', 'O Enigma da Floresta Sussurrante'. "
+        "Responda APENAS com o título sugerido, sem introduções, explicações ou aspas em volta."
+    )
+
+# Um título de 3 a 7 palavras cabe com folga neste limite
+TITLE_MAX_OUTPUT_TOKENS = 40
+
+def clean_generated_title(text):
+    if not text or not text.strip():
+        return None
+    title = text.strip()
+    # Limpeza adicional de possíveis prefixos ou sufixos comuns que o modelo pode adicionar
+    if title.lower().startswith("título:"):
+        title = title[len("título:"):].strip()
+    if title.startswith('"') and title.endswith('"'):
+        title = title[1:-1]
+    if title.startswith("'") and title.endswith("'"):
+        title = title[1:-1]
+    return title[:100] or None # Limite da coluna Chat.title
+
+def fallback_chat_title(config_data, frontend_title_placeholder):
+    if config_data.get("universo") and config_data["universo"].lower() != 'outro':
+        return f"Aventura em {config_data['universo']}"
+    elif config_data.get("universo_outro"):
+        return f"Aventura em {config_data['universo_outro']}"
+    return frontend_title_placeholder # Usa o que o frontend mandou ou o default "Nova Aventura RPG"
+
+def generate_chat_title(chat_id, config_data, provisional_title):
+    # Roda em segundo plano: pede o título ao Gemini e substitui o título provisório
+    title_prompt = build_title_generation_prompt(config_data)
+    generated_title = title_cache.get('title', llm.model_name, title_prompt) if title_cache else None
+    try:
+        if not generated_title:
+            title_response = llm.generate(title_prompt, max_output_tokens=TITLE_MAX_OUTPUT_TOKENS, call_type='title')
+            generated_title = clean_generated_title(title_response.text)
+            if generated_title and title_cache:
+                title_cache.add('title', llm.model_name, title_prompt, generated_title)
+    except Exception as e:
+        print(f"Erro ao gerar título com Gemini: {e}")
+        # Falha silenciosa, o chat fica com o título provisório
+
+    try:
+        if generated_title:
+            # Só troca o título se o usuário não o renomeou nesse meio tempo
+            Chat.query.filter(Chat.id == chat_id, Chat.title == provisional_title).update(
+                {'title': generated_title}, synchronize_session=False)
+        Chat.query.filter(Chat.id == chat_id).update({'title_pending': False}, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def build_intro_prompt(chat):
+    base_scenario_prompt = format_initial_prompt(build_chat_config_for_prompt(chat))
+    
+    # Instrução adicional para o Gemini gerar o resumo e a pergunta
+    return (
+        base_scenario_prompt +
+        "\\n\\n---\\n"
+        "Com base no cenário acima, sua primeira resposta ao jogador deve ser:"
+        "\\n1. Um breve e criativo resumo da aventura que você está prestes a mestrar (2-3 frases)."
+        "\\n2. A pergunta clara: 'Deseja iniciar a aventura agora?'"
+        "\\nResponda apenas com esse resumo e a pergunta."
+    )
+
+def as_utc(value):
+    # O SQLite devolve datetimes sem fuso; todos são gravados em UTC
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+def intro_claimable(intro_status, intro_attempts, intro_started_at, now=None):
+    # A introdução pode (re)começar se nunca foi tentada, se falhou e o backoff já
+    # passou, ou se ficou em 'generating' além do timeout (quem gerava morreu no meio).
+    # Depois de INTRO_MAX_ATTEMPTS tentativas o chat fica sem introdução.
+    if intro_status in (None, 'pending'):
+        return True
+    if intro_status not in ('failed', 'generating') or (intro_attempts or 0) >= Config.INTRO_MAX_ATTEMPTS:
+        return False
+    if intro_started_at is None:
+        return True
+    elapsed = ((now or datetime.now(timezone.utc)) - as_utc(intro_started_at)).total_seconds()
+    if intro_status == 'generating':
+        return elapsed >= Config.INTRO_GENERATING_TIMEOUT_SECONDS
+    return elapsed >= Config.INTRO_RETRY_BACKOFF_SECONDS * 2 ** max((intro_attempts or 1) - 1, 0)
+
+def finish_chat_intro(chat_id, attempt, intro_status):
+    # Só a tentativa dona do claim encerra; uma tentativa retomada por timeout não é sobrescrita
+    return Chat.query.filter(
+        Chat.id == chat_id, Chat.intro_status == 'generating', Chat.intro_attempts == attempt
+    ).update({'intro_status': intro_status}, synchronize_session=False)
+
+def generate_chat_intro(chat_id):
+    # Roda em segundo plano. Single-flight entre processos: só quem conseguir mudar
+    # intro_status para 'generating' (compare-and-set em intro_status e intro_attempts)
+    # gera a introdução, então nunca há duas chamadas ao Gemini nem mensagens de
+    # introdução duplicadas para o mesmo chat.
+    row = (db.session.query(Chat.intro_status, Chat.intro_attempts, Chat.intro_started_at)
+           .filter(Chat.id == chat_id, Chat.status == 'new').first())
+    if row is None or not intro_claimable(row.intro_status, row.intro_attempts, row.intro_started_at):
+        db.session.commit()
+        return
+
+    attempt = (row.intro_attempts or 0) + 1
+    claimed = Chat.query.filter(
+        Chat.id == chat_id,
+        Chat.status == 'new',
+        Chat.intro_status.is_(None) if row.intro_status is None else Chat.intro_status == row.intro_status,
+        Chat.intro_attempts == row.intro_attempts,
+    ).update({'intro_status': 'generating', 'intro_attempts': attempt,
+              'intro_started_at': datetime.now(timezone.utc)}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return
+
+    chat = db.session.get(Chat, chat_id)
+    if Message.query.with_entities(Message.id).filter_by(chat_id=chat_id).first() is not None:
+        # O jogador já começou a conversa; não há mais o que introduzir
+        finish_chat_intro(chat_id, attempt, 'ready')
+        db.session.commit()
+        return
+
+    prompt_for_gemini_intro = build_intro_prompt(chat)
+    db.session.commit() # Não manter transação aberta durante a chamada ao Gemini
+
+    try:
+        # Usar uma sessão de chat temporária para esta primeira mensagem
+        # Não passamos histórico pois o prompt_for_gemini_intro já é completo.
+        intro_response = llm.generate(prompt_for_gemini_intro, call_type='intro')
+        gemini_intro_message_content = intro_response.text
+    except Exception as e:
+        print(f"Erro ao gerar mensagem inicial do Gemini para chat {chat_id} (tentativa {attempt}): {e}")
+        # Uma nova tentativa é feita num GET depois do backoff (ver intro_claimable)
+        finish_chat_intro(chat_id, attempt, 'failed')
+        db.session.commit()
+        return
+
+    try:
+        if finish_chat_intro(chat_id, attempt, 'ready'):
+            db.session.add(Message(chat_id=chat_id, sender='gemini', content=gemini_intro_message_content))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        finish_chat_intro(chat_id, attempt, 'failed')
+        db.session.commit()
+        raise
+
+def schedule_chat_intro(chat_id):
+    return background_tasks.submit_once(('intro', chat_id), generate_chat_intro, chat_id)
+
 @app.route('/api/chats', methods=['POST'])
+@token_auth.login_required
 def create_chat():
     data = request.get_json()
     user_id = data.get('user_id')
@@ -116,73 +499,22 @@ def create_chat():
         "age": age # Adiciona a idade validada ao config_data
     }
 
-    if not user_id:
-        return jsonify({'error': 'user_id é obrigatório'}), 400
-    
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
-
-    # Geração do título pelo Gemini
-    generated_title_by_gemini = None
-    if model: # Tentar gerar título apenas se o modelo Gemini estiver configurado
-        try:
-            prompt_elements = []
-            if config_data.get("universo") and config_data["universo"].lower() != 'outro':
-                prompt_elements.append(f"universo de {config_data['universo']}")
-            elif config_data.get("universo_outro"):
-                 prompt_elements.append(f"universo de {config_data['universo_outro']}")
-            
-            if config_data.get("genero") and config_data["genero"].lower() != 'outro':
-                prompt_elements.append(f"gênero {config_data['genero']}")
-            elif config_data.get("genero_outro"):
-                prompt_elements.append(f"gênero {config_data['genero_outro']}")
-
-            if config_data.get("nome_protagonista"):
-                prompt_elements.append(f"com protagonista {config_data['nome_protagonista']}")
-            
-            description_for_title = ", ".join(prompt_elements)
-            if not description_for_title:
-                description_for_title = "uma aventura de RPG"
-            
-            title_generation_prompt = (
-                f"Sugira um título curto e criativo (entre 3 e 7 palavras) para uma aventura de RPG sobre {description_for_title}. "
-                f"O título deve ser instigante. Exemplos: 'A Lança do Dragão Ancestral', 'Sombras em Neonville', 'O Enigma da Floresta Sussurrante'. "
-                "Responda APENAS com o título sugerido, sem introduções, explicações ou aspas em volta."
-            )
-            
-            title_chat_session = model.start_chat(history=[])
-            title_response = title_chat_session.send_message(title_generation_prompt)
-            
-            if title_response.text and title_response.text.strip():
-                generated_title_by_gemini = title_response.text.strip()
-                # Limpeza adicional de possíveis prefixos ou sufixos comuns que o modelo pode adicionar
-                if generated_title_by_gemini.lower().startswith("título:"):
-                    generated_title_by_gemini = generated_title_by_gemini[len("título:"):].strip()
-                if generated_title_by_gemini.startswith('"') and generated_title_by_gemini.endswith('"'):
-                    generated_title_by_gemini = generated_title_by_gemini[1:-1]
-                if generated_title_by_gemini.startswith("'") and generated_title_by_gemini.endswith("'"):
-                    generated_title_by_gemini = generated_title_by_gemini[1:-1]
+    # O dono do chat é o usuário do token; um user_id no corpo, se enviado, precisa ser o mesmo
+    if user_id is not None and not token_auth.user_matches(user_id):
+        return jsonify({'error': 'Acesso negado para este usuário'}), 403
+    user_id = g.user_id
 
-        except Exception as e:
-            print(f"Erro ao gerar título com Gemini: {e}")
-            # Falha silenciosa, usaremos o fallback
-
-    # Determinar o título final
-    final_chat_title = generated_title_by_gemini
-    if not final_chat_title:
-        # Fallback se o Gemini não gerar título
-        if config_data.get("universo") and config_data["universo"].lower() != 'outro':
-            final_chat_title = f"Aventura em {config_data['universo']}"
-        elif config_data.get("universo_outro"):
-            final_chat_title = f"Aventura em {config_data['universo_outro']}"
-        else:
-            final_chat_title = frontend_title_placeholder # Usa o que o frontend mandou ou o default "Nova Aventura RPG"
+    # O chat é criado na hora com o título provisório; o título do Gemini é gerado
+    # em segundo plano e o cliente acompanha pelo campo title_pending
+    # (GET /api/chat/<chat_id>/title).
+    provisional_title = fallback_chat_title(config_data, frontend_title_placeholder)
 
     # Criação do chat com todos os dados, incluindo a idade
     new_chat = Chat(
         user_id=user_id, 
-        title=final_chat_title, 
+        title=provisional_title, 
+        title_pending=llm is not None, # Gerar título apenas se o modelo Gemini estiver configurado
+        intro_status='pending' if llm else None,
         status='new',
         # Removido o desempacotamento de config_data aqui para definir explicitamente
         universo=config_data.get("universo"),
@@ -198,213 +530,540 @@ def create_chat():
     db.session.add(new_chat)
     db.session.commit()
 
-    return jsonify(new_chat.to_dict(include_messages=True)), 201
+    response_body = new_chat.to_dict(include_messages=True)
+    if new_chat.title_pending:
+        background_tasks.submit(generate_chat_title, new_chat.id, config_data, provisional_title)
+    if new_chat.intro_status == 'pending':
+        # A introdução começa a ser gerada assim que o chat existe no banco
+        schedule_chat_intro(new_chat.id)
+
+    return jsonify(response_body), 201
+
+def encode_chat_cursor(last_accessed_at, chat_id):
+    raw = f"{last_accessed_at.isoformat()}|{chat_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_chat_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, chat_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(chat_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Cursor inválido.')
+
+def pending_chat_accesses(user_id):
+    # Acessos deste usuário ainda em memória no access_recorder (chat_id -> instante),
+    # sem fuso como os datetimes lidos do banco
+    return {chat_id: when.astimezone(timezone.utc).replace(tzinfo=None)
+            for chat_id, when in access_recorder.pending_for_user(user_id).items()}
+
+def user_chats_etag(user_id, variant, pending=None):
+    # Toda alteração de um chat (rotas, ações em lote, título e introdução em segundo
+    # plano, gravação dos acessos) atualiza updated_at; a contagem e o maior id cobrem
+    # exclusões e criações. Os acessos ainda não gravados entram à parte.
+    count, max_updated_at, max_id = db.session.query(
+        func.count(Chat.id), func.max(Chat.updated_at), func.max(Chat.id)
+    ).filter(Chat.user_id == user_id).one()
+    accesses = ",".join(f"{chat_id}@{when.isoformat()}" for chat_id, when in sorted((pending or {}).items()))
+    fingerprint = f"{user_id}:{variant}:{count}:{max_updated_at}:{max_id}:{accesses}"
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
 
 @app.route('/api/chats/<int:user_id>', methods=['GET'])
+@token_auth.login_required
 def get_user_chats(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    if not token_auth.user_matches(user_id):
+        return jsonify({'error': 'Acesso negado para este usuário'}), 403
 
-    chats = Chat.query.filter_by(user_id=user_id).order_by(Chat.last_accessed_at.desc()).all()
-    return jsonify([chat.to_dict() for chat in chats]), 200 # Usar to_dict para cada chat
+    summary_view = request.args.get('view') == 'summary'
+    cursor = request.args.get('cursor')
+    limit = None
+    if summary_view:
+        try:
+            limit = int(request.args.get('limit') or Config.CHATS_PAGE_DEFAULT_LIMIT)
+        except ValueError:
+            return jsonify({'error': 'limit deve ser um número inteiro.'}), 400
+        limit = max(1, min(limit, Config.CHATS_PAGE_MAX_LIMIT))
+
+    # Acessos ainda não gravados (chat recém-aberto) entram na ordenação e no ETag por
+    # cima do banco, sem escrever nada neste GET. São os deste processo; nos demais
+    # workers o acesso aparece depois da próxima gravação em lote.
+    pending = pending_chat_accesses(user_id)
+
+    # Dashboard inalterado custa só a consulta agregada e um 304, sem serialização
+    etag = user_chats_etag(user_id, f"{request.args.get('view')}:{limit}:{cursor}", pending)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    if not summary_view:
+        chats = Chat.query.filter_by(user_id=user_id).order_by(Chat.last_accessed_at.desc()).all()
+        accessed_at = {chat.id: max(chat.last_accessed_at, pending[chat.id]) for chat in chats if chat.id in pending}
+        if accessed_at:
+            chats.sort(key=lambda chat: accessed_at.get(chat.id, chat.last_accessed_at), reverse=True)
+        data = [chat.to_dict() for chat in chats] # Usar to_dict para cada chat
+        for item in data:
+            if item['id'] in accessed_at:
+                item['last_accessed_at'] = accessed_at[item['id']].isoformat()
+        response = jsonify(data)
+    else:
+        # Visão resumida: só as colunas do dashboard, com paginação por keyset
+        # (last_accessed_at, id) no mesmo índice da listagem completa
+        query = db.session.query(*CHAT_SUMMARY_COLUMNS).filter(Chat.user_id == user_id)
+        cursor_key = None
+        if cursor:
+            try:
+                cursor_key = decode_chat_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = query.filter(tuple_(Chat.last_accessed_at, Chat.id) < cursor_key)
+        if pending:
+            # Os chats com acesso pendente são ordenados pelo instante em memória
+            query = query.filter(Chat.id.notin_(list(pending)))
+        entries = [(row.last_accessed_at, row.id, row) for row in
+                   query.order_by(Chat.last_accessed_at.desc(), Chat.id.desc()).limit(limit + 1).all()]
+        if pending:
+            for row in (db.session.query(*CHAT_SUMMARY_COLUMNS)
+                        .filter(Chat.user_id == user_id, Chat.id.in_(list(pending)))):
+                accessed_at = max(row.last_accessed_at, pending[row.id])
+                if cursor_key is None or (accessed_at, row.id) < cursor_key:
+                    entries.append((accessed_at, row.id, row))
+            entries.sort(key=lambda entry: entry[:2], reverse=True)
+            entries = entries[:limit + 1]
+
+        page = entries[:limit]
+        next_cursor = encode_chat_cursor(page[-1][0], page[-1][1]) if len(entries) > limit else None
+        chats = []
+        for accessed_at, _, row in page:
+            item = chat_summary_to_dict(row)
+            item['last_accessed_at'] = accessed_at.isoformat()
+            chats.append(item)
+        response = jsonify({'chats': chats, 'next_cursor': next_cursor})
+
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response, 200
+
+def chat_has_messages(chat_id):
+    return Message.query.with_entities(Message.id).filter_by(chat_id=chat_id).first() is not None
+
+def parse_message_page_args(args):
+    # Paginação por cursor: before_id (mensagens mais antigas, da mais recente para trás)
+    # ou since_id (apenas mensagens novas, para sincronização incremental do cliente)
+    values = {}
+    for name in ('limit', 'before_id', 'since_id'):
+        raw = args.get(name)
+        if raw is None or raw == '':
+            values[name] = None
+            continue
+        try:
+            values[name] = int(raw)
+        except ValueError:
+            raise ValueError(f'{name} deve ser um número inteiro.')
+        if values[name] < (1 if name == 'limit' else 0):
+            raise ValueError(f'{name} inválido.')
+
+    if values['before_id'] is not None and values['since_id'] is not None:
+        raise ValueError('Use before_id ou since_id, não ambos.')
+
+    limit = min(values['limit'] or Config.MESSAGES_PAGE_DEFAULT_LIMIT, Config.MESSAGES_PAGE_MAX_LIMIT)
+    return limit, values['before_id'], values['since_id']
+
+def fetch_message_page(chat_id, limit, before_id=None, since_id=None):
+    # Retorna (mensagens em ordem cronológica, has_more). Busca limit + 1 para saber se há mais.
+    query = Message.query.filter(Message.chat_id == chat_id)
+    if since_id is not None:
+        rows = query.filter(Message.id > since_id).order_by(Message.id.asc()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    rows = query.order_by(Message.id.desc()).limit(limit + 1).all()
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+def page_messages(messages, limit, before_id=None, since_id=None):
+    # Mesma paginação do fetch_message_page sobre uma lista em ordem de id (transcrições arquivadas)
+    if since_id is not None:
+        rows = [message for message in messages if message.id > since_id]
+        return rows[:limit], len(rows) > limit
+    if before_id is not None:
+        messages = [message for message in messages if message.id < before_id]
+    return messages[-limit:], len(messages) > limit
 
 @app.route('/api/chat/<int:chat_id>', methods=['GET'])
+@token_auth.chat_owner_required
 def get_chat_details(chat_id):
-    chat = Chat.query.get(chat_id)
+    chat = get_owned_chat(chat_id)
     if not chat:
         return jsonify({'error': 'Chat não encontrado'}), 404
     
-    # Se o chat é novo e não tem mensagens, gerar a primeira mensagem do Gemini
-    if chat.status == 'new' and not chat.messages:
-        if not model:
-            # Não bloquear o carregamento do chat se o Gemini não estiver disponível,
-            # mas talvez logar ou retornar uma mensagem indicando isso.
-            # Por enquanto, o chat ficará vazio e o usuário precisará enviar a primeira msg.
-            pass # O fluxo normal de send_message lidará com a inicialização se Gemini estiver offline
-        else:
-            try:
-                chat_config_for_prompt = {
-                    "universo": chat.universo, "universo_outro": chat.universo_outro,
-                    "genero": chat.genero, "genero_outro": chat.genero_outro,
-                    "nome_protagonista": chat.nome_protagonista,
-                    "nome_universo_jogo": chat.nome_universo_jogo,
-                    "nome_antagonista": chat.nome_antagonista,
-                    "inspiracao": chat.inspiracao,
-                    "age": chat.age # Adicionar idade ao prompt inicial
-                }
-                base_scenario_prompt = format_initial_prompt(chat_config_for_prompt)
-                
-                # Instrução adicional para o Gemini gerar o resumo e a pergunta
-                prompt_for_gemini_intro = (
-                    base_scenario_prompt +
-                    "\\n\\n---\\n"
-                    "Com base no cenário acima, sua primeira resposta ao jogador deve ser:"
-                    "\\n1. Um breve e criativo resumo da aventura que você está prestes a mestrar (2-3 frases)."
-                    "\\n2. A pergunta clara: 'Deseja iniciar a aventura agora?'"
-                    "\\nResponda apenas com esse resumo e a pergunta."
-                )
-
-                # Usar uma sessão de chat temporária para esta primeira mensagem
-                # Não passamos histórico pois o prompt_for_gemini_intro já é completo.
-                intro_chat_session = model.start_chat(history=[])
-                intro_response = intro_chat_session.send_message(prompt_for_gemini_intro)
-                gemini_intro_message_content = intro_response.text
-
-                first_gemini_message = Message(chat_id=chat.id, sender='gemini', content=gemini_intro_message_content)
-                db.session.add(first_gemini_message)
-                chat.last_accessed_at = datetime.now(timezone.utc) # Atualiza o acesso
-                db.session.commit()
-            except Exception as e:
-                print(f"Erro ao gerar mensagem inicial do Gemini para chat {chat.id}: {e}")
-                # Não falhar o request, apenas o chat não terá a mensagem inicial do Gemini.
-                # O usuário poderá iniciar a conversa normalmente.
-                db.session.rollback()
+    # A introdução é gerada em segundo plano (ver generate_chat_intro); esta rota
+    # nunca espera o Gemini. Chats novos ainda sem introdução (criados antes do
+    # pipeline, cuja geração falhou ou foi abandonada) são reagendados, respeitando
+    # o backoff e o limite de tentativas.
+    archived = chat.transcript_archived_at is not None
+    if (llm and chat.status == 'new' and not archived
+            and intro_claimable(chat.intro_status, chat.intro_attempts, chat.intro_started_at)
+            and not chat_has_messages(chat.id)):
+        schedule_chat_intro(chat.id)
+
+    # O último acesso é gravado em lote pelo access_recorder; a leitura não escreve no banco
+    access_recorder.touch(chat.id, chat.user_id)
+
+    # Transcrição arquivada: descomprimida em memória, sem devolver as mensagens ao banco
+    archived_messages = transcript_archiver.load_messages(chat.id) if archived else None
+
+    # Sem parâmetros de paginação mantém a resposta completa (compatibilidade)
+    if not any(arg in request.args for arg in ('limit', 'before_id', 'since_id')):
+        if archived:
+            data = chat.to_dict()
+            data['messages'] = [message.to_dict() for message in archived_messages]
+            return jsonify(data), 200
+        return jsonify(chat.to_dict(include_messages=True)), 200 # Usar to_dict e incluir mensagens
 
-    chat.last_accessed_at = datetime.now(timezone.utc)
-    db.session.commit()
+    try:
+        limit, before_id, since_id = parse_message_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if archived:
+        messages, has_more = page_messages(archived_messages, limit, before_id, since_id)
+    else:
+        messages, has_more = fetch_message_page(chat.id, limit, before_id, since_id)
+    data = chat.to_dict()
+    data['messages'] = [message.to_dict() for message in messages]
+    data['pagination'] = {
+        'limit': limit,
+        'has_more': has_more,
+        # Cursor para a próxima página: mensagens mais antigas (before_id) ou novas (since_id)
+        'next_before_id': messages[0].id if messages and has_more and since_id is None else None,
+        'next_since_id': messages[-1].id if messages and since_id is not None else since_id,
+    }
+    return jsonify(data), 200
+
+# Consulta leve para o cliente acompanhar a geração do título em segundo plano
+@app.route('/api/chat/<int:chat_id>/title', methods=['GET'])
+@token_auth.chat_owner_required
+def get_chat_title(chat_id):
+    row = (db.session.query(Chat.id, Chat.title, Chat.title_pending)
+           .filter(Chat.id == chat_id, Chat.user_id == g.user_id).first())
+    if not row:
+        return jsonify({'error': 'Chat não encontrado'}), 404
+    return jsonify({'id': row.id, 'title': row.title, 'title_pending': bool(row.title_pending)}), 200
+
+# Validação dos campos editáveis do chat, compartilhada pelos PUTs de cada campo e pelo PATCH.
+# Cada função devolve o valor normalizado ou levanta ValueError com a mensagem de erro.
+def validate_chat_title(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('Título não pode ser vazio')
+    return value.strip()
+
+def validate_chat_status(value):
+    if value not in CHAT_STATUSES:
+        raise ValueError(f'Status inválido. Válidos: {CHAT_STATUSES}')
+    return value
 
-    messages = Message.query.filter_by(chat_id=chat_id).order_by(Message.timestamp.asc()).all()
+def validate_chat_observations(value):
+    # Observações podem ser string vazia para limpar
+    if not isinstance(value, str):
+        raise ValueError('Observações são obrigatórias (mesmo que string vazia)')
+    return value
+
+def validate_chat_color(value):
+    # Espera uma string hexadecimal, ex: "#RRGGBB"
+    if not isinstance(value, str) or len(value) != 7 or not value.startswith('#'):
+        raise ValueError('Formato de cor inválido. Use #RRGGBB.')
+    try:
+        int(value[1:], 16)
+    except ValueError:
+        raise ValueError('Formato de cor inválido. Use #RRGGBB.')
+    return value
 
-    return jsonify(chat.to_dict(include_messages=True)), 200 # Usar to_dict e incluir mensagens
+CHAT_FIELD_VALIDATORS = {
+    'title': validate_chat_title,
+    'status': validate_chat_status,
+    'observations': validate_chat_observations,
+    'color': validate_chat_color,
+}
 
 @app.route('/api/chat/<int:chat_id>/title', methods=['PUT'])
+@token_auth.chat_owner_required
 def update_chat_title(chat_id):
-    chat = Chat.query.get(chat_id)
+    chat = get_owned_chat(chat_id)
     if not chat:
         return jsonify({'error': 'Chat não encontrado'}), 404
 
     data = request.get_json()
-    new_title = data.get('title')
+    try:
+        new_title = validate_chat_title(data.get('title'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    if not new_title or len(new_title.strip()) == 0:
-        return jsonify({'error': 'Título não pode ser vazio'}), 400
-    
-    chat.title = new_title.strip()
+    chat.title = new_title
+    chat.title_pending = False # O título escolhido pelo usuário prevalece sobre o gerado
     chat.last_accessed_at = datetime.now(timezone.utc)
     db.session.commit()
     return jsonify(chat.to_dict()), 200 # Retornar o chat atualizado com to_dict
 
-@app.route('/api/chat/<int:chat_id>/message', methods=['POST'])
-def send_message_to_chat(chat_id):
-    if not model:
-        return jsonify({'error': 'Modelo Gemini não configurado.'}), 503
-
-    chat = Chat.query.get(chat_id)
+# Um turno de conversa é dividido em três etapas para poder ser servido tanto
+# pelas rotas Flask abaixo quanto pelo modo assíncrono (asgi.py):
+#   begin_turn  - valida a requisição e monta o histórico (banco)
+#   chamada ao LLM
+#   save_turn   - persiste as mensagens do usuário e do Gemini, juntas (banco)
+# A mensagem do usuário só é salva junto com a resposta, para não manter uma
+# transação de escrita aberta durante a chamada ao Gemini.
+#
+# O Turn leva do begin_turn o que o save_turn precisa do chat (configuração e resumo,
+# para a impressão digital da sessão), então o save_turn não recarrega o chat.
+class Turn:
+    def __init__(self, chat_id, user_message_content, session, starts_adventure, gemini_history, cached_context=None,
+                 chat_config=None, summarized_until_id=None, history_summary=None):
+        self.chat_id = chat_id
+        self.user_message_content = user_message_content
+        self.user_message_timestamp = datetime.now(timezone.utc)
+        self.session = session
+        self.starts_adventure = starts_adventure
+        # Cópia: o histórico da sessão só cresce depois que o turno é salvo.
+        # Com contexto em cache, é só a parte do histórico que ficou fora dele.
+        self.gemini_history = list(gemini_history)
+        self.cached_context = cached_context
+        self.chat_config = chat_config or {}
+        self.summarized_until_id = summarized_until_id
+        self.history_summary = history_summary
+
+    def session_fingerprint(self, status):
+        return chat_session_fingerprint(status, self.summarized_until_id, self.history_summary, self.chat_config)
+
+def begin_turn(chat_id, data, user_id):
+    # Retorna (turno, None) ou (None, (payload de erro, status))
+    access_error = token_auth.check_chat_access(user_id, chat_id)
+    if access_error:
+        return None, access_error
+
+    if not llm:
+        return None, ({'error': 'Modelo Gemini não configurado.'}, 503)
+
+    chat = get_owned_chat(chat_id, user_id)
     if not chat:
-        return jsonify({'error': 'Chat não encontrado'}), 404
-
-    data = request.get_json()
-    user_message_content = data.get('message')
+        return None, ({'error': 'Chat não encontrado'}, 404)
 
+    user_message_content = (data or {}).get('message')
     if not user_message_content:
-        return jsonify({'error': 'Mensagem é obrigatória'}), 400
+        return None, ({'error': 'Mensagem é obrigatória'}, 400)
+
+    # Chat com a transcrição arquivada voltando a ser jogado: mensagens de volta à tabela
+    if chat.transcript_archived_at is not None:
+        transcript_archiver.restore(chat.id)
+        db.session.refresh(chat)
+
+    # Histórico = cenário + resumo contínuo + janela de mensagens recentes.
+    chat_config = build_chat_config_for_prompt(chat)
+    session = prepare_turn(chat, chat_config)
+    starts_adventure = chat.status == 'new' and not session.has_user_message
+    cached_context, gemini_history = context_cache.prepare(session)
+    return Turn(chat.id, user_message_content, session, starts_adventure, gemini_history, cached_context,
+                chat_config=chat_config, summarized_until_id=chat.summarized_until_id,
+                history_summary=chat.history_summary), None
+
+def drop_evicted_context(turn, error):
+    # O provedor não tem mais o contexto em cache do turno (404): descarta o contexto e
+    # deixa o turno pronto para ser refeito com o histórico completo. Retorna False se o
+    # erro é outro.
+    if turn.cached_context is None or error_status_code(error) != 404:
+        return False
+    print(f"Contexto em cache do chat {turn.chat_id} não encontrado no provedor; refazendo o turno sem ele.")
+    context_cache.discard_evicted(turn.session)
+    turn.cached_context = None
+    turn.gemini_history = list(turn.session.history)
+    return True
+
+def generate_turn(turn):
+    try:
+        return llm.generate(turn.user_message_content, history=turn.gemini_history,
+                            cached_context=turn.cached_context, call_type='turn')
+    except Exception as e:
+        if not drop_evicted_context(turn, e):
+            raise
+    return llm.generate(turn.user_message_content, history=turn.gemini_history, call_type='turn')
+
+def stream_turn(turn, llm_stream):
+    # Repassa os trechos; com o contexto em cache perdido, refaz o stream uma vez
+    # (só antes do primeiro trecho, que já pode ter sido enviado ao cliente)
+    yielded = False
+    try:
+        for chunk in llm_stream:
+            yielded = True
+            yield chunk
+        return
+    except Exception as e:
+        if yielded or not drop_evicted_context(turn, e):
+            raise
+    yield from llm.stream(turn.user_message_content, history=turn.gemini_history, call_type='turn')
+
+def save_turn(turn, gemini_response_content):
+    # Retorna o payload da resposta, ou None se o chat foi excluído durante a chamada.
+    # Sem recarregar o chat: um UPDATE ... RETURNING grava o último acesso e devolve o
+    # status, e as duas mensagens vão num único INSERT.
+    values = {'last_accessed_at': datetime.now(timezone.utc)}
+    if turn.starts_adventure:
+        # Lógica de mudança de status:
+        # Se o chat estava 'new' e esta é a primeira mensagem *visível* do usuário,
+        # (o que significa que ele respondeu à pergunta "Deseja iniciar..."), mude para 'started'.
+        # Presumimos que a primeira mensagem do usuário é a confirmação para iniciar.
+        values['status'] = case((Chat.status == 'new', 'started'), else_=Chat.status)
 
-    # Salvar a mensagem do usuário primeiro
-    user_msg = Message(chat_id=chat.id, sender='user', content=user_message_content)
-    db.session.add(user_msg)
-    db.session.flush() # Para obter o ID da mensagem do usuário, se necessário antes do commit
-    
-    gemini_history = []
-    
-    # 1. Adicionar o prompt de cenário silencioso ao histórico do Gemini
-    chat_config_for_prompt = {
-        "universo": chat.universo, "universo_outro": chat.universo_outro,
-        "genero": chat.genero, "genero_outro": chat.genero_outro,
-        "nome_protagonista": chat.nome_protagonista,
-        "nome_universo_jogo": chat.nome_universo_jogo,
-        "nome_antagonista": chat.nome_antagonista,
-        "inspiracao": chat.inspiracao,
-        "age": chat.age # Adicionar idade ao prompt inicial
+    where = Chat.id == turn.chat_id
+    if db.engine.dialect.update_returning:
+        status = db.session.execute(update(Chat).where(where).values(**values).returning(Chat.status)).scalar()
+    else:
+        result = db.session.execute(update(Chat).where(where).values(**values))
+        status = db.session.execute(select(Chat.status).where(where)).scalar() if result.rowcount else None
+    if status is None:
+        db.session.rollback()
+        return None
+
+    user_msg = Message(chat_id=turn.chat_id, sender='user', content=turn.user_message_content,
+                       timestamp=turn.user_message_timestamp)
+    gemini_msg = Message(chat_id=turn.chat_id, sender='gemini', content=gemini_response_content,
+                         timestamp=datetime.now(timezone.utc))
+    if db.engine.dialect.insert_returning:
+        # Um INSERT com as duas linhas; os ids voltam associados ao sender (um de cada)
+        rows = [{'chat_id': message.chat_id, 'sender': message.sender, 'content': message.content,
+                 'timestamp': message.timestamp} for message in (user_msg, gemini_msg)]
+        ids = dict((sender, message_id) for message_id, sender in db.session.execute(
+            insert(Message).values(rows).returning(Message.id, Message.sender)))
+        user_msg.id, gemini_msg.id = ids['user'], ids['gemini']
+    else:
+        db.session.add_all([user_msg, gemini_msg])
+        db.session.flush()
+    # Serializadas antes do commit, que expira os objetos (evita um SELECT por mensagem)
+    payload = {
+        'user_message': user_msg.to_dict(),
+        'gemini_message': gemini_msg.to_dict(),
+        'chat_status': status # O status do chat pode ter mudado para 'started'
     }
-    base_scenario_prompt = format_initial_prompt(chat_config_for_prompt)
-    
-    # Este é o prompt que configura o Gemini sobre o cenário, mas não é uma mensagem visível.
-    gemini_history.append({"role": "user", "parts": [base_scenario_prompt]})
-    # Adicionar uma resposta placeholder do modelo para o prompt de cenário.
-    # Isso ajuda o Gemini a entender que o prompt de cenário foi processado.
-    gemini_history.append({"role": "model", "parts": ["Entendido. Estou ciente do cenário e pronto para prosseguir com a aventura."]})
+    db.session.commit()
 
-    # 2. Carregar todas as mensagens visíveis do banco (incluindo a primeira do Gemini e a atual do usuário)
-    # Precisamos garantir que a mensagem do usuário recém-adicionada seja incluída.
-    db_messages = Message.query.filter_by(chat_id=chat_id).order_by(Message.timestamp.asc()).all()
+    # A sessão segue para o próximo turno já com as duas mensagens novas
+    turn.session.append_message(payload['user_message']['id'], 'user', turn.user_message_content)
+    turn.session.append_message(payload['gemini_message']['id'], 'gemini', gemini_response_content)
+    chat_sessions.store(turn.session, turn.session_fingerprint(status))
 
-    for msg in db_messages:
-        role = "user" if msg.sender == "user" else "model"
-        gemini_history.append({"role": role, "parts": [msg.content]})
-    
-    # A mensagem atual do usuário já foi adicionada a db_messages antes desta query,
-    # ou se não, precisa ser explicitamente adicionada ao gemini_history se db_messages for consultada antes do flush/commit.
-    # A forma atual (user_msg adicionada ao BD, depois query db_messages) deve incluir a msg do usuário.
+    # Retornar apenas as novas mensagens e o status atualizado do chat
+    return payload
+
+@app.route('/api/chat/<int:chat_id>/message', methods=['POST'])
+@token_auth.login_required
+def send_message_to_chat(chat_id):
+    turn, error = begin_turn(chat_id, request.get_json(), g.user_id)
+    if error:
+        return jsonify(error[0]), error[1]
 
     try:
-        # Iniciar a sessão de chat com o histórico construído
-        # O histórico já contém a última mensagem do usuário.
-        chat_session = model.start_chat(history=gemini_history[:-1] if len(gemini_history) > 1 else [])
-        response = chat_session.send_message(gemini_history[-1]['parts']) # Envia a última mensagem (que é do usuário)
-        
+        response = generate_turn(turn)
         gemini_response_content = response.text
 
+    except LLMOverloadedError:
+        db.session.rollback()
+        raise # Respondido como 429 com Retry-After
     except Exception as e:
-        db.session.rollback() # Reverter a adição da mensagem do usuário se o Gemini falhar
+        db.session.rollback()
         return jsonify({'error': f'Erro ao comunicar com o Gemini: {str(e)}'}), 500
 
-    gemini_msg = Message(chat_id=chat.id, sender='gemini', content=gemini_response_content)
-    db.session.add(gemini_msg)
-
-    # Lógica de mudança de status:
-    # Se o chat estava 'new' e esta é a primeira mensagem *visível* do usuário,
-    # (o que significa que ele respondeu à pergunta "Deseja iniciar..."), mude para 'started'.
-    # Contamos as mensagens de usuário no BD *antes* da atual ser totalmente commitada,
-    # mas como já fizemos add e flush, ela estará lá.
-    
-    # Para ter certeza, contamos as mensagens de usuário no `db_messages` que já foi carregado e inclui a atual.
-    user_visible_messages_count = sum(1 for m in db_messages if m.sender == 'user')
+    try:
+        payload = save_turn(turn, gemini_response_content)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao salvar mensagens: {str(e)}'}), 500
+    if payload is None:
+        return jsonify({'error': 'Chat não encontrado'}), 404
+    return jsonify(payload), 200
+
+# Variante em streaming (SSE) do envio de mensagem: os trechos do Gemini são
+# repassados ao cliente assim que chegam. As mensagens do usuário e do Gemini
+# só são persistidas, juntas, quando o stream termina com sucesso.
+@app.route('/api/chat/<int:chat_id>/message/stream', methods=['POST'])
+@token_auth.login_required
+def stream_message_to_chat(chat_id):
+    turn, error = begin_turn(chat_id, request.get_json(), g.user_id)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    # A vaga no despachante é reservada antes de responder: sem vaga, o cliente
+    # recebe 429 em vez de um stream que começa e falha
+    try:
+        llm_stream = llm.stream(turn.user_message_content, history=turn.gemini_history,
+                                cached_context=turn.cached_context, call_type='turn')
+    except LLMOverloadedError:
+        db.session.rollback()
+        raise # Respondido como 429 com Retry-After
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao comunicar com o Gemini: {str(e)}'}), 500
 
-    if chat.status == 'new' and user_visible_messages_count == 1:
-        # Presumimos que a primeira mensagem do usuário é a confirmação para iniciar.
-        # Poderíamos adicionar uma verificação do conteúdo da mensagem aqui se quiséssemos ser mais estritos.
-        chat.status = 'started'
-    
-    chat.last_accessed_at = datetime.now(timezone.utc)
-    db.session.commit()
+    def generate():
+        chunks = []
+        try:
+            for chunk in stream_turn(turn, llm_stream):
+                text = chunk.text
+                if text:
+                    chunks.append(text)
+                    yield sse_event('chunk', {'text': text})
+        except Exception as e:
+            db.session.rollback()
+            yield sse_event('error', {'error': f'Erro ao comunicar com o Gemini: {str(e)}'})
+            return
 
-    # Retornar apenas as novas mensagens e o status atualizado do chat
-    return jsonify({
-        'user_message': user_msg.to_dict(),
-        'gemini_message': gemini_msg.to_dict(),
-        'chat_status': chat.status # O status do chat pode ter mudado para 'started'
-    }), 200
+        try:
+            # A sessão da view já foi encerrada quando o stream roda; save_turn não depende dela
+            payload = save_turn(turn, "".join(chunks))
+        except Exception as e:
+            db.session.rollback()
+            yield sse_event('error', {'error': f'Erro ao salvar mensagens: {str(e)}'})
+            return
+        if payload is None:
+            yield sse_event('error', {'error': 'Chat não encontrado'})
+            return
+
+        yield sse_event('done', payload)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @app.route('/api/chat/<int:chat_id>/status', methods=['PUT'])
+@token_auth.chat_owner_required
 def update_chat_status(chat_id):
-    chat = Chat.query.get(chat_id)
+    chat = get_owned_chat(chat_id)
     if not chat:
         return jsonify({'error': 'Chat não encontrado'}), 404
 
     data = request.get_json()
-    new_status = data.get('status')
-    valid_statuses = ['new', 'started', 'finished', 'cancelled']
-
-    if not new_status or new_status not in valid_statuses:
-        return jsonify({'error': f'Status inválido. Válidos: {valid_statuses}'}), 400
+    try:
+        new_status = validate_chat_status(data.get('status'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     chat.status = new_status
     chat.last_accessed_at = datetime.now(timezone.utc)
     db.session.commit()
+    chat_sessions.invalidate([chat_id])
     return jsonify(chat.to_dict()), 200 # Retornar o chat atualizado com to_dict
 
 @app.route('/api/chat/<int:chat_id>/observations', methods=['PUT'])
+@token_auth.chat_owner_required
 def update_chat_observations(chat_id):
-    chat = Chat.query.get(chat_id)
+    chat = get_owned_chat(chat_id)
     if not chat:
         return jsonify({'error': 'Chat não encontrado'}), 404
 
     data = request.get_json()
-    new_observations = data.get('observations')
-    # Observações podem ser string vazia para limpar
-    if new_observations is None:
-        return jsonify({'error': 'Observações são obrigatórias (mesmo que string vazia)'}), 400
+    try:
+        new_observations = validate_chat_observations(data.get('observations'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     chat.observations = new_observations
     chat.last_accessed_at = datetime.now(timezone.utc)
@@ -413,61 +1072,165 @@ def update_chat_observations(chat_id):
 
 # Rota para atualizar a cor de um chat
 @app.route('/api/chat/<int:chat_id>/color', methods=['PUT'])
+@token_auth.chat_owner_required
 def update_chat_color(chat_id):
-    chat = Chat.query.get(chat_id)
+    chat = get_owned_chat(chat_id)
     if not chat:
         return jsonify({'error': 'Chat não encontrado'}), 404
 
     data = request.get_json()
-    new_color = data.get('color') # Espera uma string hexadecimal, ex: "#RRGGBB"
-
-    if not new_color or not isinstance(new_color, str) or not new_color.startswith('#') or len(new_color) != 7:
-        try:
-            # Tenta validar se o restante são caracteres hexadecimais válidos
-            int(new_color[1:], 16)
-        except ValueError:
-            return jsonify({'error': 'Formato de cor inválido. Use #RRGGBB.'}), 400
-        if len(new_color[1:]) != 6:
-             return jsonify({'error': 'Formato de cor inválido. Use #RRGGBB.'}), 400
+    try:
+        new_color = validate_chat_color(data.get('color'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     chat.color = new_color
     chat.last_accessed_at = datetime.now(timezone.utc)
     db.session.commit()
     return jsonify(chat.to_dict()), 200
 
+# Atualização parcial: qualquer subconjunto de title, status, observations e color num
+# único UPDATE ... RETURNING (sem carregar o chat), devolvendo o resumo atualizado
+@app.route('/api/chat/<int:chat_id>', methods=['PATCH'])
+@token_auth.chat_owner_required
+def patch_chat(chat_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+
+    unknown = sorted(set(data) - set(CHAT_FIELD_VALIDATORS))
+    if unknown:
+        return jsonify({'error': f'Campos não editáveis: {unknown}. Editáveis: {list(CHAT_FIELD_VALIDATORS)}'}), 400
+    if not data:
+        return jsonify({'error': f'Informe ao menos um campo: {list(CHAT_FIELD_VALIDATORS)}'}), 400
+
+    values = {}
+    errors = {}
+    for field, value in data.items():
+        try:
+            values[field] = CHAT_FIELD_VALIDATORS[field](value)
+        except ValueError as e:
+            errors[field] = str(e)
+    if errors:
+        return jsonify({'error': 'Campos inválidos', 'fields': errors}), 400
+
+    if 'title' in values:
+        values['title_pending'] = False # O título escolhido pelo usuário prevalece sobre o gerado
+    values['last_accessed_at'] = datetime.now(timezone.utc)
+
+    where = (Chat.id == chat_id, Chat.user_id == g.user_id)
+    if db.engine.dialect.update_returning:
+        row = db.session.execute(update(Chat).where(*where).values(**values).returning(*CHAT_SUMMARY_COLUMNS)).first()
+    else:
+        result = db.session.execute(update(Chat).where(*where).values(**values))
+        row = db.session.execute(select(*CHAT_SUMMARY_COLUMNS).where(*where)).first() if result.rowcount else None
+    if row is None:
+        db.session.rollback()
+        return jsonify({'error': 'Chat não encontrado'}), 404
+    db.session.commit()
+
+    if 'status' in values:
+        chat_sessions.invalidate([chat_id])
+    return jsonify(chat_summary_to_dict(row)), 200
+
+# Operações em conjunto sobre chats de um usuário: um único DELETE/UPDATE por
+# operação, restrito aos chats do dono. As mensagens são apagadas pelo banco
+# (ON DELETE CASCADE), sem carregar nada no ORM. Retornam os ids afetados.
+def execute_returning_ids(statement, user_id, chat_ids):
+    where = (Chat.id.in_(chat_ids), Chat.user_id == user_id)
+    returning = db.engine.dialect.delete_returning if statement.is_delete else db.engine.dialect.update_returning
+    if returning:
+        return [row[0] for row in db.session.execute(statement.where(*where).returning(Chat.id))]
+    ids = db.session.execute(select(Chat.id).where(*where)).scalars().all()
+    if ids:
+        db.session.execute(statement.where(Chat.id.in_(ids)))
+    return ids
+
+def delete_chats(user_id, chat_ids):
+    deleted = execute_returning_ids(delete(Chat), user_id, chat_ids)
+    db.session.commit()
+    access_recorder.discard(deleted)
+    chat_sessions.invalidate(deleted)
+    token_auth.chat_owners.discard(deleted)
+    return deleted
+
+def update_chats_status(user_id, chat_ids, status):
+    updated = execute_returning_ids(
+        update(Chat).values(status=status, last_accessed_at=datetime.now(timezone.utc)), user_id, chat_ids)
+    db.session.commit()
+    chat_sessions.invalidate(updated)
+    return updated
+
 # Rota para deletar um chat
 @app.route('/api/chat/<int:chat_id>', methods=['DELETE'])
+@token_auth.chat_owner_required
 def delete_chat(chat_id):
-    # TODO: Adicionar verificação de propriedade do chat (o usuário logado é o dono do chat)
-    # Por agora, vamos assumir que a verificação de user_id será feita no frontend ou em uma camada de autenticação mais robusta.
-    chat = Chat.query.get(chat_id)
-    if not chat:
+    try:
+        deleted = delete_chats(g.user_id, [chat_id])
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Erro ao deletar chat: {str(e)}'}), 500
+    if not deleted:
         return jsonify({'error': 'Chat não encontrado'}), 404
+    return jsonify({'message': 'Chat deletado com sucesso'}), 200
+
+# Ações em lote: {"action": "delete" | "archive" | "status", "chat_ids": [...], "status": "..."}.
+# Ids inexistentes ou de outros usuários voltam em not_found.
+@app.route('/api/chats/bulk', methods=['POST'])
+@token_auth.login_required
+def bulk_update_chats():
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    chat_ids = data.get('chat_ids')
+
+    if action not in ('delete', 'archive', 'status'):
+        return jsonify({'error': "Ação inválida. Válidas: ['delete', 'archive', 'status']"}), 400
+    if (not isinstance(chat_ids, list) or not chat_ids
+            or not all(isinstance(chat_id, int) and not isinstance(chat_id, bool) for chat_id in chat_ids)):
+        return jsonify({'error': 'chat_ids deve ser uma lista não vazia de ids'}), 400
+    chat_ids = list(dict.fromkeys(chat_ids))
+    if len(chat_ids) > Config.BULK_CHAT_MAX_IDS:
+        return jsonify({'error': f'No máximo {Config.BULK_CHAT_MAX_IDS} chats por requisição'}), 400
+
+    status = 'archived' if action == 'archive' else data.get('status')
+    if action == 'status':
+        try:
+            status = validate_chat_status(status)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
     try:
-        db.session.delete(chat)
-        db.session.commit()
-        return jsonify({'message': 'Chat deletado com sucesso'}), 200
+        if action == 'delete':
+            affected = delete_chats(g.user_id, chat_ids)
+        else:
+            affected = update_chats_status(g.user_id, chat_ids, status)
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': f'Erro ao deletar chat: {str(e)}'}), 500
+        return jsonify({'error': f'Erro ao atualizar chats: {str(e)}'}), 500
+
+    affected_set = set(affected)
+    return jsonify({
+        'action': action,
+        'chat_ids': sorted(affected),
+        'not_found': [chat_id for chat_id in chat_ids if chat_id not in affected_set],
+    }), 200
 
 @app.route('/api/user/change-password', methods=['PUT'])
+@token_auth.login_required
 def change_password():
     data = request.get_json()
     user_id = data.get('user_id')
     current_password = data.get('current_password')
     new_password = data.get('new_password')
 
-    if not all([user_id, current_password, new_password]):
-        return jsonify({'error': 'Todos os campos são obrigatórios: user_id, current_password, new_password'}), 400
+    if not all([current_password, new_password]):
+        return jsonify({'error': 'Todos os campos são obrigatórios: current_password, new_password'}), 400
 
-    try:
-        user_id = int(user_id) # Garantir que user_id é um inteiro
-    except ValueError:
-        return jsonify({'error': 'user_id inválido'}), 400
+    # O usuário é o do token; um user_id no corpo, se enviado, precisa ser o mesmo
+    if user_id is not None and not token_auth.user_matches(user_id):
+        return jsonify({'error': 'Acesso negado para este usuário'}), 403
 
-    user = User.query.get(user_id)
+    user = db.session.get(User, g.user_id)
     if not user:
         return jsonify({'error': 'Usuário não encontrado'}), 404
 
@@ -481,16 +1244,23 @@ def change_password():
         return jsonify({'error': 'Nova senha não pode ser igual à senha atual'}), 400
 
     user.set_password(new_password)
+    # Revoga os tokens emitidos antes da troca; o cliente atual recebe um novo
+    user.token_version = (user.token_version or 0) + 1
     db.session.commit()
+    token_auth.revoke_tokens(user.id)
 
-    return jsonify({'message': 'Senha alterada com sucesso!'}), 200
+    return jsonify({
+        'message': 'Senha alterada com sucesso!',
+        'access_token': token_auth.issue_token(user.id, user.token_version), 'token_type': 'Bearer',
+        'expires_in': token_auth.max_age_seconds,
+    }), 200
 
 # Nova rota para buscar a última idade usada
 @app.route('/api/user/<int:user_id>/last_used_age', methods=['GET'])
+@token_auth.login_required
 def get_last_used_age(user_id):
-    user = User.query.get(user_id)
-    if not user:
-        return jsonify({'error': 'Usuário não encontrado'}), 404
+    if not token_auth.user_matches(user_id):
+        return jsonify({'error': 'Acesso negado para este usuário'}), 403
 
     last_chat_with_age = Chat.query.filter(
         Chat.user_id == user_id,
@@ -502,6 +1272,55 @@ def get_last_used_age(user_id):
     else:
         return jsonify({'last_used_age': None}), 200
 
+@app.cli.command('archive-transcripts')
+@click.option('--days', type=int, default=None, help='Dias sem acesso (padrão: ARCHIVE_AFTER_DAYS).')
+@click.option('--limit', type=int, default=None, help='Máximo de chats a arquivar (padrão: todos os elegíveis).')
+def archive_transcripts_command(days, limit):
+    """Compacta as mensagens de chats encerrados sem acesso recente."""
+    totals = {'chats': 0, 'messages': 0, 'original_bytes': 0, 'compressed_bytes': 0}
+    while limit is None or totals['chats'] < limit:
+        batch_limit = transcript_archiver.batch_size if limit is None else min(transcript_archiver.batch_size, limit - totals['chats'])
+        batch = transcript_archiver.compact(after_days=days, limit=batch_limit)
+        for key in totals:
+            totals[key] += batch[key]
+        if batch['chats'] == 0:
+            break
+    click.echo(f"{totals['chats']} chats arquivados ({totals['messages']} mensagens, "
+               f"{totals['original_bytes']} -> {totals['compressed_bytes']} bytes)")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Cria (se preciso) e reconstrói os índices de busca a partir dos chats e mensagens."""
+    if not search_supported(db.engine):
+        raise click.ClickException('Busca disponível apenas com SQLite (FTS5).')
+    with db.engine.begin() as connection:
+        rebuild_search_index(connection)
+    click.echo('Índices de busca reconstruídos.')
+
+@app.cli.command('check-query-plans')
+@click.option('--scratch', is_flag=True, help='Usa um banco SQLite em memória criado a partir dos modelos.')
+def check_query_plans_command(scratch):
+    """Falha se alguma consulta dos caminhos quentes fizer varredura completa."""
+    if scratch:
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+    else:
+        engine = db.engine
+        if engine.dialect.name != 'sqlite':
+            click.echo('A verificação de planos de consulta só suporta SQLite.')
+            raise SystemExit(1)
+
+    failures = 0
+    for name, (plan, ok) in check_query_plans(engine).items():
+        click.echo(f"[{'OK' if ok else 'FALHA'}] {name}")
+        for detail in plan:
+            click.echo(f"    {detail}")
+        failures += 0 if ok else 1
+
+    if failures:
+        click.echo(f"{failures} consulta(s) com varredura completa.")
+        raise SystemExit(1)
+
 if __name__ == '__main__':
     # Cria o banco de dados se não existir (para desenvolvimento)
     with app.app_context():
@@ -0,0 +1,256 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Modo de execução assíncrono (ASGI).
+#
+# As rotas de turno (POST /api/chat/<id>/message e /message/stream) são atendidas
+# aqui de forma nativamente assíncrona: o trabalho de banco (begin_turn/save_turn
+# do app.py) roda em threads, mas a chamada ao LLM é aguardada no loop de eventos,
+# sem ocupar uma thread enquanto o Gemini responde. Todas as outras rotas são
+# repassadas ao app Flask (WSGI), cada request numa thread de um pool com
+# ASGI_WSGI_THREADS threads.
+#
+# Uso:
+#   uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from concurrent.futures import ThreadPoolExecutor
+from app import app, begin_turn, drop_evicted_context, save_turn, sse_event, llm
+from auth import token_auth
+from llm import LLMOverloadedError
+import asyncio
+import json
+import re
+
+TURN_ROUTE = re.compile(r'^/api/chat/(\d+)/message(/stream)?$')
+
+# O WsgiToAsgi padrão roda o app com thread_sensitive=True, isto é, todas as rotas
+# Flask numa única thread: um GET lento seguraria todos os outros. Aqui cada request
+# roda numa thread do pool.
+wsgi_executor = ThreadPoolExecutor(max_workers=app.config['ASGI_WSGI_THREADS'], thread_name_prefix='jogai-wsgi')
+
+class ThreadPoolWsgiToAsgiInstance(WsgiToAsgiInstance):
+    run_wsgi_app = SyncToAsync(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func,
+                               thread_sensitive=False, executor=wsgi_executor)
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await ThreadPoolWsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+flask_application = ThreadPoolWsgiToAsgi(app)
+
+async def run_in_app_context(function, *args):
+    # Acesso ao banco fora do loop de eventos, com o app context do Flask
+    def call():
+        with app.app_context():
+            return function(*args)
+    return await asyncio.to_thread(call)
+
+def response_headers(scope, content_type, extra=None):
+    headers = [(b'content-type', content_type.encode('latin-1'))]
+    # Mesmo comportamento do CORS(app) padrão usado pelas rotas Flask
+    if any(name == b'origin' for name, _ in scope.get('headers', [])):
+        headers.append((b'access-control-allow-origin', b'*'))
+    for name, value in (extra or {}).items():
+        headers.append((name.lower().encode('latin-1'), str(value).encode('latin-1')))
+    return headers
+
+async def send_json(scope, send, payload, status, extra_headers=None):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': response_headers(scope, 'application/json', extra_headers)})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def send_overloaded(scope, send, error):
+    await send_json(scope, send, {'error': 'Muitas requisições ao modelo no momento. Tente novamente em instantes.'},
+                    429, {'Retry-After': error.retry_after})
+
+async def read_json_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None, False
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(b''.join(chunks) or b'null'), True
+    except ValueError:
+        return None, True
+
+async def cancel_on_disconnect(receive, task):
+    # O corpo já foi lido: a próxima mensagem só chega quando o cliente desconecta
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            task.cancel()
+            return
+
+async def run_until_disconnect(receive, coroutine):
+    task = asyncio.ensure_future(coroutine)
+    watcher = asyncio.ensure_future(cancel_on_disconnect(receive, task))
+    try:
+        await task
+    except asyncio.CancelledError:
+        if not watcher.done():
+            raise # Cancelamento vindo do servidor, não do cliente
+    finally:
+        watcher.cancel()
+
+async def generate_turn_async(turn):
+    # Equivalente assíncrono do generate_turn do app.py
+    try:
+        return await llm.generate_async(turn.user_message_content, history=turn.gemini_history,
+                                        cached_context=turn.cached_context, call_type='turn')
+    except Exception as e:
+        if not drop_evicted_context(turn, e):
+            raise
+    return await llm.generate_async(turn.user_message_content, history=turn.gemini_history, call_type='turn')
+
+async def stream_turn_async(turn, llm_stream):
+    # Equivalente assíncrono do stream_turn do app.py
+    yielded = False
+    try:
+        async for chunk in llm_stream:
+            yielded = True
+            yield chunk
+        return
+    except Exception as e:
+        if yielded or not drop_evicted_context(turn, e):
+            raise
+    finally:
+        await llm_stream.aclose()
+    retry_stream = await llm.stream_async(turn.user_message_content, history=turn.gemini_history, call_type='turn')
+    try:
+        async for chunk in retry_stream:
+            yield chunk
+    finally:
+        await retry_stream.aclose()
+
+async def handle_message(scope, send, turn):
+    try:
+        response = await generate_turn_async(turn)
+    except LLMOverloadedError as e:
+        await send_overloaded(scope, send, e)
+        return
+    except Exception as e:
+        await send_json(scope, send, {'error': f'Erro ao comunicar com o Gemini: {str(e)}'}, 500)
+        return
+
+    try:
+        payload = await run_in_app_context(save_turn, turn, response.text)
+    except Exception as e:
+        await send_json(scope, send, {'error': f'Erro ao salvar mensagens: {str(e)}'}, 500)
+        return
+    if payload is None:
+        await send_json(scope, send, {'error': 'Chat não encontrado'}, 404)
+        return
+    await send_json(scope, send, payload, 200)
+
+async def handle_message_stream(scope, send, turn):
+    try:
+        llm_stream = await llm.stream_async(turn.user_message_content, history=turn.gemini_history,
+                                            cached_context=turn.cached_context, call_type='turn')
+    except LLMOverloadedError as e:
+        await send_overloaded(scope, send, e)
+        return
+    except Exception as e:
+        await send_json(scope, send, {'error': f'Erro ao comunicar com o Gemini: {str(e)}'}, 500)
+        return
+
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': response_headers(scope, 'text/event-stream; charset=utf-8',
+                                            {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})})
+
+    async def send_event(event, payload, more_body=True):
+        await send({'type': 'http.response.body', 'body': sse_event(event, payload).encode('utf-8'),
+                    'more_body': more_body})
+
+    chunks = []
+    turn_stream = stream_turn_async(turn, llm_stream)
+    try:
+        async for chunk in turn_stream:
+            if chunk.text:
+                chunks.append(chunk.text)
+                await send_event('chunk', {'text': chunk.text})
+    except Exception as e:
+        await send_event('error', {'error': f'Erro ao comunicar com o Gemini: {str(e)}'}, more_body=False)
+        return
+    finally:
+        await turn_stream.aclose()
+        await llm_stream.aclose()
+
+    try:
+        payload = await run_in_app_context(save_turn, turn, "".join(chunks))
+    except Exception as e:
+        await send_event('error', {'error': f'Erro ao salvar mensagens: {str(e)}'}, more_body=False)
+        return
+    if payload is None:
+        await send_event('error', {'error': 'Chat não encontrado'}, more_body=False)
+        return
+    await send_event('done', payload, more_body=False)
+
+async def handle_turn(scope, receive, send, chat_id, streaming):
+    # Token verificado antes de ler o corpo (a versão do token pode ir ao banco, então roda em thread)
+    headers = {name.decode('latin-1').title(): value.decode('latin-1') for name, value in scope.get('headers', [])}
+    user_id = await run_in_app_context(token_auth.user_from_headers, headers)
+    if user_id is None:
+        await send_json(scope, send, {'error': 'Autenticação necessária'}, 401)
+        return
+
+    data, connected = await read_json_body(receive)
+    if not connected:
+        return
+
+    try:
+        turn, error = await run_in_app_context(begin_turn, chat_id, data, user_id)
+    except LLMOverloadedError as e:
+        # O resumo do histórico também passa pelo despachante
+        await send_overloaded(scope, send, e)
+        return
+    if error:
+        await send_json(scope, send, error[0], error[1])
+        return
+
+    handler = handle_message_stream if streaming else handle_message
+    # Se o cliente desconectar, a chamada ao LLM é cancelada e nada é salvo
+    await run_until_disconnect(receive, handler(scope, send, turn))
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    if scope['type'] == 'http' and scope['method'] == 'POST' and llm is not None:
+        match = TURN_ROUTE.match(scope['path'])
+        if match:
+            await handle_turn(scope, receive, send, int(match.group(1)), streaming=bool(match.group(2)))
+            return
+
+    await flask_application(scope, receive, send)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(application, host='0.0.0.0', port=5000)
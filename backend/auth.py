@@ -0,0 +1,199 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Autenticação por token de acesso assinado.
+#
+# O /api/login devolve um access_token assinado com a SECRET_KEY (itsdangerous),
+# com o id do usuário, a versão dos tokens do usuário (User.token_version) e validade
+# de AUTH_TOKEN_MAX_AGE_SECONDS. As rotas protegidas recebem o token no header
+# "Authorization: Bearer <token>"; a assinatura é verificada em memória e a versão é
+# comparada com a do banco, em cache por AUTH_TOKEN_VERSION_CACHE_TTL_SECONDS. Trocar a
+# senha incrementa a versão e revoga os tokens anteriores (no processo que atendeu a
+# troca na hora; nos demais, quando a entrada do cache expira).
+#
+# Sem SECRET_KEY configurada o app só sobe em modo debug/teste, com uma chave de
+# desenvolvimento; em produção qualquer um poderia assinar tokens com a chave padrão.
+#
+# Para as rotas de chat, o dono de cada chat fica num cache
+# com TTL (AUTH_CHAT_OWNER_CACHE_TTL_SECONDS): a verificação de propriedade só vai ao
+# banco na primeira vez que o chat é visto. O dono de um chat nunca muda e os ids não
+# são reaproveitados (AUTOINCREMENT no SQLite); chats excluídos são retirados do
+# cache com discard(). O cache serve para recusar cedo: as rotas que carregam o chat
+# conferem o user_id da própria linha.
+
+from collections import OrderedDict
+from functools import wraps
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+import threading
+import time
+
+TOKEN_SALT = 'jogai-access-token'
+# Só para desenvolvimento (debug/testes), quando SECRET_KEY não está configurada
+DEV_SECRET_KEY = 'jogai-dev-secret-key'
+
+class TTLCache:
+    # LRU com expiração por entrada: dono de cada chat e versão dos tokens de cada usuário
+    def __init__(self, ttl_seconds=300, max_entries=10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # chave -> (valor, expira_em)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class TokenAuth:
+    def __init__(self, app=None):
+        self._serializer = None
+        self.max_age_seconds = 7 * 24 * 3600
+        self.chat_owners = TTLCache()
+        self.token_versions = TTLCache()
+        self._load_chat_owner = None
+        self._load_token_version = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        secret_key = app.config.get('SECRET_KEY')
+        if not secret_key:
+            if not (app.debug or app.testing):
+                raise RuntimeError('SECRET_KEY não configurada. Defina a variável de ambiente SECRET_KEY '
+                                   '(os tokens de acesso são assinados com ela) ou rode em modo debug.')
+            print("AVISO: SECRET_KEY não configurada; usando uma chave de desenvolvimento. Não use em produção.")
+            secret_key = app.config['SECRET_KEY'] = DEV_SECRET_KEY
+        self._serializer = URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+        self.max_age_seconds = app.config.get('AUTH_TOKEN_MAX_AGE_SECONDS', 7 * 24 * 3600)
+        self.chat_owners = TTLCache(
+            app.config.get('AUTH_CHAT_OWNER_CACHE_TTL_SECONDS', 300),
+            app.config.get('AUTH_CHAT_OWNER_CACHE_MAX_ENTRIES', 10000),
+        )
+        self.token_versions = TTLCache(
+            app.config.get('AUTH_TOKEN_VERSION_CACHE_TTL_SECONDS', 60),
+            app.config.get('AUTH_TOKEN_VERSION_CACHE_MAX_ENTRIES', 10000),
+        )
+        app.extensions['token_auth'] = self
+
+    def chat_owner_loader(self, fn):
+        # fn(chat_id) -> user_id do dono, ou None se o chat não existe
+        self._load_chat_owner = fn
+        return fn
+
+    def token_version_loader(self, fn):
+        # fn(user_id) -> versão atual dos tokens do usuário, ou None se o usuário não existe
+        self._load_token_version = fn
+        return fn
+
+    def issue_token(self, user_id, token_version=0):
+        return self._serializer.dumps({'uid': user_id, 'tv': token_version})
+
+    def token_version(self, user_id):
+        version = self.token_versions.get(user_id)
+        if version is None:
+            version = self._load_token_version(user_id)
+            if version is not None:
+                self.token_versions.set(user_id, version)
+        return version
+
+    def revoke_tokens(self, user_id):
+        # Chamado depois de gravar a nova User.token_version
+        self.token_versions.discard([user_id])
+
+    def verify_token(self, token):
+        # Retorna o id do usuário, ou None se o token for inválido, estiver expirado ou revogado
+        try:
+            claims = self._serializer.loads(token, max_age=self.max_age_seconds)
+        except (SignatureExpired, BadSignature):
+            return None
+        if not isinstance(claims, dict):
+            return None
+        user_id = claims.get('uid')
+        if not isinstance(user_id, int) or claims.get('tv', 0) != self.token_version(user_id):
+            return None
+        return user_id
+
+    def user_from_headers(self, headers):
+        scheme, _, token = (headers.get('Authorization') or '').partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return None
+        return self.verify_token(token.strip())
+
+    def chat_owner(self, chat_id):
+        owner = self.chat_owners.get(chat_id)
+        if owner is None:
+            owner = self._load_chat_owner(chat_id)
+            if owner is not None:
+                self.chat_owners.set(chat_id, owner)
+        return owner
+
+    def check_chat_access(self, user_id, chat_id):
+        # Retorna None se o usuário pode acessar o chat, ou (payload de erro, status)
+        owner = self.chat_owner(chat_id)
+        if owner is None:
+            return {'error': 'Chat não encontrado'}, 404
+        if owner != user_id:
+            return {'error': 'Acesso negado a este chat'}, 403
+        return None
+
+    def login_required(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = self.user_from_headers(request.headers)
+            if user_id is None:
+                return jsonify({'error': 'Autenticação necessária'}), 401
+            g.user_id = user_id
+            return view(*args, **kwargs)
+        return wrapper
+
+    def chat_owner_required(self, view):
+        # Para rotas com <chat_id>: exige token e que o chat seja do usuário
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            error = self.check_chat_access(g.user_id, kwargs['chat_id'])
+            if error:
+                return jsonify(error[0]), error[1]
+            return view(*args, **kwargs)
+        return self.login_required(wrapper)
+
+    def user_matches(self, user_id):
+        # Para rotas que ainda recebem o user_id (caminho ou corpo)
+        return user_id is not None and str(user_id) == str(g.user_id)
+
+token_auth = TokenAuth()
@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Pool de workers para tarefas em segundo plano (ex.: chamadas ao Gemini que não
+# precisam segurar o request). Cada tarefa roda dentro de um app context próprio,
+# então pode usar db.session normalmente; a sessão é descartada ao final.
+
+from concurrent.futures import ThreadPoolExecutor, Future
+import threading
+
+class BackgroundTasks:
+    def __init__(self, app=None):
+        self._app = None
+        self._executor = None
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        max_workers = app.config.get('BACKGROUND_WORKERS', 4)
+        # Com 0 workers as tarefas rodam de forma síncrona (útil em testes e benchmarks)
+        if max_workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jogai-bg')
+        app.extensions['background_tasks'] = self
+
+    def _run(self, fn, args, kwargs):
+        with self._app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"Erro em tarefa de segundo plano {fn.__name__}: {e}")
+                raise
+
+    def submit(self, fn, *args, **kwargs):
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(self._run(fn, args, kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(self._run, fn, args, kwargs)
+
+    def submit_once(self, key, fn, *args, **kwargs):
+        # Single-flight: enquanto houver uma tarefa com a mesma chave na fila ou
+        # rodando neste processo, novos pedidos são ignorados (retorna None).
+        with self._lock:
+            if key in self._in_flight:
+                return None
+            self._in_flight.add(key)
+
+        def release(_future):
+            with self._lock:
+                self._in_flight.discard(key)
+
+        future = self.submit(fn, *args, **kwargs)
+        future.add_done_callback(release)
+        return future
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+background_tasks = BackgroundTasks()
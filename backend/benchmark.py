@@ -0,0 +1,308 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Benchmark / teste de carga da API do JogAI.
+#
+# Cria um banco SQLite descartável com N usuários, M chats por usuário e K
+# mensagens por chat, e dispara requisições concorrentes contra as rotas
+# principais usando o provedor de LLM fake (sem rede). Para cada rota reporta
+# latência p50/p95/p99, requisições por segundo, erros e número de consultas SQL
+# por requisição, em JSON.
+#
+# Uso:
+#   python benchmark.py --users 20 --chats 10 --messages 200 --requests 200 --concurrency 8 --output atual.json
+#   python benchmark.py ... --baseline anterior.json   # falha se houver regressão
+
+import argparse
+import json
+import os
+import platform
+import random
+import secrets
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARK_PASSWORD = 'senha-benchmark'
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark da API do JogAI com LLM fake.')
+    parser.add_argument('--users', type=int, default=10, help='Usuários criados no banco descartável')
+    parser.add_argument('--chats', type=int, default=10, help='Chats por usuário')
+    parser.add_argument('--messages', type=int, default=100, help='Mensagens por chat')
+    parser.add_argument('--requests', type=int, default=100, help='Requisições por rota')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requisições simultâneas')
+    parser.add_argument('--llm-latency-ms', type=float, default=50.0, help='Latência média do LLM fake')
+    parser.add_argument('--llm-tokens-per-second', type=float, default=0.0, help='Velocidade do LLM fake (0 = instantâneo)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Aumento relativo máximo aceito no p95 em relação ao baseline')
+    parser.add_argument('--keep', action='store_true', help='Mantém o diretório temporário com o banco ao terminar')
+    return parser.parse_args(argv)
+
+def configure_environment(args, database_path):
+    # Precisa acontecer antes de importar o app: Config lê o ambiente na importação
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{database_path}',
+        'LLM_PROVIDER': 'fake',
+        'FAKE_LLM_LATENCY_DISTRIBUTION': 'lognormal',
+        'FAKE_LLM_LATENCY_MS': str(args.llm_latency_ms),
+        'FAKE_LLM_LATENCY_STDDEV_MS': str(args.llm_latency_ms / 3),
+        'FAKE_LLM_TOKENS_PER_SECOND': str(args.llm_tokens_per_second),
+        'FAKE_LLM_SEED': str(args.seed),
+        'DATABASE_SELF_CHECK': '0',
+        'SECRET_KEY': secrets.token_urlsafe(32),
+    })
+
+def seed_database(app_module, args):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import insert
+    from password_hashing import password_hasher
+
+    db, User, Chat, Message = app_module.db, app_module.User, app_module.Chat, app_module.Message
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    # Um único hash para todos: o custo do hash não é o que queremos medir no seed.
+    # Usa os parâmetros configurados, para o login não regravar o hash de cada usuário.
+    password_hash = password_hasher.hash(BENCHMARK_PASSWORD)
+
+    with app_module.app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'username': f'bench{index}', 'password_hash': password_hash} for index in range(args.users)
+        ])
+        user_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+
+        chat_rows = []
+        for user_id in user_ids:
+            for index in range(args.chats):
+                created_at = now - timedelta(days=rng.randint(0, 90), minutes=index)
+                chat_rows.append({
+                    'user_id': user_id, 'title': f'Aventura {index}', 'status': 'started',
+                    'created_at': created_at, 'last_accessed_at': created_at + timedelta(hours=rng.randint(0, 48)),
+                    'universo': 'Fantasia', 'genero': 'Aventura', 'age': rng.choice((None, 10, 16, 30)),
+                    'inspiracao': 'Inspiração ' * 40, 'observations': 'Observação ' * 40,
+                    'color': '#336699', 'title_pending': False, 'intro_status': 'ready',
+                })
+        db.session.execute(insert(Chat), chat_rows)
+        chats = [(row.id, row.user_id) for row in db.session.query(Chat.id, Chat.user_id).order_by(Chat.id)]
+
+        batch = []
+        for chat_id, _ in chats:
+            for index in range(args.messages):
+                batch.append({
+                    'chat_id': chat_id, 'sender': 'gemini' if index % 2 == 0 else 'user',
+                    'content': 'Texto da narrativa ' * rng.randint(5, 60),
+                    'timestamp': now - timedelta(seconds=args.messages - index),
+                })
+                if len(batch) >= 5000:
+                    db.session.execute(insert(Message), batch)
+                    batch = []
+        if batch:
+            db.session.execute(insert(Message), batch)
+        db.session.commit()
+
+    return user_ids, chats
+
+class QueryCounter:
+    # Conta os comandos SQL executados pela thread atual
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args, **kwargs):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    def value(self):
+        return getattr(self._local, 'count', 0)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def build_scenarios(user_ids, chats):
+    def auth_headers(tokens, user_id):
+        token = tokens.get(user_id)
+        return {'Authorization': f'Bearer {token}'} if token else {}
+
+    def login(client, rng, tokens):
+        user_id = rng.choice(user_ids)
+        return client.post('/api/login', json={'username': f'bench{user_id - user_ids[0]}', 'password': BENCHMARK_PASSWORD})
+
+    def create_chat(client, rng, tokens):
+        user_id = rng.choice(user_ids)
+        return client.post('/api/chats', headers=auth_headers(tokens, user_id), json={
+            'user_id': user_id, 'universo': rng.choice(('Fantasia', 'Ficção Científica', 'Terror')),
+            'genero': 'Aventura', 'age': rng.choice((10, 16, 30)),
+        })
+
+    def list_chats(client, rng, tokens):
+        user_id = rng.choice(user_ids)
+        return client.get(f'/api/chats/{user_id}', headers=auth_headers(tokens, user_id))
+
+    def chat_details(client, rng, tokens):
+        chat_id, user_id = rng.choice(chats)
+        return client.get(f'/api/chat/{chat_id}', headers=auth_headers(tokens, user_id))
+
+    def send_message(client, rng, tokens):
+        chat_id, user_id = rng.choice(chats)
+        return client.post(f'/api/chat/{chat_id}/message', headers=auth_headers(tokens, user_id),
+                           json={'message': 'Sigo em frente com cuidado.'})
+
+    return [
+        ('POST /api/login', login),
+        ('POST /api/chats', create_chat),
+        ('GET /api/chats/<user_id>', list_chats),
+        ('GET /api/chat/<id>', chat_details),
+        ('POST /api/chat/<id>/message', send_message),
+    ]
+
+def collect_tokens(client, user_ids):
+    # Se o login devolver um token de acesso, as demais rotas passam a usá-lo
+    tokens = {}
+    for user_id in user_ids:
+        response = client.post('/api/login', json={'username': f'bench{user_id - user_ids[0]}', 'password': BENCHMARK_PASSWORD})
+        token = (response.get_json(silent=True) or {}).get('access_token')
+        if token:
+            tokens[user_id] = token
+    return tokens
+
+def run_scenario(app, counter, scenario, args, tokens, seed):
+    latencies, query_counts, errors = [], [], 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one_request(index):
+        nonlocal errors
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            local.rng = random.Random(f'{seed}-{threading.get_ident()}')
+        counter.reset()
+        started = time.perf_counter()
+        response = scenario(local.client, local.rng, tokens)
+        elapsed = time.perf_counter() - started
+        queries = counter.value()
+        with lock:
+            latencies.append(elapsed * 1000)
+            query_counts.append(queries)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(one_request, range(args.requests)))
+    wall_time = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / wall_time, 2) if wall_time > 0 else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 3),
+            'p95': round(percentile(latencies, 0.95), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'sql_queries_per_request': {
+            'mean': round(sum(query_counts) / len(query_counts), 2),
+            'max': max(query_counts),
+        },
+    }
+
+def compare_with_baseline(results, baseline, max_regression):
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous:
+            continue
+        if current['latency_ms']['p95'] > previous['latency_ms']['p95'] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['latency_ms']['p95']}ms -> {current['latency_ms']['p95']}ms")
+        if current['sql_queries_per_request']['max'] > previous['sql_queries_per_request']['max']:
+            regressions.append(f"{name}: consultas SQL {previous['sql_queries_per_request']['max']} -> "
+                               f"{current['sql_queries_per_request']['max']}")
+    return regressions
+
+def run_benchmark(args, workdir):
+    configure_environment(args, os.path.join(workdir, 'bench.db'))
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as app_module
+
+    seed_started = time.perf_counter()
+    user_ids, chats = seed_database(app_module, args)
+    seed_seconds = time.perf_counter() - seed_started
+
+    with app_module.app.app_context():
+        counter = QueryCounter(app_module.db.engine)
+    tokens = collect_tokens(app_module.app.test_client(), user_ids)
+
+    results = {
+        'config': {
+            'users': args.users, 'chats_per_user': args.chats, 'messages_per_chat': args.messages,
+            'requests_per_endpoint': args.requests, 'concurrency': args.concurrency,
+            'llm_latency_ms': args.llm_latency_ms, 'llm_tokens_per_second': args.llm_tokens_per_second,
+            'seed': args.seed,
+        },
+        'environment': {
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'platform': platform.platform(),
+        },
+        'seed_seconds': round(seed_seconds, 3),
+        'endpoints': {},
+    }
+    for index, (name, scenario) in enumerate(build_scenarios(user_ids, chats)):
+        results['endpoints'][name] = run_scenario(app_module.app, counter, scenario, args, tokens, f'{args.seed}-{index}')
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f"Regressão: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='jogai-bench-')
+    try:
+        return run_benchmark(args, workdir)
+    finally:
+        if args.keep:
+            print(f"Banco do benchmark mantido em {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Cache em memória das sessões de chat ativas.
+#
+# Uma sessão guarda a janela de histórico (context_window.HistoryWindow) e o
+# histórico já montado no formato do Gemini (cenário + resumo + mensagens). Em
+# turnos consecutivos do mesmo chat, o turno retira a sessão do cache, usa o
+# histórico pronto, acrescenta as duas mensagens novas e a devolve, sem recarregar
+# as mensagens nem renderizar o cenário de novo.
+#
+# Uma sessão só é reaproveitada se continuar igual ao banco: a impressão digital
+# (configuração, status e resumo do chat) precisa bater e a contagem e o maior id
+# das mensagens posteriores ao resumo precisam ser os da janela. As rotas que
+# alteram o chat também invalidam a sessão explicitamente. O cache é um LRU
+# limitado pelo tamanho aproximado em bytes (CHAT_SESSION_CACHE_MAX_BYTES).
+
+from collections import OrderedDict
+from context_window import window_history_entries
+import hashlib
+import threading
+
+# Custo fixo aproximado de cada mensagem/entrada além do texto
+ENTRY_OVERHEAD_BYTES = 200
+
+class ChatSession:
+    def __init__(self, chat_id, window, scenario_entries, has_user_message):
+        self.chat_id = chat_id
+        self.window = window
+        self.scenario_entries = scenario_entries
+        self.has_user_message = has_user_message
+        self.fingerprint = None
+        self.history = []
+        self.history_version = 0
+        self.size = 0
+        # Contexto em cache no provedor para um prefixo deste histórico (ver context_cache.py)
+        self.context = None
+        self.context_version = None
+        self.rebuild_history()
+
+    @property
+    def last_message_id(self):
+        return self.window.messages[-1].id if self.window.messages else None
+
+    def rebuild_history(self):
+        # Necessário quando a janela muda de forma (ex.: mensagens dobradas no resumo)
+        self.history = self.scenario_entries + window_history_entries(self.window)
+        self.history_version += 1
+        # Os textos são compartilhados entre a janela e o histórico; contam uma vez só
+        self.size = sum(len(part) + ENTRY_OVERHEAD_BYTES for entry in self.history for part in entry['parts'])
+        self.size += len(self.window.messages) * ENTRY_OVERHEAD_BYTES
+
+    def append_message(self, message_id, sender, content):
+        self.window.append(message_id, sender, content)
+        self.history.append({"role": "user" if sender == "user" else "model", "parts": [content]})
+        self.size += len(content) + 2 * ENTRY_OVERHEAD_BYTES
+        if sender == 'user':
+            self.has_user_message = True
+
+def chat_session_fingerprint(status, summarized_until_id, history_summary, chat_config):
+    # Tudo o que entra no histórico ou na regra de status do turno
+    values = [status, summarized_until_id or 0, history_summary or '']
+    values.extend(f"{key}={chat_config[key]}" for key in sorted(chat_config))
+    return hashlib.sha1("\x1f".join(str(value) for value in values).encode('utf-8')).hexdigest()
+
+class ChatSessionCache:
+    def __init__(self, registry, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._sessions = OrderedDict() # chat_id -> ChatSession
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._lookups = registry.counter(
+            'jogai_chat_session_cache_lookups_total', 'Consultas ao cache de sessões de chat, por resultado.', ('result',))
+        self._evictions = registry.counter(
+            'jogai_chat_session_cache_evictions_total', 'Sessões de chat descartadas por falta de espaço.')
+        self._size = registry.gauge(
+            'jogai_chat_session_cache_bytes', 'Tamanho aproximado das sessões de chat em cache.')
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _pop(self, chat_id):
+        # Chamado com self._lock
+        session = self._sessions.pop(chat_id, None)
+        if session is not None:
+            self._bytes -= session.size
+            self._size.set(self._bytes)
+        return session
+
+    def checkout(self, chat_id, fingerprint, message_count, last_message_id):
+        # Retira a sessão do cache (um turno por vez a usa) se ainda estiver válida
+        with self._lock:
+            session = self._pop(chat_id)
+        if session is None:
+            self._lookups.inc(result='miss')
+            return None
+        if (session.fingerprint != fingerprint or len(session.window.messages) != message_count
+                or session.last_message_id != last_message_id):
+            self._lookups.inc(result='stale')
+            return None
+        self._lookups.inc(result='hit')
+        return session
+
+    def store(self, session, fingerprint):
+        if not self.enabled or session.size > self.max_bytes:
+            return
+        session.fingerprint = fingerprint
+        with self._lock:
+            self._pop(session.chat_id)
+            self._sessions[session.chat_id] = session
+            self._bytes += session.size
+            while self._bytes > self.max_bytes and self._sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions.inc()
+            self._size.set(self._bytes)
+
+    def invalidate(self, chat_ids):
+        with self._lock:
+            for chat_id in chat_ids:
+                self._pop(chat_id)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._bytes = 0
+            self._size.set(0)
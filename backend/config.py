@@ -17,9 +17,174 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def build_engine_options(database_uri):
+    # Opções do engine do SQLAlchemy por banco. No SQLite o pool padrão basta e o
+    # ajuste é feito por PRAGMAs a cada conexão (ver database.py); no PostgreSQL
+    # configuramos o pool de conexões.
+    if database_uri.startswith('sqlite'):
+        busy_timeout_ms = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+        return {'connect_args': {'timeout': busy_timeout_ms / 1000}}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 10),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 20),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': env_flag('DB_POOL_PRE_PING', True),
+    }
+
+def parse_prompt_templates(value):
+    # Formato: "modo=arquivo.txt;outro_modo=outro_arquivo.txt"
+    templates = {}
+    for item in (value or '').split(';'):
+        if '=' in item:
+            name, path = item.split('=', 1)
+            if name.strip() and path.strip():
+                templates[name.strip()] = path.strip()
+    return templates
+
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'uma-chave-secreta-muito-dificil'
+    # Obrigatória fora do modo debug: assina os tokens de acesso (ver auth.py)
+    SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Ajustes do SQLite aplicados em cada conexão (WAL permite leitores em paralelo à escrita)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456) # 256 MB
+    # Registrar no startup as configurações efetivas do banco
+    DATABASE_SELF_CHECK = env_flag('DATABASE_SELF_CHECK', True)
+
+    # Instrumentação de SQL por request (Server-Timing, /metrics e /metrics/sql)
+    SQL_INSTRUMENTATION_ENABLED = env_flag('SQL_INSTRUMENTATION_ENABLED', False)
+    SQL_SLOWEST_STATEMENTS_PER_ROUTE = int(os.environ.get('SQL_SLOWEST_STATEMENTS_PER_ROUTE') or 5)
+    # Mesmo comando com ao menos esta quantidade de parâmetros distintos no mesmo request = provável N+1
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD') or 3)
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
-    INITIAL_CHAT_PROMPT_FILE = 'initial_chat_prompt.txt' 
\ No newline at end of file
+
+    # Provedor de LLM: 'gemini' ou 'fake' (local, determinístico, para testes de carga)
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER') or 'gemini'
+    LLM_MODEL = os.environ.get('LLM_MODEL') or 'gemini-1.5-flash-latest'
+    # Provedor fake: latência até o primeiro token (fixed, uniform, normal ou lognormal),
+    # velocidade de geração, tamanho da resposta e taxa de falhas simuladas (429/500/503)
+    FAKE_LLM_LATENCY_DISTRIBUTION = os.environ.get('FAKE_LLM_LATENCY_DISTRIBUTION') or 'lognormal'
+    FAKE_LLM_LATENCY_MS = float(os.environ.get('FAKE_LLM_LATENCY_MS') or 400)
+    FAKE_LLM_LATENCY_STDDEV_MS = float(os.environ.get('FAKE_LLM_LATENCY_STDDEV_MS') or 150)
+    FAKE_LLM_TOKENS_PER_SECOND = float(os.environ.get('FAKE_LLM_TOKENS_PER_SECOND') or 60)
+    FAKE_LLM_RESPONSE_TOKENS = int(os.environ.get('FAKE_LLM_RESPONSE_TOKENS') or 120)
+    FAKE_LLM_FAILURE_RATE = float(os.environ.get('FAKE_LLM_FAILURE_RATE') or 0)
+    FAKE_LLM_SEED = int(os.environ['FAKE_LLM_SEED']) if os.environ.get('FAKE_LLM_SEED') else None
+    # Custo simulado de processar o prompt (tokens do contexto em cache não pagam)
+    FAKE_LLM_PREFILL_MS_PER_1K_TOKENS = float(os.environ.get('FAKE_LLM_PREFILL_MS_PER_1K_TOKENS') or 0)
+
+    # Despachante das chamadas ao LLM (por processo): concorrência, taxa, fila e novas tentativas
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY') or 4)
+    LLM_RATE_LIMIT_PER_SECOND = float(os.environ.get('LLM_RATE_LIMIT_PER_SECOND') or 0) # 0 = sem limite de taxa
+    LLM_RATE_LIMIT_BURST = int(os.environ.get('LLM_RATE_LIMIT_BURST') or 1)
+    LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE') or 16)
+    LLM_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('LLM_QUEUE_TIMEOUT_SECONDS') or 10)
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES') or 3)
+    LLM_RETRY_BASE_DELAY_SECONDS = float(os.environ.get('LLM_RETRY_BASE_DELAY_SECONDS') or 0.5)
+    LLM_RETRY_MAX_DELAY_SECONDS = float(os.environ.get('LLM_RETRY_MAX_DELAY_SECONDS') or 8)
+
+    # Cache de respostas do LLM (títulos): pool de respostas por prompt normalizado, em rodízio
+    LLM_CACHE_ENABLED = env_flag('LLM_CACHE_ENABLED', True)
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES') or 512)
+    LLM_CACHE_POOL_SIZE = int(os.environ.get('LLM_CACHE_POOL_SIZE') or 5)
+    LLM_CACHE_TTL_SECONDS = int(os.environ.get('LLM_CACHE_TTL_SECONDS') or 7 * 24 * 3600)
+    LLM_CACHE_DB_PATH = os.environ.get('LLM_CACHE_DB_PATH') or None # Arquivo SQLite; vazio = só memória
+    LLM_CACHE_DB_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_DB_MAX_ENTRIES') or 10000)
+
+    # Tokens de acesso emitidos pelo /api/login (assinados com a SECRET_KEY)
+    AUTH_TOKEN_MAX_AGE_SECONDS = int(os.environ.get('AUTH_TOKEN_MAX_AGE_SECONDS') or 7 * 24 * 3600)
+    # Cache do dono de cada chat usado na verificação de propriedade
+    AUTH_CHAT_OWNER_CACHE_TTL_SECONDS = int(os.environ.get('AUTH_CHAT_OWNER_CACHE_TTL_SECONDS') or 300)
+    AUTH_CHAT_OWNER_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CHAT_OWNER_CACHE_MAX_ENTRIES') or 10000)
+    # Versão dos tokens de cada usuário (revogação na troca de senha); uma troca feita em
+    # outro processo vale aqui quando a entrada expira
+    AUTH_TOKEN_VERSION_CACHE_TTL_SECONDS = int(os.environ.get('AUTH_TOKEN_VERSION_CACHE_TTL_SECONDS') or 60)
+    AUTH_TOKEN_VERSION_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_TOKEN_VERSION_CACHE_MAX_ENTRIES') or 10000)
+
+    # Hash de senhas (formato do werkzeug: 'scrypt:N:r:p' ou 'pbkdf2:sha256:iterações').
+    # Hashes com outros parâmetros são regravados no próximo login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH') or 16)
+    # Processos para calcular os hashes fora das threads de request (0 = na própria thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    # Hashes em andamento ou na fila; acima disso o request recebe 503 com Retry-After
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 32)
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.environ.get('PASSWORD_HASH_TIMEOUT_SECONDS') or 10)
+    PASSWORD_HASH_RETRY_AFTER_SECONDS = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER_SECONDS') or 1)
+
+    # Modo ASGI (asgi.py): threads que atendem as rotas Flask não assíncronas
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS') or 32)
+
+    # Introdução gerada em segundo plano: tentativas, espera antes de repetir uma que
+    # falhou (dobra a cada tentativa) e tempo após o qual 'generating' é considerada
+    # abandonada (processo que morreu no meio) e pode ser retomada
+    INTRO_MAX_ATTEMPTS = int(os.environ.get('INTRO_MAX_ATTEMPTS') or 3)
+    INTRO_RETRY_BACKOFF_SECONDS = float(os.environ.get('INTRO_RETRY_BACKOFF_SECONDS') or 30)
+    INTRO_GENERATING_TIMEOUT_SECONDS = float(os.environ.get('INTRO_GENERATING_TIMEOUT_SECONDS') or 120)
+
+    # Workers para tarefas em segundo plano (título, etc.). 0 = executar de forma síncrona.
+    BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS') or 4)
+    # Último acesso dos chats: gravado em lote a cada N segundos ou M chats pendentes
+    ACCESS_FLUSH_INTERVAL_SECONDS = float(os.environ.get('ACCESS_FLUSH_INTERVAL_SECONDS') or 5)
+    ACCESS_FLUSH_MAX_EVENTS = int(os.environ.get('ACCESS_FLUSH_MAX_EVENTS') or 100)
+    INITIAL_CHAT_PROMPT_FILE = 'initial_chat_prompt.txt'
+
+    # Templates de prompt nomeados (um por modo de jogo). 'default' é o prompt inicial padrão.
+    PROMPT_TEMPLATES = {'default': INITIAL_CHAT_PROMPT_FILE, **parse_prompt_templates(os.environ.get('PROMPT_TEMPLATES'))}
+    PROMPT_RENDER_CACHE_SIZE = int(os.environ.get('PROMPT_RENDER_CACHE_SIZE') or 512)
+
+    # Janela de histórico enviada ao Gemini a cada turno (tokens estimados).
+    # Mensagens mais antigas são incorporadas ao resumo contínuo do chat.
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHAT_HISTORY_TOKEN_BUDGET') or 8000)
+    CHAT_HISTORY_MIN_RECENT_MESSAGES = int(os.environ.get('CHAT_HISTORY_MIN_RECENT_MESSAGES') or 6)
+
+    # Cache das sessões de chat ativas entre turnos (tamanho aproximado em bytes; 0 = desligado)
+    CHAT_SESSION_CACHE_MAX_BYTES = int(os.environ.get('CHAT_SESSION_CACHE_MAX_BYTES') or 32 * 1024 * 1024)
+
+    # Context caching do provedor para o prefixo estável do histórico de cada chat
+    CONTEXT_CACHE_ENABLED = env_flag('CONTEXT_CACHE_ENABLED', False)
+    CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get('CONTEXT_CACHE_TTL_SECONDS') or 3600)
+    # Tamanho mínimo (tokens estimados) do histórico em cache: o Gemini 1.5 recusa conteúdo
+    # em cache com menos de 32.768 tokens; ajuste para o mínimo do modelo em LLM_MODEL
+    CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get('CONTEXT_CACHE_MIN_TOKENS') or 32768)
+    # Recriar o contexto quando a parte fora dele passar deste tamanho
+    CONTEXT_CACHE_REFRESH_TOKENS = int(os.environ.get('CONTEXT_CACHE_REFRESH_TOKENS') or 2048)
+    CONTEXT_CACHE_EXPIRY_MARGIN_SECONDS = int(os.environ.get('CONTEXT_CACHE_EXPIRY_MARGIN_SECONDS') or 60)
+    # Espera antes de tentar criar de novo o contexto de um chat cuja criação falhou (dobra a cada falha)
+    CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS = int(os.environ.get('CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS') or 300)
+    CONTEXT_CACHE_FAILURE_BACKOFF_MAX_SECONDS = int(os.environ.get('CONTEXT_CACHE_FAILURE_BACKOFF_MAX_SECONDS') or 3600)
+
+    # Paginação de mensagens em GET /api/chat/<chat_id>
+    MESSAGES_PAGE_DEFAULT_LIMIT = int(os.environ.get('MESSAGES_PAGE_DEFAULT_LIMIT') or 50)
+    MESSAGES_PAGE_MAX_LIMIT = int(os.environ.get('MESSAGES_PAGE_MAX_LIMIT') or 200)
+
+    # Paginação da busca em GET /api/search
+    SEARCH_PAGE_DEFAULT_LIMIT = int(os.environ.get('SEARCH_PAGE_DEFAULT_LIMIT') or 20)
+    SEARCH_PAGE_MAX_LIMIT = int(os.environ.get('SEARCH_PAGE_MAX_LIMIT') or 50)
+
+    # Máximo de chats por requisição em POST /api/chats/bulk
+    BULK_CHAT_MAX_IDS = int(os.environ.get('BULK_CHAT_MAX_IDS') or 500)
+
+    # Arquivo de transcrições: chats encerrados sem acesso há N dias têm as mensagens compactadas
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 30)
+    ARCHIVE_STATUSES = [status.strip() for status in (os.environ.get('ARCHIVE_STATUSES') or 'finished,cancelled,archived').split(',') if status.strip()]
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 50)
+    ARCHIVE_COMPRESSION_LEVEL = int(os.environ.get('ARCHIVE_COMPRESSION_LEVEL') or 6)
+    # Intervalo do compactador em segundo plano; 0 = só pelo comando "flask archive-transcripts"
+    ARCHIVE_COMPACTOR_INTERVAL_SECONDS = int(os.environ.get('ARCHIVE_COMPACTOR_INTERVAL_SECONDS') or 0)
+
+    # Paginação da visão resumida em GET /api/chats/<user_id>?view=summary
+    CHATS_PAGE_DEFAULT_LIMIT = int(os.environ.get('CHATS_PAGE_DEFAULT_LIMIT') or 50)
+    CHATS_PAGE_MAX_LIMIT = int(os.environ.get('CHATS_PAGE_MAX_LIMIT') or 200)
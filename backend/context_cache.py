@@ -0,0 +1,155 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Context caching do provedor para o prefixo estável de cada chat.
+#
+# Todo turno reenviaria o cenário, a resposta "Entendido...", o resumo e as
+# mensagens antigas. Com CONTEXT_CACHE_ENABLED, quando o histórico da sessão
+# (chat_sessions.ChatSession) passa de CONTEXT_CACHE_MIN_TOKENS, esse histórico é
+# guardado no provedor (create_cached_context) com validade de
+# CONTEXT_CACHE_TTL_SECONDS, e os turnos seguintes enviam só as mensagens novas.
+#
+# O contexto é recriado quando:
+#   - o prefixo muda (mensagens dobradas no resumo reconstroem o histórico);
+#   - a parte fora do cache passa de CONTEXT_CACHE_REFRESH_TOKENS;
+#   - faltam menos de CONTEXT_CACHE_EXPIRY_MARGIN_SECONDS para expirar.
+# Contextos substituídos são apagados em segundo plano; os de sessões descartadas
+# do cache simplesmente expiram pelo TTL no provedor.
+#
+# Se o provedor não encontra mais o contexto (404), o turno é refeito uma vez com o
+# histórico completo (ver drop_evicted_context no app.py).
+#
+# A criação é síncrona, dentro do turno. Quando ela falha, o chat e o seu prefixo
+# (cenário e resumo) ficam sem nova tentativa por CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS,
+# dobrando a cada falha seguida até CONTEXT_CACHE_FAILURE_BACKOFF_MAX_SECONDS; um
+# prefixo novo (resumo refeito) tenta de novo na hora.
+
+from context_window import estimate_tokens
+import hashlib
+import threading
+import time
+
+# Acima disso, falhas com a espera já vencida são descartadas ao registrar uma nova
+MAX_TRACKED_FAILURES = 1024
+
+def estimate_history_tokens(history):
+    return sum(estimate_tokens(part) for entry in history for part in entry['parts'])
+
+def prefix_hash(session):
+    # Cenário e resumo: a parte do histórico que só muda quando ele é reconstruído
+    digest = hashlib.sha1()
+    for entry in session.scenario_entries:
+        for part in entry['parts']:
+            digest.update(part.encode('utf-8'))
+    digest.update(f"|{session.window.summarized_until_id}|{session.window.summary}".encode('utf-8'))
+    return digest.hexdigest()
+
+class ContextCacheManager:
+    def __init__(self, llm, registry, background_tasks, enabled=False, ttl_seconds=3600, min_tokens=32768,
+                 refresh_tokens=2048, expiry_margin_seconds=60, failure_backoff_seconds=300,
+                 failure_backoff_max_seconds=3600):
+        self._llm = llm
+        self._background_tasks = background_tasks
+        self.enabled = enabled and llm is not None
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self.refresh_tokens = refresh_tokens
+        self.expiry_margin_seconds = expiry_margin_seconds
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self.failure_backoff_max_seconds = failure_backoff_max_seconds
+        self._lock = threading.Lock()
+        self._failures = {} # chat_id -> (hash do prefixo, falhas seguidas, próxima tentativa)
+        self._uses = registry.counter(
+            'jogai_context_cache_turns_total', 'Turnos por uso do contexto em cache do provedor.', ('result',))
+        self._evictions = registry.counter(
+            'jogai_context_cache_evictions_total',
+            'Contextos em cache que o provedor não encontrou mais (turno refeito com o histórico completo).')
+
+    def _discard(self, session):
+        context, session.context = session.context, None
+        if context is not None:
+            self._background_tasks.submit(self._delete, context)
+
+    def discard_evicted(self, session):
+        # O provedor respondeu que o contexto não existe mais (expirou ou foi removido
+        # antes do previsto); o próximo prepare() cria outro se ainda valer a pena
+        self._evictions.inc()
+        self._discard(session)
+
+    def _delete(self, context):
+        try:
+            self._llm.delete_cached_context(context)
+        except Exception as e:
+            print(f"Erro ao apagar contexto em cache {context.name}: {e}")
+
+    def _in_backoff(self, chat_id, prefix):
+        with self._lock:
+            failure = self._failures.get(chat_id)
+        return failure is not None and failure[0] == prefix and time.time() < failure[2]
+
+    def _record_failure(self, chat_id, prefix):
+        now = time.time()
+        with self._lock:
+            previous = self._failures.get(chat_id)
+            failures = previous[1] + 1 if previous is not None and previous[0] == prefix else 1
+            delay = min(self.failure_backoff_seconds * 2 ** (failures - 1), self.failure_backoff_max_seconds)
+            if len(self._failures) >= MAX_TRACKED_FAILURES:
+                self._failures = {key: value for key, value in self._failures.items() if value[2] > now}
+            self._failures[chat_id] = (prefix, failures, now + delay)
+
+    def prepare(self, session):
+        # Retorna (contexto em cache ou None, histórico a enviar junto com ele)
+        if not self.enabled:
+            return None, session.history
+
+        context = session.context
+        if context is not None:
+            if session.context_version != session.history_version:
+                result = 'prefix_changed'
+            elif context.expires_at - time.time() < self.expiry_margin_seconds:
+                result = 'expiring'
+            else:
+                tail = session.history[context.prefix_length:]
+                if estimate_history_tokens(tail) < self.refresh_tokens:
+                    self._uses.inc(result='hit')
+                    return context, tail
+                result = 'refresh'
+            self._discard(session)
+        else:
+            result = 'created'
+
+        if estimate_history_tokens(session.history) < self.min_tokens:
+            self._uses.inc(result='below_minimum')
+            return None, session.history
+
+        prefix = prefix_hash(session)
+        if self._in_backoff(session.chat_id, prefix):
+            self._uses.inc(result='backoff')
+            return None, session.history
+
+        try:
+            context = self._llm.create_cached_context(list(session.history), self.ttl_seconds)
+        except Exception as e:
+            # Sem cache o turno continua funcionando, só mais caro
+            print(f"Erro ao criar contexto em cache do chat {session.chat_id}: {e}")
+            self._record_failure(session.chat_id, prefix)
+            self._uses.inc(result='error')
+            return None, session.history
+
+        with self._lock:
+            self._failures.pop(session.chat_id, None)
+        session.context = context
+        session.context_version = session.history_version
+        self._uses.inc(result=result)
+        return context, session.history[context.prefix_length:]
@@ -0,0 +1,128 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Janela de histórico com orçamento de tokens.
+#
+# Em vez de reenviar toda a transcrição ao Gemini a cada turno, mantemos apenas
+# as mensagens mais recentes (dentro de um orçamento de tokens estimados). As
+# mensagens mais antigas são "dobradas" em um resumo contínuo guardado no próprio
+# Chat (history_summary), junto com o id da última mensagem já resumida
+# (summarized_until_id). Assim só carregamos do banco as mensagens posteriores ao
+# resumo e o resumo é atualizado de forma incremental.
+
+from collections import namedtuple
+from models import Message
+
+WindowMessage = namedtuple('WindowMessage', ['id', 'sender', 'content'])
+
+SUMMARY_INTRO = "Resumo da aventura até aqui (eventos anteriores às mensagens seguintes):"
+SUMMARY_ACK = "Entendido. Vou continuar a aventura levando em conta este resumo."
+
+def estimate_tokens(text):
+    # Aproximação barata: ~4 caracteres por token
+    return max(1, len(text or '') // 4)
+
+class HistoryWindow:
+    def __init__(self, summary, summarized_until_id, messages):
+        self.summary = summary or ''
+        self.summarized_until_id = summarized_until_id or 0
+        self.messages = list(messages)
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(m.content) for m in self.messages)
+
+    def append(self, message_id, sender, content):
+        self.messages.append(WindowMessage(message_id, sender, content))
+
+def load_history_window(chat):
+    # Carrega apenas as mensagens que ainda não foram incorporadas ao resumo
+    summarized_until_id = chat.summarized_until_id or 0
+    rows = (Message.query
+            .with_entities(Message.id, Message.sender, Message.content)
+            .filter(Message.chat_id == chat.id, Message.id > summarized_until_id)
+            .order_by(Message.id.asc())
+            .all())
+    return HistoryWindow(chat.history_summary, summarized_until_id, [WindowMessage(*row) for row in rows])
+
+def select_messages_to_fold(window, token_budget, min_recent_messages):
+    # Retorna quantas mensagens antigas devem ir para o resumo. Quando o orçamento
+    # estoura, dobramos até metade dele para não precisar resumir a cada turno.
+    if window.tokens <= token_budget:
+        return 0
+
+    target = token_budget // 2
+    tokens = window.tokens
+    foldable = max(0, len(window.messages) - min_recent_messages)
+    count = 0
+    while count < foldable and tokens > target:
+        tokens -= estimate_tokens(window.messages[count].content)
+        count += 1
+    return count
+
+def build_summary_prompt(previous_summary, messages):
+    lines = []
+    for msg in messages:
+        speaker = "Jogador" if msg.sender == 'user' else "Mestre"
+        lines.append(f"{speaker}: {msg.content}")
+    transcript = "\n".join(lines)
+
+    prompt = (
+        "Você está ajudando a manter o resumo de uma aventura de RPG em andamento.\n"
+        "Atualize o resumo incorporando os novos eventos abaixo. Preserve nomes, locais, "
+        "itens, decisões do jogador e pontas soltas importantes. Seja conciso (no máximo "
+        "algumas dezenas de linhas) e responda APENAS com o resumo atualizado.\n\n"
+    )
+    if previous_summary:
+        prompt += f"Resumo atual:\n{previous_summary}\n\n"
+    prompt += f"Novos eventos:\n{transcript}"
+    return prompt
+
+def fold_history_window(chat, window, summarize, token_budget, min_recent_messages):
+    # Dobra as mensagens mais antigas da janela no resumo do chat. Em caso de falha
+    # do resumo a janela fica intacta (acima do orçamento) e tentamos de novo no
+    # próximo turno, para nunca perder contexto.
+    count = select_messages_to_fold(window, token_budget, min_recent_messages)
+    if count == 0:
+        return False
+
+    folded = window.messages[:count]
+    try:
+        new_summary = summarize(build_summary_prompt(window.summary, folded))
+    except Exception as e:
+        print(f"Erro ao resumir histórico do chat {chat.id}: {e}")
+        return False
+
+    if not new_summary or not new_summary.strip():
+        return False
+
+    window.summary = new_summary.strip()
+    window.summarized_until_id = folded[-1].id
+    window.messages = window.messages[count:]
+
+    chat.history_summary = window.summary
+    chat.summarized_until_id = window.summarized_until_id
+    return True
+
+def window_history_entries(window):
+    # Converte a janela no formato de histórico do Gemini
+    entries = []
+    if window.summary:
+        entries.append({"role": "user", "parts": [f"{SUMMARY_INTRO}\n{window.summary}"]})
+        entries.append({"role": "model", "parts": [SUMMARY_ACK]})
+
+    for msg in window.messages:
+        role = "user" if msg.sender == "user" else "model"
+        entries.append({"role": role, "parts": [msg.content]})
+    return entries
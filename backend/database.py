@@ -0,0 +1,82 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Ajuste do banco de dados.
+#
+# As opções do engine (pool no PostgreSQL, timeout no SQLite) vêm de
+# Config.SQLALCHEMY_ENGINE_OPTIONS. Aqui aplicamos os PRAGMAs do SQLite em cada
+# nova conexão (WAL, synchronous, busy_timeout, mmap_size e foreign_keys, necessário
+# para o ON DELETE CASCADE das mensagens) e fazemos a verificação de startup, que
+# registra as configurações efetivas.
+
+from sqlalchemy import event
+
+SQLITE_JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SQLITE_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+def sqlite_pragmas(config):
+    journal_mode = config.get('SQLITE_JOURNAL_MODE', 'WAL').upper()
+    synchronous = config.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+    # Valores vão direto no SQL do PRAGMA, então só aceitamos os conhecidos
+    if journal_mode not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f'SQLITE_JOURNAL_MODE inválido: {journal_mode}')
+    if synchronous not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f'SQLITE_SYNCHRONOUS inválido: {synchronous}')
+    return [
+        ('journal_mode', journal_mode),
+        ('synchronous', synchronous),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 0))),
+        ('foreign_keys', 'ON'),
+    ]
+
+def configure_database(app, db):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def effective_database_settings(db):
+    engine = db.engine
+    settings = {'dialect': engine.dialect.name, 'pool': type(engine.pool).__name__}
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as connection:
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'foreign_keys'):
+                settings[name] = connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+    else:
+        pool = engine.pool
+        for name, getter in (('pool_size', 'size'), ('max_overflow', '_max_overflow'),
+                             ('pool_recycle', '_recycle'), ('pool_pre_ping', '_pre_ping')):
+            value = getattr(pool, getter, None)
+            settings[name] = value() if callable(value) else value
+    return settings
+
+def log_database_settings(app, db):
+    try:
+        with app.app_context():
+            settings = effective_database_settings(db)
+        print("Banco de dados: " + ", ".join(f"{name}={value}" for name, value in settings.items()))
+    except Exception as e:
+        print(f"Erro na verificação de startup do banco de dados: {e}")
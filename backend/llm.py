@@ -0,0 +1,441 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Camada de provedores de LLM.
+#
+# Todas as chamadas de modelo (título, introdução, turnos, resumo) passam por um
+# provedor com a mesma interface:
+#   generate(prompt, history=None, max_output_tokens=None, cached_context=None) -> LLMResponse
+#   stream(prompt, history=None, max_output_tokens=None, cached_context=None)   -> iterador de LLMResponse
+# No stream, cada item traz um trecho do texto; o último traz também o uso de tokens.
+# generate_async e stream_async são as variantes assíncronas (usadas pelo asgi.py).
+# create_cached_context(history, ttl_seconds) guarda um prefixo do histórico no
+# provedor (CachedContext); as chamadas com cached_context enviam só o restante.
+#
+# Provedores disponíveis (Config.LLM_PROVIDER):
+#   gemini - Google Gemini (precisa de GEMINI_API_KEY)
+#   fake   - provedor local determinístico, com latência, taxa de tokens e taxa de
+#            falhas configuráveis, para testes de carga e benchmarks sem rede.
+#
+# O app usa o provedor embrulhado em InstrumentedProvider, que aceita também
+# call_type ('title', 'intro', 'turn', 'summary') e registra latência, tokens,
+# erros e chamadas em andamento por tipo de chamada no registry de métricas.
+
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60)
+
+class LLMResponse:
+    def __init__(self, text, prompt_tokens=None, completion_tokens=None, cached_tokens=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens # Inclui os tokens vindos do contexto em cache
+        self.completion_tokens = completion_tokens
+        self.cached_tokens = cached_tokens
+
+class CachedContext:
+    # Prefixo do histórico guardado no provedor (context caching). prefix_length é
+    # quantas entradas do histórico ele cobre; as chamadas que o usam enviam só o resto.
+    def __init__(self, name, prefix_length, token_count, expires_at, provider_data=None):
+        self.name = name
+        self.prefix_length = prefix_length
+        self.token_count = token_count
+        self.expires_at = expires_at
+        self.provider_data = provider_data
+
+class LLMError(Exception):
+    # Erro de um provedor com código de status HTTP equivalente (429, 503, ...)
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMOverloadedError(LLMError):
+    # Sem capacidade para atender agora (fila cheia, espera esgotada ou limite do
+    # provedor): o cliente deve tentar de novo depois de retry_after segundos
+    def __init__(self, message, retry_after=1):
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+class GeminiProvider:
+    name = 'gemini'
+
+    def __init__(self, api_key, model_name):
+        import google.generativeai as genai
+        self._genai = genai
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def _generation_config(self, max_output_tokens):
+        if max_output_tokens is None:
+            return None
+        return self._genai.GenerationConfig(max_output_tokens=max_output_tokens)
+
+    @staticmethod
+    def _to_response(response, text):
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            text,
+            prompt_tokens=getattr(usage, 'prompt_token_count', None),
+            completion_tokens=getattr(usage, 'candidates_token_count', None),
+            cached_tokens=getattr(usage, 'cached_content_token_count', None),
+        )
+
+    def _start_chat(self, history, cached_context):
+        # Com contexto em cache, o modelo já traz o prefixo; o histórico é só o restante
+        model = cached_context.provider_data if cached_context is not None else self._model
+        return model.start_chat(history=history or [])
+
+    def create_cached_context(self, history, ttl_seconds):
+        from datetime import timedelta
+        cached = self._genai.caching.CachedContent.create(
+            model=self.model_name, contents=history, ttl=timedelta(seconds=ttl_seconds))
+        usage = getattr(cached, 'usage_metadata', None)
+        return CachedContext(cached.name, len(history), getattr(usage, 'total_token_count', None),
+                             time.time() + ttl_seconds, self._genai.GenerativeModel.from_cached_content(cached))
+
+    def delete_cached_context(self, cached_context):
+        self._genai.caching.CachedContent.get(cached_context.name).delete()
+
+    def generate(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        chat_session = self._start_chat(history, cached_context)
+        response = chat_session.send_message(prompt, generation_config=self._generation_config(max_output_tokens))
+        return self._to_response(response, response.text)
+
+    def stream(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        chat_session = self._start_chat(history, cached_context)
+        response = chat_session.send_message(prompt, stream=True, generation_config=self._generation_config(max_output_tokens))
+        for chunk in response:
+            yield self._to_response(chunk, chunk.text)
+
+    async def generate_async(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        chat_session = self._start_chat(history, cached_context)
+        response = await chat_session.send_message_async(prompt, generation_config=self._generation_config(max_output_tokens))
+        return self._to_response(response, response.text)
+
+    async def stream_async(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        chat_session = self._start_chat(history, cached_context)
+        response = await chat_session.send_message_async(prompt, stream=True, generation_config=self._generation_config(max_output_tokens))
+        async for chunk in response:
+            yield self._to_response(chunk, chunk.text)
+
+class FakeProvider:
+    name = 'fake'
+
+    WORDS = (
+        "a", "aventura", "continua", "enquanto", "o", "herói", "avança", "pela", "floresta",
+        "sombria", "uma", "voz", "ecoa", "entre", "as", "árvores", "antigas", "e", "você",
+        "sente", "que", "algo", "observa", "cada", "passo", "no", "horizonte", "surge",
+        "castelo", "esquecido", "guardado", "por", "criaturas", "lendárias", "do", "reino",
+    )
+
+    def __init__(self, latency_distribution='lognormal', latency_ms=400.0, latency_stddev_ms=150.0,
+                 tokens_per_second=60.0, response_tokens=120, failure_rate=0.0, seed=None,
+                 prefill_ms_per_1k_tokens=0.0):
+        if latency_distribution not in ('fixed', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f'Distribuição de latência desconhecida: {latency_distribution}')
+        self.model_name = 'fake'
+        self.latency_distribution = latency_distribution
+        self.latency_ms = latency_ms
+        self.latency_stddev_ms = latency_stddev_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.failure_rate = failure_rate
+        # Custo de processar o prompt; tokens vindos do contexto em cache não pagam esse custo
+        self.prefill_ms_per_1k_tokens = prefill_ms_per_1k_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cached_contexts = {} # nome -> CachedContext (emula o cache do provedor)
+
+    def _sample_latency(self):
+        # Latência até o primeiro token, em segundos
+        mean, stddev = self.latency_ms, self.latency_stddev_ms
+        with self._lock:
+            if self.latency_distribution == 'fixed':
+                value = mean
+            elif self.latency_distribution == 'uniform':
+                value = self._random.uniform(mean - stddev, mean + stddev)
+            elif self.latency_distribution == 'normal':
+                value = self._random.gauss(mean, stddev)
+            elif mean > 0:
+                # Lognormal com a média e o desvio pedidos (cauda longa, como APIs reais)
+                sigma2 = math.log(1 + (stddev / mean) ** 2)
+                value = self._random.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+            else:
+                value = 0.0
+        return max(0.0, value) / 1000
+
+    def _maybe_fail(self):
+        with self._lock:
+            roll = self._random.random()
+            status_code = self._random.choice((429, 500, 503))
+        if roll < self.failure_rate:
+            raise LLMError(f'Falha simulada do provedor fake ({status_code})', status_code=status_code)
+
+    def _build_tokens(self, prompt, history, max_output_tokens, cached_context=None):
+        # Texto determinístico: mesmo prompt + histórico geram sempre a mesma resposta
+        history_length = len(history or []) + (cached_context.prefix_length if cached_context else 0)
+        digest = hashlib.sha256(f"{history_length}:{prompt}".encode('utf-8')).digest()
+        text_random = random.Random(digest)
+        count = self.response_tokens if max_output_tokens is None else min(self.response_tokens, max_output_tokens)
+        return [text_random.choice(self.WORDS) for _ in range(max(1, count))]
+
+    @staticmethod
+    def _count_tokens(history, prompt=''):
+        # Mesma aproximação da janela de histórico: ~4 caracteres por token
+        chars = len(prompt) + sum(len(part) for entry in (history or []) for part in entry['parts'])
+        return max(1, chars // 4)
+
+    def create_cached_context(self, history, ttl_seconds):
+        time.sleep(self._sample_latency())
+        with self._lock:
+            name = f"cachedContents/fake-{len(self._cached_contexts) + 1}-{self._random.getrandbits(32):08x}"
+            context = CachedContext(name, len(history), self._count_tokens(history), time.time() + ttl_seconds)
+            self._cached_contexts[name] = context
+        return context
+
+    def delete_cached_context(self, cached_context):
+        with self._lock:
+            self._cached_contexts.pop(cached_context.name, None)
+
+    def _prepare(self, prompt, history, cached_context):
+        # Retorna (tokens do prompt, tokens em cache, segundos de prefill)
+        cached_tokens = None
+        if cached_context is not None:
+            with self._lock:
+                known = self._cached_contexts.get(cached_context.name)
+                if known is None or known.expires_at <= time.time():
+                    self._cached_contexts.pop(cached_context.name, None)
+                    raise LLMError(f'Contexto em cache não encontrado: {cached_context.name}', status_code=404)
+            cached_tokens = known.token_count
+        uncached_tokens = self._count_tokens(history, prompt)
+        prefill = uncached_tokens / 1000 * self.prefill_ms_per_1k_tokens / 1000
+        return uncached_tokens + (cached_tokens or 0), cached_tokens, prefill
+
+    def _chunk(self, tokens, index, usage):
+        text = (tokens[index].capitalize() if index == 0 else " " + tokens[index])
+        if index == len(tokens) - 1:
+            return LLMResponse(text + ".", prompt_tokens=usage[0], completion_tokens=len(tokens), cached_tokens=usage[1])
+        return LLMResponse(text)
+
+    def generate(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        usage = self._prepare(prompt, history, cached_context)
+        time.sleep(self._sample_latency() + usage[2])
+        self._maybe_fail()
+        tokens = self._build_tokens(prompt, history, max_output_tokens, cached_context)
+        if self.tokens_per_second > 0:
+            time.sleep(len(tokens) / self.tokens_per_second)
+        return LLMResponse(" ".join(tokens).capitalize() + ".", prompt_tokens=usage[0],
+                           completion_tokens=len(tokens), cached_tokens=usage[1])
+
+    def stream(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        usage = self._prepare(prompt, history, cached_context)
+        time.sleep(self._sample_latency() + usage[2])
+        self._maybe_fail()
+        tokens = self._build_tokens(prompt, history, max_output_tokens, cached_context)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for index in range(len(tokens)):
+            if delay:
+                time.sleep(delay)
+            yield self._chunk(tokens, index, usage)
+
+    async def generate_async(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        usage = self._prepare(prompt, history, cached_context)
+        await asyncio.sleep(self._sample_latency() + usage[2])
+        self._maybe_fail()
+        tokens = self._build_tokens(prompt, history, max_output_tokens, cached_context)
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(len(tokens) / self.tokens_per_second)
+        return LLMResponse(" ".join(tokens).capitalize() + ".", prompt_tokens=usage[0],
+                           completion_tokens=len(tokens), cached_tokens=usage[1])
+
+    async def stream_async(self, prompt, history=None, max_output_tokens=None, cached_context=None):
+        usage = self._prepare(prompt, history, cached_context)
+        await asyncio.sleep(self._sample_latency() + usage[2])
+        self._maybe_fail()
+        tokens = self._build_tokens(prompt, history, max_output_tokens, cached_context)
+        delay = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for index in range(len(tokens)):
+            if delay:
+                await asyncio.sleep(delay)
+            yield self._chunk(tokens, index, usage)
+
+class InstrumentedProvider:
+    def __init__(self, provider, registry):
+        self._provider = provider
+        labels = ('provider', 'call_type')
+        self._latency = registry.histogram(
+            'jogai_llm_request_duration_seconds', 'Duração das chamadas ao LLM, por tipo de chamada.',
+            labels, buckets=LLM_LATENCY_BUCKETS)
+        self._first_chunk = registry.histogram(
+            'jogai_llm_time_to_first_chunk_seconds', 'Tempo até o primeiro trecho nas chamadas em stream.',
+            labels, buckets=LLM_LATENCY_BUCKETS)
+        self._prompt_tokens = registry.counter(
+            'jogai_llm_prompt_tokens_total', 'Tokens de prompt informados pelo provedor.', labels)
+        self._completion_tokens = registry.counter(
+            'jogai_llm_completion_tokens_total', 'Tokens de resposta informados pelo provedor.', labels)
+        self._cached_tokens = registry.counter(
+            'jogai_llm_cached_tokens_total', 'Tokens de prompt atendidos pelo contexto em cache do provedor.', labels)
+        self._requests = registry.counter(
+            'jogai_llm_requests_total', 'Chamadas ao LLM concluídas, por resultado.', labels + ('outcome',))
+        self._errors = registry.counter(
+            'jogai_llm_errors_total', 'Erros nas chamadas ao LLM, por classe de exceção.', labels + ('exception',))
+        self._in_flight = registry.gauge(
+            'jogai_llm_in_flight', 'Chamadas ao LLM em andamento.', labels)
+
+    def __getattr__(self, name):
+        # name, model_name e demais atributos vêm do provedor embrulhado
+        return getattr(self._provider, name)
+
+    def _labels(self, call_type):
+        return {'provider': self._provider.name, 'call_type': call_type}
+
+    def _record_usage(self, labels, response):
+        if response.prompt_tokens is not None:
+            self._prompt_tokens.inc(response.prompt_tokens, **labels)
+        if response.completion_tokens is not None:
+            self._completion_tokens.inc(response.completion_tokens, **labels)
+        if response.cached_tokens:
+            self._cached_tokens.inc(response.cached_tokens, **labels)
+
+    def _record_error(self, labels, error):
+        self._errors.inc(exception=type(error).__name__, **labels)
+        self._requests.inc(outcome='error', **labels)
+
+    def _begin(self, call_type):
+        labels = self._labels(call_type)
+        self._in_flight.inc(**labels)
+        return labels, time.perf_counter()
+
+    def _end(self, labels, started):
+        self._latency.observe(time.perf_counter() - started, **labels)
+        self._in_flight.dec(**labels)
+
+    def _succeeded(self, labels, response):
+        self._requests.inc(outcome='success', **labels)
+        if response is not None:
+            self._record_usage(labels, response)
+
+    def _observe_chunk(self, labels, started, chunk, state):
+        # state: [já recebeu trecho?, último trecho com uso de tokens]
+        if not state[0]:
+            self._first_chunk.observe(time.perf_counter() - started, **labels)
+            state[0] = True
+        # O uso de tokens vem no último trecho (ou acumulado, no Gemini); conta só o mais recente
+        if chunk.prompt_tokens is not None or chunk.completion_tokens is not None:
+            state[1] = chunk
+
+    def create_cached_context(self, history, ttl_seconds):
+        labels, started = self._begin('context_cache')
+        try:
+            cached_context = self._provider.create_cached_context(history, ttl_seconds)
+        except Exception as e:
+            self._record_error(labels, e)
+            raise
+        finally:
+            self._end(labels, started)
+        self._requests.inc(outcome='success', **labels)
+        return cached_context
+
+    def generate(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        labels, started = self._begin(call_type)
+        try:
+            response = self._provider.generate(prompt, history=history, max_output_tokens=max_output_tokens,
+                                               cached_context=cached_context)
+        except Exception as e:
+            self._record_error(labels, e)
+            raise
+        finally:
+            self._end(labels, started)
+        self._succeeded(labels, response)
+        return response
+
+    def stream(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        labels, started = self._begin(call_type)
+        state = [False, None]
+        try:
+            for chunk in self._provider.stream(prompt, history=history, max_output_tokens=max_output_tokens,
+                                               cached_context=cached_context):
+                self._observe_chunk(labels, started, chunk, state)
+                yield chunk
+        except GeneratorExit:
+            # Cliente desconectou no meio do stream: não é erro do provedor
+            self._requests.inc(outcome='cancelled', **labels)
+            raise
+        except Exception as e:
+            self._record_error(labels, e)
+            raise
+        else:
+            self._succeeded(labels, state[1])
+        finally:
+            self._end(labels, started)
+
+    async def generate_async(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        labels, started = self._begin(call_type)
+        try:
+            response = await self._provider.generate_async(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                           cached_context=cached_context)
+        except asyncio.CancelledError:
+            self._requests.inc(outcome='cancelled', **labels)
+            raise
+        except Exception as e:
+            self._record_error(labels, e)
+            raise
+        finally:
+            self._end(labels, started)
+        self._succeeded(labels, response)
+        return response
+
+    async def stream_async(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        labels, started = self._begin(call_type)
+        state = [False, None]
+        try:
+            async for chunk in self._provider.stream_async(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                           cached_context=cached_context):
+                self._observe_chunk(labels, started, chunk, state)
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            self._requests.inc(outcome='cancelled', **labels)
+            raise
+        except Exception as e:
+            self._record_error(labels, e)
+            raise
+        else:
+            self._succeeded(labels, state[1])
+        finally:
+            self._end(labels, started)
+
+def create_llm_provider(config):
+    # Retorna None quando nenhum provedor está disponível (as rotas de chat respondem 503)
+    provider = (config.get('LLM_PROVIDER') or 'gemini').lower()
+    if provider == 'fake':
+        return FakeProvider(
+            latency_distribution=config.get('FAKE_LLM_LATENCY_DISTRIBUTION', 'lognormal'),
+            latency_ms=config.get('FAKE_LLM_LATENCY_MS', 400.0),
+            latency_stddev_ms=config.get('FAKE_LLM_LATENCY_STDDEV_MS', 150.0),
+            tokens_per_second=config.get('FAKE_LLM_TOKENS_PER_SECOND', 60.0),
+            response_tokens=config.get('FAKE_LLM_RESPONSE_TOKENS', 120),
+            failure_rate=config.get('FAKE_LLM_FAILURE_RATE', 0.0),
+            seed=config.get('FAKE_LLM_SEED'),
+            prefill_ms_per_1k_tokens=config.get('FAKE_LLM_PREFILL_MS_PER_1K_TOKENS', 0.0),
+        )
+    if provider == 'gemini':
+        if not config.get('GEMINI_API_KEY'):
+            return None
+        return GeminiProvider(config['GEMINI_API_KEY'], config.get('LLM_MODEL') or 'gemini-1.5-flash-latest')
+    raise ValueError(f'LLM_PROVIDER desconhecido: {provider}')
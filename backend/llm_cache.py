@@ -0,0 +1,178 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Cache de respostas do LLM para prompts que se repetem (ex.: títulos de chats).
+#
+# A chave é o prompt normalizado (espaços, maiúsculas e acentos não importam) mais
+# o modelo. Cada chave guarda um pequeno conjunto ("pool") de respostas: enquanto
+# o pool não está cheio, get() devolve None e o chamador consulta o modelo e
+# adiciona a resposta; depois disso as respostas são devolvidas em rodízio, então
+# configurações comuns não chamam o Gemini e os títulos continuam variando.
+#
+# Camadas:
+#   - memória: LRU limitado a LLM_CACHE_MAX_ENTRIES chaves;
+#   - disco (opcional, LLM_CACHE_DB_PATH): arquivo SQLite compartilhado entre
+#     processos, com TTL e limite de LLM_CACHE_DB_MAX_ENTRIES respostas.
+
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+
+def normalize_prompt(prompt):
+    text = unicodedata.normalize('NFKD', prompt.casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(text.split())
+
+class SQLiteResponseStore:
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cache_key TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_response_cache_key ON llm_response_cache (cache_key, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_used ON llm_response_cache (last_used_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def load(self, key, not_before):
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT response FROM llm_response_cache WHERE cache_key = ? AND created_at >= ? ORDER BY id",
+                (key, not_before)).fetchall()
+            if rows:
+                conn.execute("UPDATE llm_response_cache SET last_used_at = ? WHERE cache_key = ?", (time.time(), key))
+        return [row[0] for row in rows]
+
+    def add(self, key, response, pool_size, not_before):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_response_cache WHERE created_at < ?", (not_before,))
+            conn.execute("INSERT INTO llm_response_cache (cache_key, response, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                         (key, response, now, now))
+            # Mantém só as respostas mais novas de cada chave
+            conn.execute("""
+                DELETE FROM llm_response_cache WHERE cache_key = ? AND id NOT IN (
+                    SELECT id FROM llm_response_cache WHERE cache_key = ? ORDER BY id DESC LIMIT ?)""",
+                         (key, key, pool_size))
+            # Limite de tamanho: descarta as menos usadas recentemente
+            conn.execute("""
+                DELETE FROM llm_response_cache WHERE id IN (
+                    SELECT id FROM llm_response_cache ORDER BY last_used_at DESC, id DESC LIMIT -1 OFFSET ?)""",
+                         (self.max_entries,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_response_cache")
+
+class LLMResponseCache:
+    def __init__(self, registry, max_entries=512, pool_size=5, ttl_seconds=7 * 24 * 3600,
+                 db_path=None, db_max_entries=10000):
+        self.max_entries = max_entries
+        self.pool_size = max(1, pool_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict() # chave -> {'responses', 'next', 'loaded_at'}
+        self._lock = threading.Lock()
+        self._store = SQLiteResponseStore(db_path, db_max_entries) if db_path else None
+        self._lookups = registry.counter(
+            'jogai_llm_cache_lookups_total', 'Consultas ao cache de respostas do LLM, por resultado.',
+            ('namespace', 'result'))
+
+    def key(self, namespace, model_name, prompt):
+        normalized = normalize_prompt(prompt)
+        return hashlib.sha256(f"{namespace}\n{model_name}\n{normalized}".encode('utf-8')).hexdigest()
+
+    def _not_before(self):
+        return time.time() - self.ttl_seconds
+
+    def _remember(self, key, responses):
+        # Chamado com self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {'responses': [], 'next': 0, 'loaded_at': time.time()}
+        entry['responses'] = responses[-self.pool_size:]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['loaded_at'] >= self._not_before():
+                self._entries.move_to_end(key)
+                return entry, 'memory'
+            self._entries.pop(key, None)
+        if self._store is None:
+            return None, None
+        responses = self._store.load(key, self._not_before())
+        if not responses:
+            return None, None
+        with self._lock:
+            return self._remember(key, responses), 'disk'
+
+    def get(self, namespace, model_name, prompt):
+        # Devolve uma resposta do pool (em rodízio) ou None se o modelo deve ser consultado
+        key = self.key(namespace, model_name, prompt)
+        entry, tier = self._entry(key)
+        with self._lock:
+            if entry is None or len(entry['responses']) < self.pool_size:
+                self._lookups.inc(namespace=namespace, result='miss')
+                return None
+            response = entry['responses'][entry['next'] % len(entry['responses'])]
+            entry['next'] += 1
+        self._lookups.inc(namespace=namespace, result=f'hit_{tier}')
+        return response
+
+    def add(self, namespace, model_name, prompt, response):
+        key = self.key(namespace, model_name, prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            responses = list(entry['responses']) if entry else []
+            responses.append(response)
+            self._remember(key, responses)
+        if self._store is not None:
+            self._store.add(key, response, self.pool_size, self._not_before())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._store is not None:
+            self._store.clear()
+
+def create_llm_response_cache(registry, config):
+    # Retorna None quando o cache está desligado
+    if not config.get('LLM_CACHE_ENABLED', True):
+        return None
+    return LLMResponseCache(
+        registry,
+        max_entries=config.get('LLM_CACHE_MAX_ENTRIES', 512),
+        pool_size=config.get('LLM_CACHE_POOL_SIZE', 5),
+        ttl_seconds=config.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600),
+        db_path=config.get('LLM_CACHE_DB_PATH'),
+        db_max_entries=config.get('LLM_CACHE_DB_MAX_ENTRIES', 10000),
+    )
@@ -0,0 +1,338 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Despachante das chamadas ao LLM (um por processo).
+#
+# Embrulha o provedor com a mesma interface (generate/stream) e controla o que
+# sai para a API:
+#   - no máximo LLM_MAX_CONCURRENCY chamadas simultâneas (semáforo);
+#   - taxa máxima de LLM_RATE_LIMIT_PER_SECOND chamadas (token bucket com rajada
+#     de LLM_RATE_LIMIT_BURST); 0 desliga o limite de taxa;
+#   - fila de espera limitada a LLM_MAX_QUEUE chamadas, cada uma esperando no
+#     máximo LLM_QUEUE_TIMEOUT_SECONDS por uma vaga;
+#   - novas tentativas com backoff exponencial e jitter em 429/5xx.
+# Fila cheia, espera esgotada ou 429 persistente viram LLMOverloadedError, que o
+# app responde como 429 com Retry-After em vez de segurar o worker.
+#
+# As variantes assíncronas (generate_async/stream_async) dividem o mesmo semáforo
+# e o mesmo token bucket com as síncronas; só a espera por vaga usa uma thread.
+
+from llm import LLMOverloadedError
+import asyncio
+import math
+import random
+import threading
+import time
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+def error_status_code(error):
+    # LLMError traz status_code; as exceções do google.api_core trazem code (HTTPStatus)
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(error, 'code', None)
+    try:
+        return int(status_code) if status_code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Reserva uma ficha e devolve quantos segundos esperar até poder usá-la
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def cancel(self):
+        # Devolve uma ficha reservada que não será usada
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+class DispatchedStream:
+    # Iterador do stream que devolve a vaga do semáforo ao terminar ou ser fechado,
+    # mesmo que nunca tenha sido iterado (o que um gerador não garante)
+    def __init__(self, dispatcher, iterator):
+        self._dispatcher = dispatcher
+        self._iterator = iterator
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            close = getattr(self._iterator, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._dispatcher._release()
+
+    def __del__(self):
+        self.close()
+
+class DispatchedAsyncStream:
+    # Equivalente assíncrono do DispatchedStream
+    def __init__(self, dispatcher, iterator):
+        self._dispatcher = dispatcher
+        self._iterator = iterator
+        self._released = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            await self._iterator.aclose()
+        finally:
+            self._dispatcher._release()
+
+    def __del__(self):
+        if not self._released:
+            self._released = True
+            self._dispatcher._release()
+
+class LLMDispatcher:
+    def __init__(self, provider, registry, max_concurrency=4, rate_per_second=0.0, burst=1,
+                 max_queue=16, queue_timeout=10.0, max_retries=3, retry_base_delay=0.5, retry_max_delay=8.0):
+        self._provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._bucket = TokenBucket(rate_per_second, burst) if rate_per_second > 0 else None
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+        self._queue_wait = registry.histogram(
+            'jogai_llm_queue_wait_seconds', 'Espera por uma vaga para chamar o LLM.',
+            buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+        self._queued = registry.gauge('jogai_llm_queued', 'Chamadas ao LLM aguardando vaga.')
+        self._rejected = registry.counter(
+            'jogai_llm_rejected_total', 'Chamadas ao LLM recusadas por sobrecarga.', ('reason',))
+        self._retries = registry.counter(
+            'jogai_llm_retries_total', 'Novas tentativas de chamadas ao LLM, por status.', ('status_code',))
+
+    def __getattr__(self, name):
+        return getattr(self._provider, name)
+
+    def _retry_after(self):
+        # Estimativa grosseira para o cabeçalho Retry-After, em segundos inteiros
+        return max(1, math.ceil(self.retry_base_delay * (1 + self._waiting / self.max_concurrency)))
+
+    def _reject(self, reason, message):
+        self._rejected.inc(reason=reason)
+        raise LLMOverloadedError(message, retry_after=self._retry_after())
+
+    def _acquire(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            self._wait_for_slot(started)
+        self._throttle(started)
+        self._queue_wait.observe(time.monotonic() - started)
+
+    def _wait_for_slot(self, started):
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self._reject('queue_full', 'Fila de chamadas ao modelo cheia.')
+            self._waiting += 1
+            self._queued.inc()
+
+        try:
+            if not self._slots.acquire(timeout=self.queue_timeout):
+                self._reject('queue_timeout', 'Tempo de espera por uma vaga no modelo esgotado.')
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                self._queued.dec()
+
+    def _throttle(self, started):
+        if self._bucket is None:
+            return
+        delay = self._bucket.reserve()
+        remaining = self.queue_timeout - (time.monotonic() - started)
+        if delay > remaining:
+            self._bucket.cancel()
+            self._slots.release()
+            self._reject('rate_limit', 'Limite de chamadas ao modelo atingido.')
+        if delay > 0:
+            time.sleep(delay)
+
+    def _release(self):
+        self._slots.release()
+
+    def create_cached_context(self, history, ttl_seconds):
+        # Criar o contexto em cache também é uma chamada ao provedor: respeita os mesmos limites
+        self._acquire()
+        try:
+            return self._provider.create_cached_context(history, ttl_seconds)
+        finally:
+            self._release()
+
+    async def _acquire_async(self):
+        # A espera pela vaga bloqueia uma thread do pool, não o loop de eventos
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # Se a vaga chegar depois do cancelamento, devolvê-la
+            acquiring.add_done_callback(
+                lambda future: future.cancelled() or future.exception() is not None or self._release())
+            raise
+
+    def _backoff(self, attempt):
+        # Backoff exponencial com jitter completo
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return self._random.uniform(0, ceiling)
+
+    def _should_retry(self, error, attempt):
+        status_code = error_status_code(error)
+        if status_code not in RETRYABLE_STATUS_CODES:
+            return False
+        if attempt >= self.max_retries:
+            if status_code == 429:
+                # O provedor continua limitando: repassar como sobrecarga (429 + Retry-After)
+                self._rejected.inc(reason='upstream_rate_limit')
+                raise LLMOverloadedError(f'Limite do provedor do modelo atingido: {error}',
+                                         retry_after=max(1, math.ceil(self.retry_max_delay))) from error
+            return False
+        self._retries.inc(status_code=status_code)
+        return True
+
+    def generate(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        self._acquire()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return self._provider.generate(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                   cached_context=cached_context, call_type=call_type)
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            self._release()
+
+    def stream(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        # A vaga é reservada já aqui (e não na primeira iteração) para que a sobrecarga
+        # seja detectada antes de a resposta HTTP começar
+        self._acquire()
+        try:
+            return DispatchedStream(self, self._stream_with_retries(prompt, history, max_output_tokens, cached_context, call_type))
+        except BaseException:
+            self._release()
+            raise
+
+    def _stream_with_retries(self, prompt, history, max_output_tokens, cached_context, call_type):
+        attempt = 0
+        while True:
+            yielded = False
+            try:
+                for chunk in self._provider.stream(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                   cached_context=cached_context, call_type=call_type):
+                    yielded = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Só é possível repetir antes de qualquer trecho ter sido enviado ao cliente
+                if yielded or not self._should_retry(e, attempt):
+                    raise
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def generate_async(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        await self._acquire_async()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    return await self._provider.generate_async(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                               cached_context=cached_context, call_type=call_type)
+                except Exception as e:
+                    if not self._should_retry(e, attempt):
+                        raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            self._release()
+
+    async def stream_async(self, prompt, history=None, max_output_tokens=None, cached_context=None, call_type='other'):
+        await self._acquire_async()
+        return DispatchedAsyncStream(self, self._stream_async_with_retries(prompt, history, max_output_tokens, cached_context, call_type))
+
+    async def _stream_async_with_retries(self, prompt, history, max_output_tokens, cached_context, call_type):
+        attempt = 0
+        while True:
+            yielded = False
+            try:
+                async for chunk in self._provider.stream_async(prompt, history=history, max_output_tokens=max_output_tokens,
+                                                               cached_context=cached_context, call_type=call_type):
+                    yielded = True
+                    yield chunk
+                return
+            except Exception as e:
+                if yielded or not self._should_retry(e, attempt):
+                    raise
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+def create_llm_dispatcher(provider, registry, config):
+    return LLMDispatcher(
+        provider, registry,
+        max_concurrency=config.get('LLM_MAX_CONCURRENCY', 4),
+        rate_per_second=config.get('LLM_RATE_LIMIT_PER_SECOND', 0.0),
+        burst=config.get('LLM_RATE_LIMIT_BURST', 1),
+        max_queue=config.get('LLM_MAX_QUEUE', 16),
+        queue_timeout=config.get('LLM_QUEUE_TIMEOUT_SECONDS', 10.0),
+        max_retries=config.get('LLM_MAX_RETRIES', 3),
+        retry_base_delay=config.get('LLM_RETRY_BASE_DELAY_SECONDS', 0.5),
+        retry_max_delay=config.get('LLM_RETRY_MAX_DELAY_SECONDS', 8.0),
+    )
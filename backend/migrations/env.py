@@ -94,9 +94,23 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
+    # Tabelas FTS5 da busca (search.py) não são modelos; o autogenerate as ignora
+    def include_name(name, type_, parent_names):
+        if type_ == 'table':
+            return not name.startswith(('message_fts', 'chat_fts'))
+        return True
+
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            # As alterações em lote do SQLite recriam a tabela (DROP + RENAME); com
+            # foreign_keys=ON (database.py) o DROP do chat apagaria as mensagens em cascata
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -106,6 +120,10 @@ def run_migrations_online():
         with context.begin_transaction():
             context.run_migrations()
 
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
 
 if context.is_offline_mode():
     run_migrations_offline()
@@ -0,0 +1,28 @@
+"""Add intro attempts to chat
+
+Revision ID: a3e9f5c27b14
+Revises: f1c6d83a5e29
+Create Date: 2026-10-18 18:20:37.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e9f5c27b14'
+down_revision = 'f1c6d83a5e29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('intro_attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('intro_started_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_column('intro_started_at')
+        batch_op.drop_column('intro_attempts')
@@ -0,0 +1,38 @@
+"""Cascade message deletes from chat
+
+Revision ID: a91d4e27c3f5
+Revises: f7a3c6d18b52
+Create Date: 2026-10-18 14:32:05.118904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d4e27c3f5'
+down_revision = 'f7a3c6d18b52'
+branch_labels = None
+depends_on = None
+
+# A chave estrangeira da migração inicial não tem nome. No SQLite a convenção dá um
+# nome a ela na tabela refletida pelo batch; no PostgreSQL vale o nome padrão do banco.
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def message_chat_fk_name():
+    if op.get_bind().dialect.name == 'sqlite':
+        return 'fk_message_chat_id_chat'
+    return 'message_chat_id_fkey'
+
+
+def upgrade():
+    with op.batch_alter_table('message', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(message_chat_fk_name(), type_='foreignkey')
+        batch_op.create_foreign_key('fk_message_chat_id_chat', 'chat', ['chat_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint('fk_message_chat_id_chat', type_='foreignkey')
+        batch_op.create_foreign_key(message_chat_fk_name(), 'chat', ['chat_id'], ['id'])
@@ -0,0 +1,49 @@
+"""Add chat transcript archive
+
+Revision ID: b5c8e1f04d27
+Revises: a91d4e27c3f5
+Create Date: 2026-10-18 15:06:41.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5c8e1f04d27'
+down_revision = 'a91d4e27c3f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('chat_archive',
+    sa.Column('chat_id', sa.Integer(), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('message_count', sa.Integer(), nullable=False),
+    sa.Column('original_bytes', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['chat_id'], ['chat.id'], name='fk_chat_archive_chat_id_chat', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('chat_id')
+    )
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('transcript_archived_at', sa.DateTime(), nullable=True))
+
+    # No SQLite, AUTOINCREMENT impede que ids de mensagens arquivadas sejam reaproveitados
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('message', schema=None, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+            pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('message', schema=None, recreate='always',
+                                  table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+            pass
+
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_column('transcript_archived_at')
+
+    op.drop_table('chat_archive')
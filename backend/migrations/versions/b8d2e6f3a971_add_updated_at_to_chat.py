@@ -0,0 +1,31 @@
+"""Add updated_at to chat
+
+Revision ID: b8d2e6f3a971
+Revises: a3e9f5c27b14
+Create Date: 2026-10-18 18:57:14.502963
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d2e6f3a971'
+down_revision = 'a3e9f5c27b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_chat_user_id_updated_at', ['user_id', 'updated_at'], unique=False)
+
+    # Chats existentes: a última alteração conhecida é o último acesso
+    op.execute('UPDATE chat SET updated_at = last_accessed_at')
+
+
+def downgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_user_id_updated_at')
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,69 @@
+"""Add full-text search index
+
+Revision ID: c2f7d9a81e36
+Revises: b5c8e1f04d27
+Create Date: 2026-10-18 15:41:27.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7d9a81e36'
+down_revision = 'b5c8e1f04d27'
+branch_labels = None
+depends_on = None
+
+# Mesmo esquema de search.SEARCH_SCHEMA. Migrações que recriam as tabelas message ou
+# chat (batch do SQLite) apagam os triggers: rode "flask rebuild-search-index" depois.
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5(
+        content, content='message', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_ai AFTER INSERT ON message BEGIN
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_ad AFTER DELETE ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_au AFTER UPDATE OF content ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5(
+        title, inspiracao, observations, content='chat', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ai AFTER INSERT ON chat BEGIN
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ad AFTER DELETE ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_au AFTER UPDATE OF title, inspiracao, observations ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SEARCH_SCHEMA:
+        op.execute(statement)
+    # Indexa os dados existentes
+    op.execute("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO chat_fts(chat_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for trigger in ('chat_fts_au', 'chat_fts_ad', 'chat_fts_ai', 'message_fts_au', 'message_fts_ad', 'message_fts_ai'):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    op.execute('DROP TABLE IF EXISTS chat_fts')
+    op.execute('DROP TABLE IF EXISTS message_fts')
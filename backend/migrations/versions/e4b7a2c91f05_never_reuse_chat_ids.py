@@ -0,0 +1,54 @@
+"""Never reuse chat ids
+
+Revision ID: e4b7a2c91f05
+Revises: c2f7d9a81e36
+Create Date: 2026-10-18 17:12:08.331546
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7a2c91f05'
+down_revision = 'c2f7d9a81e36'
+branch_labels = None
+depends_on = None
+
+# Triggers do índice de busca do chat (search.SEARCH_SCHEMA); recriar a tabela os apaga
+CHAT_SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ai AFTER INSERT ON chat BEGIN
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ad AFTER DELETE ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_au AFTER UPDATE OF title, inspiracao, observations ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+]
+
+
+def recreate_chat_table(autoincrement):
+    with op.batch_alter_table('chat', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}) as batch_op:
+        pass
+    for statement in CHAT_SEARCH_TRIGGERS:
+        op.execute(statement)
+    op.execute("INSERT INTO chat_fts(chat_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    # No SQLite, AUTOINCREMENT impede que o id de um chat excluído volte para outro dono
+    if op.get_bind().dialect.name == 'sqlite':
+        recreate_chat_table(True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        recreate_chat_table(False)
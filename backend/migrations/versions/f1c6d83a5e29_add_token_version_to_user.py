@@ -0,0 +1,26 @@
+"""Add token_version to user
+
+Revision ID: f1c6d83a5e29
+Revises: e4b7a2c91f05
+Create Date: 2026-10-18 17:48:52.610384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c6d83a5e29'
+down_revision = 'e4b7a2c91f05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -14,7 +14,7 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import password_hasher
 import random
 
 db = SQLAlchemy()
@@ -26,24 +26,49 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
+    # Incrementada na troca de senha: tokens emitidos com a versão anterior deixam de valer
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     chats = db.relationship('Chat', backref='user', lazy=True, cascade="all, delete-orphan")
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Chat(db.Model):
+    __table_args__ = (
+        # Lista de chats do usuário (get_user_chats) ordenada por último acesso
+        db.Index('ix_chat_user_id_last_accessed_at', 'user_id', 'last_accessed_at'),
+        # Última idade usada (get_last_used_age): created_at antes de age para
+        # percorrer já na ordem do ORDER BY e filtrar age pelo próprio índice
+        db.Index('ix_chat_user_id_created_at_age', 'user_id', 'created_at', 'age'),
+        # ETag da lista de chats (user_chats_etag): contagem e maior updated_at só pelo índice
+        db.Index('ix_chat_user_id_updated_at', 'user_id', 'updated_at'),
+        # Ids nunca reaproveitados: o cache de donos (auth.py) e as sessões em memória
+        # de outros processos não podem confundir um chat novo com um excluído
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(100), nullable=False, default='Novo Chat')
+    title_pending = db.Column(db.Boolean, nullable=False, default=False) # Título do Gemini ainda sendo gerado
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     last_accessed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Muda em toda alteração da linha (onupdate vale para o ORM e para update() do Core)
+    updated_at = db.Column(db.DateTime, nullable=True, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
     status = db.Column(db.String(50), nullable=False, default='new') # new, started, ongoing, finished, archived
+    intro_status = db.Column(db.String(20), nullable=True) # pending, generating, ready, failed (None = nunca agendada)
+    intro_attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0') # Tentativas de gerar a introdução
+    intro_started_at = db.Column(db.DateTime, nullable=True) # Início da última tentativa
     observations = db.Column(db.Text, nullable=True)
     color = db.Column(db.String(7), nullable=True, default=generate_random_color) # Armazena cores como #RRGGBB
     
@@ -57,8 +82,16 @@ class Chat(db.Model):
     nome_antagonista = db.Column(db.String(100), nullable=True)
     inspiracao = db.Column(db.Text, nullable=True)
     age = db.Column(db.Integer, nullable=True) # Novo campo para idade
+
+    # Resumo contínuo das mensagens que já saíram da janela de histórico enviada ao Gemini
+    history_summary = db.Column(db.Text, nullable=True)
+    summarized_until_id = db.Column(db.Integer, nullable=True, default=0) # Id da última mensagem incorporada ao resumo
+    # Mensagens compactadas em chat_archive (ver transcript_archive.py); None = mensagens na tabela message
+    transcript_archived_at = db.Column(db.DateTime, nullable=True)
     
-    messages = db.relationship('Message', backref='chat', lazy=True, cascade="all, delete-orphan", order_by='Message.timestamp')
+    # As mensagens são apagadas pelo banco (ON DELETE CASCADE); o ORM não as carrega para excluir o chat
+    messages = db.relationship('Message', backref='chat', lazy=True, cascade="all, delete-orphan", passive_deletes=True,
+                               order_by='Message.timestamp')
 
     def __repr__(self):
         return f'<Chat {self.title}>'
@@ -68,9 +101,11 @@ class Chat(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'title': self.title,
+            'title_pending': bool(self.title_pending),
             'created_at': self.created_at.isoformat(),
             'last_accessed_at': self.last_accessed_at.isoformat(),
             'status': self.status,
+            'intro_status': self.intro_status,
             'observations': self.observations,
             'color': self.color if self.color else generate_random_color(), # Garante que sempre retorne uma cor
             'config': {
@@ -89,9 +124,34 @@ class Chat(db.Model):
             data['messages'] = [message.to_dict() for message in self.messages]
         return data
 
+# Colunas usadas pela visão resumida da lista de chats (sem os campos de texto grandes)
+CHAT_STATUSES = ['new', 'started', 'finished', 'cancelled', 'archived']
+
+CHAT_SUMMARY_COLUMNS = (Chat.id, Chat.title, Chat.title_pending, Chat.color, Chat.status, Chat.created_at, Chat.last_accessed_at)
+
+def chat_summary_to_dict(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'title_pending': bool(row.title_pending),
+        'color': row.color if row.color else generate_random_color(),
+        'status': row.status,
+        'created_at': row.created_at.isoformat(),
+        'last_accessed_at': row.last_accessed_at.isoformat(),
+    }
+
 class Message(db.Model):
+    __table_args__ = (
+        # Mensagens de um chat em ordem cronológica (Chat.messages)
+        db.Index('ix_message_chat_id_timestamp', 'chat_id', 'timestamp'),
+        # Janela de histórico e paginação por id dentro de um chat
+        db.Index('ix_message_chat_id_id', 'chat_id', 'id'),
+        # Ids nunca reaproveitados: transcrições arquivadas voltam com os ids originais
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    chat_id = db.Column(db.Integer, db.ForeignKey('chat.id'), nullable=False)
+    chat_id = db.Column(db.Integer, db.ForeignKey('chat.id', ondelete='CASCADE'), nullable=False)
     sender = db.Column(db.String(50), nullable=False)  # 'user' ou 'gemini'
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
@@ -106,4 +166,16 @@ class Message(db.Model):
             'sender': self.sender,
             'content': self.content,
             'timestamp': self.timestamp.isoformat()
-        } 
\ No newline at end of file
+        } 
+
+class ChatArchive(db.Model):
+    # Transcrição compactada de um chat encerrado (ver transcript_archive.py)
+    chat_id = db.Column(db.Integer, db.ForeignKey('chat.id', ondelete='CASCADE'), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False, default='zlib')
+    message_count = db.Column(db.Integer, nullable=False)
+    original_bytes = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<ChatArchive {self.chat_id}>'
@@ -0,0 +1,151 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Hash de senhas configurável e fora das threads de request.
+#
+# O algoritmo e o custo vêm de PASSWORD_HASH_METHOD (formato do werkzeug, ex.:
+# 'scrypt:32768:8:1' ou 'pbkdf2:sha256:600000') e PASSWORD_SALT_LENGTH. Hashes
+# gravados com outros parâmetros continuam válidos; needs_rehash() indica quando
+# o login deve regravá-los com os parâmetros atuais.
+#
+# O cálculo é CPU-bound, então roda num pool de PASSWORD_HASH_WORKERS processos
+# (0 = na própria thread). No máximo PASSWORD_HASH_MAX_PENDING hashes ficam em
+# andamento ou na fila; além disso PasswordHasherBusyError vira 503 com Retry-After,
+# em vez de as threads dos chats ficarem presas esperando CPU. Um hash que passa do
+# timeout continua ocupando a vaga até terminar no pool.
+#
+# Os processos do pool são criados com fork no init_app, que o app.py chama logo
+# após carregar a configuração, antes de o servidor ou o app abrirem outras threads
+# (fork de um processo com várias threads pode herdar locks presos). Com spawn ou
+# forkserver cada processo importaria de novo o módulo principal (o app.py inteiro em
+# "python app.py"). Em servidores com pré-fork, não carregue o app antes do fork
+# (ex.: sem --preload no gunicorn): cada worker cria o seu pool ao importar o app.
+
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+import multiprocessing
+import os
+import threading
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+class PasswordHasherBusyError(Exception):
+    def __init__(self, retry_after=1):
+        super().__init__('Pool de hash de senhas ocupado')
+        self.retry_after = retry_after
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+def _verify(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+def _ready():
+    return True
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.salt_length = 16
+        self.workers = 0
+        self.max_pending = 0
+        self.timeout_seconds = None
+        self.retry_after = 1
+        self._method_prefix = None
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._pending = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', 16)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', 32)
+        self.timeout_seconds = app.config.get('PASSWORD_HASH_TIMEOUT_SECONDS') or None
+        self.retry_after = app.config.get('PASSWORD_HASH_RETRY_AFTER_SECONDS', 1)
+        self._method_prefix = None
+        self._pending = threading.BoundedSemaphore(self.max_pending) if self.max_pending > 0 else None
+        app.extensions['password_hasher'] = self
+        if self.workers > 0:
+            self.start()
+
+    def start(self):
+        # Cria o pool e dispara os processos agora: com fork, o ProcessPoolExecutor cria
+        # todos os processos no primeiro submit, antes da sua thread de gerenciamento
+        executor = self._get_executor()
+        executor.submit(_ready).result()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid != os.getpid():
+                # Pool herdado de um fork do processo que o criou: não funciona aqui
+                print("AVISO: pool de hash de senhas criado antes do fork do servidor; recriando neste processo.")
+                self._executor = None
+            if self._executor is None:
+                context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _release(self, future):
+        self._pending.release()
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        if self._pending is not None and not self._pending.acquire(blocking=False):
+            raise PasswordHasherBusyError(self.retry_after)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            if self._pending is not None:
+                self._pending.release()
+            raise
+        if self._pending is not None:
+            # A vaga só volta quando o hash termina no pool, mesmo que este request desista antes
+            future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            raise PasswordHasherBusyError(self.retry_after)
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(_verify, password_hash, password)
+
+    @property
+    def method_prefix(self):
+        # O werkzeug completa o método com os custos padrão ('pbkdf2' -> 'pbkdf2:sha256:1000000');
+        # o prefixo gravado no hash é a forma canônica de comparar parâmetros
+        if self._method_prefix is None:
+            self._method_prefix = _hash('', self.method, self.salt_length).split('$', 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, password_hash):
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method_prefix or len(salt) != self.salt_length
+
+    def shutdown(self, wait=True):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Templates de prompt compilados e em cache.
+#
+# Cada template nomeado (um por modo de jogo) é lido e compilado uma única vez e
+# só é recarregado quando o mtime do arquivo muda. O prompt renderizado também é
+# memorizado (LRU) pela combinação template + versão + campos de configuração do
+# chat, então chats ativos não renderizam de novo um prompt idêntico a cada turno.
+
+from collections import OrderedDict
+import os
+import threading
+
+class PromptTemplateRegistry:
+    def __init__(self, jinja_env, templates, render_cache_size=512):
+        self._jinja_env = jinja_env
+        self._paths = dict(templates)
+        self._compiled = {} # nome -> (mtime, template compilado)
+        self._rendered = OrderedDict() # (nome, mtime, contexto) -> texto
+        self._render_cache_size = render_cache_size
+        self._lock = threading.Lock()
+
+    def register(self, name, path):
+        with self._lock:
+            self._paths[name] = path
+            self._compiled.pop(name, None)
+
+    def names(self):
+        return list(self._paths)
+
+    def _get_compiled(self, name):
+        # Levanta KeyError para template desconhecido e FileNotFoundError se o arquivo sumir
+        path = self._paths[name]
+        mtime = os.stat(path).st_mtime_ns
+
+        cached = self._compiled.get(name)
+        if cached and cached[0] == mtime:
+            return cached
+
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        compiled = (mtime, self._jinja_env.from_string(source))
+        with self._lock:
+            self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name, context):
+        mtime, template = self._get_compiled(name)
+        key = (name, mtime, tuple(sorted(context.items())))
+
+        with self._lock:
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self._rendered.move_to_end(key)
+                return rendered
+
+        rendered = template.render(**context)
+
+        with self._lock:
+            self._rendered[key] = rendered
+            self._rendered.move_to_end(key)
+            while len(self._rendered) > self._render_cache_size:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+            self._rendered.clear()
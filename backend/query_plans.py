@@ -0,0 +1,69 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Verificação de planos de consulta (SQLite EXPLAIN QUERY PLAN).
+#
+# Reproduz as consultas dos caminhos quentes da API e falha se alguma delas cair
+# em varredura completa de tabela. Rodar com: flask check-query-plans
+# (--scratch usa um banco em memória criado a partir dos modelos).
+
+from sqlalchemy import func, select, tuple_
+from models import User, Chat, Message
+
+def hot_queries():
+    # Consultas equivalentes às feitas pelas rotas; os valores dos parâmetros não importam
+    return {
+        'login (usuário por username)':
+            select(User).where(User.username == 'jogador'),
+        'get_user_chats':
+            select(Chat).where(Chat.user_id == 1).order_by(Chat.last_accessed_at.desc()),
+        'get_user_chats (visão resumida com keyset)':
+            select(Chat.id, Chat.title, Chat.status).where(
+                Chat.user_id == 1, tuple_(Chat.last_accessed_at, Chat.id) < ('2025-01-01 00:00:00', 10)
+            ).order_by(Chat.last_accessed_at.desc(), Chat.id.desc()).limit(51),
+        'get_user_chats (ETag)':
+            select(func.count(Chat.id), func.max(Chat.updated_at), func.max(Chat.id)).where(Chat.user_id == 1),
+        'get_last_used_age':
+            select(Chat).where(Chat.user_id == 1, Chat.age.isnot(None)).order_by(Chat.created_at.desc()).limit(1),
+        'get_chat_details (Chat.messages)':
+            select(Message).where(Message.chat_id == 1).order_by(Message.timestamp.asc()),
+        'get_chat_details (página before_id)':
+            select(Message).where(Message.chat_id == 1, Message.id < 100).order_by(Message.id.desc()).limit(51),
+        'get_chat_details (delta since_id)':
+            select(Message).where(Message.chat_id == 1, Message.id > 100).order_by(Message.id.asc()).limit(51),
+        'send_message_to_chat (janela de histórico)':
+            select(Message.id, Message.sender, Message.content)
+            .where(Message.chat_id == 1, Message.id > 1).order_by(Message.id.asc()),
+        'send_message_to_chat (primeira mensagem do usuário)':
+            select(Message.id).where(Message.chat_id == 1, Message.sender == 'user').limit(1),
+    }
+
+def explain_query_plan(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).fetchall()
+    return [row[-1] for row in rows]
+
+def is_full_scan(detail):
+    # "SEARCH ..." usa índice; "SCAN <tabela>" (mesmo "USING INDEX") percorre tudo
+    return detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail and 'CONSTANT ROW' not in detail
+
+def check_query_plans(engine, queries=None):
+    # Retorna {nome: (plano, ok)}
+    results = {}
+    with engine.connect() as connection:
+        for name, statement in (queries or hot_queries()).items():
+            plan = explain_query_plan(connection, statement)
+            results[name] = (plan, not any(is_full_scan(detail) for detail in plan))
+    return results
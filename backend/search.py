@@ -0,0 +1,162 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Busca textual nos chats e mensagens de um usuário (SQLite FTS5).
+#
+# Dois índices FTS5 de conteúdo externo: message_fts (Message.content) e chat_fts
+# (Chat.title, inspiracao e observations). Triggers mantêm os índices a cada
+# INSERT/UPDATE/DELETE, inclusive nas exclusões em cascata e no arquivo de
+# transcrições (mensagens arquivadas saem do índice e voltam no restore). Os
+# índices são criados pela migração ou, em bancos criados com db.create_all(), por
+# install_search_schema; "flask rebuild-search-index" reconstrói a partir dos dados.
+#
+# Em outros bancos a busca não está disponível (a rota responde 501).
+
+from datetime import datetime
+from sqlalchemy import event, text
+import html
+import re
+
+# O snippet() marca os termos com caracteres de controle; o trecho é escapado como
+# HTML e só então os marcadores viram <mark>, então o texto do usuário nunca chega
+# como HTML
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+MARK_START = '<mark>'
+MARK_END = '</mark>'
+SNIPPET_TOKENS = 12
+MAX_QUERY_TERMS = 8
+
+SEARCH_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5(
+        content, content='message', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_ai AFTER INSERT ON message BEGIN
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_ad AFTER DELETE ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_au AFTER UPDATE OF content ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5(
+        title, inspiracao, observations, content='chat', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ai AFTER INSERT ON chat BEGIN
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_ad AFTER DELETE ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_fts_au AFTER UPDATE OF title, inspiracao, observations ON chat BEGIN
+        INSERT INTO chat_fts(chat_fts, rowid, title, inspiracao, observations)
+        VALUES ('delete', old.id, old.title, old.inspiracao, old.observations);
+        INSERT INTO chat_fts(rowid, title, inspiracao, observations)
+        VALUES (new.id, new.title, new.inspiracao, new.observations);
+    END""",
+]
+
+# Chats e mensagens são buscados em listas separadas, cada uma com o seu ranking
+# (bm25: menor = mais relevante); os valores de bm25 de índices diferentes não são
+# comparáveis. No chat, o título pesa mais que inspiração e observações.
+CHAT_SEARCH_QUERY = f"""
+    SELECT chat.id AS chat_id, chat.title AS chat_title,
+           snippet(chat_fts, -1, :start, :end, '…', {SNIPPET_TOKENS}) AS snippet,
+           chat.last_accessed_at AS timestamp
+    FROM chat_fts JOIN chat ON chat.id = chat_fts.rowid
+    WHERE chat_fts MATCH :query AND chat.user_id = :user_id
+    ORDER BY bm25(chat_fts, 5.0, 1.0, 1.0), chat.last_accessed_at DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+MESSAGE_SEARCH_QUERY = f"""
+    SELECT message.chat_id, message.id AS message_id, chat.title AS chat_title, message.sender,
+           snippet(message_fts, 0, :start, :end, '…', {SNIPPET_TOKENS}) AS snippet,
+           message.timestamp
+    FROM message_fts
+    JOIN message ON message.id = message_fts.rowid
+    JOIN chat ON chat.id = message.chat_id
+    WHERE message_fts MATCH :query AND chat.user_id = :user_id
+    ORDER BY bm25(message_fts), message.timestamp DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+def search_supported(engine):
+    return engine.dialect.name == 'sqlite'
+
+def install_search_schema(connection):
+    for statement in SEARCH_SCHEMA:
+        connection.exec_driver_sql(statement)
+
+def rebuild_search_index(connection):
+    install_search_schema(connection)
+    connection.exec_driver_sql("INSERT INTO message_fts(message_fts) VALUES ('rebuild')")
+    connection.exec_driver_sql("INSERT INTO chat_fts(chat_fts) VALUES ('rebuild')")
+
+def register_search_schema(metadata):
+    # Cria os índices junto com as tabelas em db.create_all()
+    @event.listens_for(metadata, 'after_create')
+    def create_search_schema(target, connection, **kwargs):
+        if search_supported(connection):
+            install_search_schema(connection)
+
+def build_match_query(raw):
+    # Cada palavra vira um termo entre aspas com prefixo ("drag" encontra "dragão");
+    # operadores e aspas digitados pelo usuário não chegam ao FTS5
+    terms = re.findall(r'\w+', raw or '')[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def format_timestamp(value):
+    # Consultas em SQL puro devolvem o texto gravado pelo SQLite; mesmo formato do to_dict
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.isoformat() if value is not None else None
+
+def highlight_snippet(value):
+    if value is None:
+        return None
+    return html.escape(value).replace(SNIPPET_START, MARK_START).replace(SNIPPET_END, MARK_END)
+
+def _search(session, query, user_id, match_query, limit, offset):
+    # Busca limit + 1 para saber se há mais
+    rows = session.execute(text(query), {
+        'query': match_query, 'user_id': user_id, 'start': SNIPPET_START, 'end': SNIPPET_END,
+        'limit': limit + 1, 'offset': offset,
+    }).mappings().all()
+    return rows[:limit], len(rows) > limit
+
+def search_chats(session, user_id, match_query, limit, offset):
+    # Retorna (resultados, has_more)
+    rows, has_more = _search(session, CHAT_SEARCH_QUERY, user_id, match_query, limit, offset)
+    return [{
+        'chat_id': row['chat_id'],
+        'chat_title': row['chat_title'],
+        'snippet': highlight_snippet(row['snippet']),
+        'timestamp': format_timestamp(row['timestamp']),
+    } for row in rows], has_more
+
+def search_messages(session, user_id, match_query, limit, offset):
+    # Retorna (resultados, has_more)
+    rows, has_more = _search(session, MESSAGE_SEARCH_QUERY, user_id, match_query, limit, offset)
+    return [{
+        'chat_id': row['chat_id'],
+        'message_id': row['message_id'],
+        'chat_title': row['chat_title'],
+        'sender': row['sender'],
+        'snippet': highlight_snippet(row['snippet']),
+        'timestamp': format_timestamp(row['timestamp']),
+    } for row in rows], has_more
@@ -0,0 +1,165 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Instrumentação de SQL por requisição (opcional, SQL_INSTRUMENTATION_ENABLED).
+#
+# Usa os eventos before/after_cursor_execute do SQLAlchemy e os hooks de request
+# do Flask para registrar, por rota: número de comandos, tempo total no banco e os
+# comandos mais lentos. Cada resposta recebe o cabeçalho Server-Timing; o agregado
+# vai para /metrics (Prometheus) e /metrics/sql (JSON). O mesmo comando executado
+# no mesmo request com SQL_N_PLUS_ONE_THRESHOLD ou mais conjuntos diferentes de
+# parâmetros (uma consulta por item de uma lista) é sinalizado como provável N+1 no
+# log do app; repetições com os mesmos parâmetros não contam.
+
+from collections import Counter as StatementCounter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+import threading
+import time
+
+class RequestSQLStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements = StatementCounter()
+        self.parameters = {} # comando -> hashes dos parâmetros distintos
+        self.slowest = [] # (segundos, comando)
+
+class SQLInstrumentation:
+    def __init__(self, db, registry, app=None):
+        self._db = db
+        self._lock = threading.Lock()
+        self._routes = {} # rota -> agregado
+        self.enabled = False
+        self.slowest_per_route = 5
+        self.n_plus_one_threshold = 3
+        self._queries = registry.counter(
+            'jogai_sql_queries_total', 'Comandos SQL executados, por rota.', ('route',))
+        self._duration = registry.counter(
+            'jogai_sql_duration_seconds_total', 'Tempo total gasto no banco, por rota.', ('route',))
+        self._queries_per_request = registry.histogram(
+            'jogai_sql_queries_per_request', 'Comandos SQL por requisição, por rota.', ('route',),
+            buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+        self._n_plus_one = registry.counter(
+            'jogai_sql_n_plus_one_total', 'Requisições com o mesmo comando repetido com parâmetros diferentes (provável N+1).', ('route',))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_INSTRUMENTATION_ENABLED', False)
+        self.slowest_per_route = app.config.get('SQL_SLOWEST_STATEMENTS_PER_ROUTE', 5)
+        self.n_plus_one_threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 3)
+        app.extensions['sql_instrumentation'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = self._db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # O início fica no contexto de execução do próprio comando: quando ele falha,
+        # after_cursor_execute não roda e nada sobra na conexão para os próximos
+        if context is not None:
+            context._jogai_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_jogai_query_started', None)
+        # Consultas de threads de segundo plano não pertencem a nenhum request
+        if started is None or not has_request_context():
+            return
+        stats = g.get('sql_stats')
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats.count += 1
+        stats.total_seconds += elapsed
+        stats.statements[statement] += 1
+        stats.parameters.setdefault(statement, set()).add(hash(repr(parameters)))
+        stats.slowest.append((elapsed, statement))
+        stats.slowest.sort(key=lambda item: item[0], reverse=True)
+        del stats.slowest[self.slowest_per_route:]
+
+    def _start_request(self):
+        g.sql_stats = RequestSQLStats()
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        route = f"{request.method} {request.url_rule.rule}" if request.url_rule else 'não mapeada'
+        repeated = {statement: count for statement, count in stats.statements.items()
+                    if len(stats.parameters[statement]) >= self.n_plus_one_threshold}
+
+        timing = f'db;dur={stats.total_seconds * 1000:.2f};desc="{stats.count} queries"'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        if repeated:
+            response.headers['X-SQL-N-Plus-One'] = str(len(repeated))
+            current_app.logger.warning("Provável N+1 em %s: %s", route, "; ".join(
+                f"{count}x ({len(stats.parameters[statement])} parâmetros distintos) {statement.splitlines()[0][:120]}"
+                for statement, count in repeated.items()))
+
+        self._record(route, stats, repeated)
+        return response
+
+    def _record(self, route, stats, repeated):
+        self._queries.inc(stats.count, route=route)
+        self._duration.inc(stats.total_seconds, route=route)
+        self._queries_per_request.observe(stats.count, route=route)
+        if repeated:
+            self._n_plus_one.inc(route=route)
+
+        with self._lock:
+            aggregate = self._routes.setdefault(route, {
+                'requests': 0, 'queries': 0, 'db_seconds': 0.0, 'max_queries': 0,
+                'slowest': [], 'n_plus_one_requests': 0, 'n_plus_one_statements': {},
+            })
+            aggregate['requests'] += 1
+            aggregate['queries'] += stats.count
+            aggregate['db_seconds'] += stats.total_seconds
+            aggregate['max_queries'] = max(aggregate['max_queries'], stats.count)
+            aggregate['slowest'] = sorted(aggregate['slowest'] + stats.slowest,
+                                          key=lambda item: item[0], reverse=True)[:self.slowest_per_route]
+            if repeated:
+                aggregate['n_plus_one_requests'] += 1
+                for statement, count in repeated.items():
+                    previous = aggregate['n_plus_one_statements'].get(statement, 0)
+                    aggregate['n_plus_one_statements'][statement] = max(previous, count)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, aggregate in self._routes.items():
+                requests = aggregate['requests']
+                routes[route] = {
+                    'requests': requests,
+                    'queries_per_request': round(aggregate['queries'] / requests, 2),
+                    'max_queries': aggregate['max_queries'],
+                    'db_ms_per_request': round(aggregate['db_seconds'] * 1000 / requests, 3),
+                    'slowest_statements': [
+                        {'ms': round(seconds * 1000, 3), 'statement': statement}
+                        for seconds, statement in aggregate['slowest']
+                    ],
+                    'n_plus_one_requests': aggregate['n_plus_one_requests'],
+                    'n_plus_one_statements': [
+                        {'max_repetitions': count, 'statement': statement}
+                        for statement, count in aggregate['n_plus_one_statements'].items()
+                    ],
+                }
+        return routes
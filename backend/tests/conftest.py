@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Fixtures dos testes da API (pytest, a partir de backend/: python -m pytest -q).
+#
+# O app lê a configuração do ambiente na importação, então as variáveis abaixo são
+# definidas antes do "import app": banco SQLite temporário, LLM fake sem latência,
+# tarefas em segundo plano e hash de senhas na própria thread.
+
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = tempfile.mkdtemp(prefix='jogai-tests-')
+
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}",
+    'DATABASE_SELF_CHECK': '0',
+    'SECRET_KEY': 'jogai-test-secret-key',
+    'LLM_PROVIDER': 'fake',
+    'FAKE_LLM_LATENCY_DISTRIBUTION': 'fixed',
+    'FAKE_LLM_LATENCY_MS': '0',
+    'FAKE_LLM_TOKENS_PER_SECOND': '0',
+    'FAKE_LLM_RESPONSE_TOKENS': '20',
+    'FAKE_LLM_SEED': '42',
+    'LLM_MAX_RETRIES': '0',
+    'LLM_CACHE_ENABLED': '0',
+    'BACKGROUND_WORKERS': '0',
+    'PASSWORD_HASH_WORKERS': '0',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'ACCESS_FLUSH_INTERVAL_SECONDS': '3600',
+    'ARCHIVE_COMPACTOR_INTERVAL_SECONDS': '0',
+})
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest
+import app as app_module
+
+PASSWORD = 'senha-teste'
+
+@pytest.fixture(scope='session', autouse=True)
+def database():
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    yield
+    with app_module.app.app_context():
+        app_module.db.session.remove()
+        app_module.db.engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    yield
+    with app_module.app.app_context():
+        # Acessos pendentes vão para o banco antes de as linhas serem apagadas
+        app_module.access_recorder.flush()
+        # Os triggers mantêm os índices da busca em sincronia com as exclusões
+        for table in reversed(app_module.db.metadata.sorted_tables):
+            app_module.db.session.execute(table.delete())
+        app_module.db.session.commit()
+    app_module.chat_sessions.clear()
+    app_module.token_auth.chat_owners.clear()
+    app_module.token_auth.token_versions.clear()
+
+@pytest.fixture
+def app():
+    return app_module
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+def auth_headers(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def register(client, username, password=PASSWORD):
+    response = client.post('/api/register', json={'username': username, 'password': password})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['user_id']
+
+def login(client, username, password=PASSWORD):
+    response = client.post('/api/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return auth_headers(response.get_json()['access_token'])
+
+def create_chat(client, user_id, headers, **fields):
+    data = {'user_id': user_id, 'universo': 'Fantasia', 'genero': 'Aventura', 'age': 12}
+    data.update(fields)
+    response = client.post('/api/chats', json=data, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['id']
+
+@pytest.fixture
+def user(client):
+    # (user_id, headers) de um usuário já autenticado
+    user_id = register(client, 'jogador')
+    return user_id, login(client, 'jogador')
+
+@pytest.fixture
+def other_user(client):
+    user_id = register(client, 'outro')
+    return user_id, login(client, 'outro')
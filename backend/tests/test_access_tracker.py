@@ -0,0 +1,46 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Último acesso gravado em lote: a lista de chats já considera os acessos pendentes
+
+from conftest import create_chat
+
+def test_opened_chat_is_listed_first(app, client, user):
+    user_id, headers = user
+    older = create_chat(client, user_id, headers)
+    newer = create_chat(client, user_id, headers)
+
+    listing = client.get(f'/api/chats/{user_id}', headers=headers)
+    summary = client.get(f'/api/chats/{user_id}?view=summary&limit=1', headers=headers)
+    assert listing.get_json()[0]['id'] == newer
+
+    assert client.get(f'/api/chat/{older}', headers=headers).status_code == 200
+    assert app.access_recorder.pending_for_user(user_id)
+
+    reopened = client.get(f'/api/chats/{user_id}', headers={**headers, 'If-None-Match': listing.headers['ETag']})
+    assert reopened.status_code == 200
+    assert [chat['id'] for chat in reopened.get_json()] == [older, newer]
+
+    first_page = client.get(f'/api/chats/{user_id}?view=summary&limit=1',
+                            headers={**headers, 'If-None-Match': summary.headers['ETag']})
+    assert first_page.status_code == 200
+    page = first_page.get_json()
+    assert [chat['id'] for chat in page['chats']] == [older]
+    second_page = client.get(f"/api/chats/{user_id}?view=summary&limit=1&cursor={page['next_cursor']}", headers=headers)
+    assert [chat['id'] for chat in second_page.get_json()['chats']] == [newer]
+
+    # Depois da gravação em lote a ordem vem do banco e continua a mesma
+    with app.app.app_context():
+        app.access_recorder.flush()
+    assert [chat['id'] for chat in client.get(f'/api/chats/{user_id}', headers=headers).get_json()] == [older, newer]
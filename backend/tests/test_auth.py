@@ -0,0 +1,51 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Autenticação por token e propriedade dos chats
+
+from conftest import PASSWORD, create_chat, login
+
+def test_routes_require_token(client, user):
+    user_id, _ = user
+    assert client.get(f'/api/chats/{user_id}').status_code == 401
+    assert client.get(f'/api/chats/{user_id}', headers={'Authorization': 'Bearer invalido'}).status_code == 401
+
+def test_chat_of_another_user_is_forbidden(client, user, other_user):
+    user_id, headers = user
+    other_id, other_headers = other_user
+    chat_id = create_chat(client, user_id, headers)
+
+    assert client.get(f'/api/chat/{chat_id}', headers=other_headers).status_code == 403
+    assert client.patch(f'/api/chat/{chat_id}', json={'title': 'X'}, headers=other_headers).status_code == 403
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'oi'},
+                       headers=other_headers).status_code == 403
+    assert client.get(f'/api/chats/{user_id}', headers=other_headers).status_code == 403
+    assert client.post('/api/chats', json={'user_id': user_id, 'universo': 'Fantasia', 'genero': 'Aventura'},
+                       headers=other_headers).status_code == 403
+    assert client.get(f'/api/chat/{chat_id}', headers=headers).status_code == 200
+
+def test_missing_chat_is_not_found(client, user):
+    _, headers = user
+    assert client.get('/api/chat/999999', headers=headers).status_code == 404
+
+def test_password_change_revokes_previous_tokens(client, user):
+    user_id, headers = user
+    response = client.put('/api/user/change-password', headers=headers, json={
+        'user_id': user_id, 'current_password': PASSWORD, 'new_password': 'nova-senha'})
+    assert response.status_code == 200
+    new_headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    assert client.get(f'/api/chats/{user_id}', headers=headers).status_code == 401
+    assert client.get(f'/api/chats/{user_id}', headers=new_headers).status_code == 200
+    assert client.get(f'/api/chats/{user_id}', headers=login(client, 'jogador', 'nova-senha')).status_code == 200
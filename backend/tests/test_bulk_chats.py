@@ -0,0 +1,40 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Ações em lote nos chats
+
+from conftest import create_chat
+
+def test_bulk_actions_only_touch_own_chats(app, client, user, other_user):
+    user_id, headers = user
+    other_id, other_headers = other_user
+    own = [create_chat(client, user_id, headers) for _ in range(2)]
+    foreign = create_chat(client, other_id, other_headers)
+
+    response = client.post('/api/chats/bulk', json={'action': 'archive', 'chat_ids': own + [foreign]},
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['chat_ids'] == sorted(own)
+    assert response.get_json()['not_found'] == [foreign]
+    statuses = {chat['id']: chat['status'] for chat in client.get(f'/api/chats/{user_id}', headers=headers).get_json()}
+    assert statuses == {chat_id: 'archived' for chat_id in own}
+
+    response = client.post('/api/chats/bulk', json={'action': 'delete', 'chat_ids': own + [foreign]},
+                           headers=headers)
+    assert response.get_json()['chat_ids'] == sorted(own)
+    assert client.get(f'/api/chats/{user_id}', headers=headers).get_json() == []
+    assert client.get(f'/api/chat/{foreign}', headers=other_headers).get_json()['status'] == 'new'
+
+    assert client.post('/api/chats/bulk', json={'action': 'apagar', 'chat_ids': own},
+                       headers=headers).status_code == 400
@@ -0,0 +1,59 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Lista de chats: visão resumida com cursor e ETag
+
+from conftest import create_chat
+
+def test_chat_list_summary_cursor(client, user):
+    user_id, headers = user
+    chat_ids = {create_chat(client, user_id, headers) for _ in range(5)}
+
+    seen = []
+    url = f'/api/chats/{user_id}?view=summary&limit=2'
+    while url:
+        page = client.get(url, headers=headers).get_json()
+        seen.extend(chat['id'] for chat in page['chats'])
+        url = f"/api/chats/{user_id}?view=summary&limit=2&cursor={page['next_cursor']}" if page['next_cursor'] else None
+    assert len(seen) == len(chat_ids) and set(seen) == chat_ids
+
+def test_chat_list_etag(client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+
+    response = client.get(f'/api/chats/{user_id}', headers=headers)
+    etag = response.headers['ETag']
+    cached = client.get(f'/api/chats/{user_id}', headers={**headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    assert client.patch(f'/api/chat/{chat_id}', json={'observations': 'nova'}, headers=headers).status_code == 200
+    changed = client.get(f'/api/chats/{user_id}', headers={**headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()[0]['observations'] == 'nova'
+
+def test_chat_list_etag_changes_on_every_chat_update(client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    updates = [
+        lambda: client.put(f'/api/chat/{chat_id}/color', json={'color': '#112233'}, headers=headers),
+        lambda: client.put(f'/api/chat/{chat_id}/status', json={'status': 'finished'}, headers=headers),
+        lambda: client.post('/api/chats/bulk', json={'action': 'archive', 'chat_ids': [chat_id]}, headers=headers),
+    ]
+    etag = client.get(f'/api/chats/{user_id}?view=summary', headers=headers).headers['ETag']
+    for update in updates:
+        assert update().status_code == 200
+        response = client.get(f'/api/chats/{user_id}?view=summary', headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
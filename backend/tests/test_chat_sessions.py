@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Cache de sessões de chat entre turnos consecutivos
+
+from chat_sessions import ChatSession, ChatSessionCache
+from conftest import create_chat
+from context_window import HistoryWindow, WindowMessage
+from metrics import MetricsRegistry
+
+def make_session(chat_id, content='texto'):
+    window = HistoryWindow(None, 0, [WindowMessage(1, 'gemini', content)])
+    return ChatSession(chat_id, window, [{'role': 'user', 'parts': ['cenário']}], has_user_message=False)
+
+def test_checkout_requires_matching_fingerprint_and_messages():
+    cache = ChatSessionCache(MetricsRegistry())
+    cache.store(make_session(1), 'f1')
+    assert cache.checkout(1, 'f1', message_count=1, last_message_id=1) is not None
+    assert cache.checkout(1, 'f1', 1, 1) is None # Retirada pelo checkout anterior
+
+    cache.store(make_session(1), 'f1')
+    assert cache.checkout(1, 'f2', 1, 1) is None
+    cache.store(make_session(1), 'f1')
+    assert cache.checkout(1, 'f1', 2, 5) is None
+
+def test_least_recently_used_sessions_are_evicted_by_size():
+    session_size = make_session(1, 'x' * 1000).size
+    cache = ChatSessionCache(MetricsRegistry(), max_bytes=2 * session_size)
+    for chat_id in (1, 2, 3):
+        cache.store(make_session(chat_id, 'x' * 1000), 'f')
+    assert cache.checkout(1, 'f', 1, 1) is None
+    assert cache.checkout(2, 'f', 1, 1) is not None
+    assert cache.checkout(3, 'f', 1, 1) is not None
+
+def count_calls(monkeypatch, module, name):
+    calls = []
+    original = getattr(module, name)
+    def wrapper(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(module, name, wrapper)
+    return calls
+
+def test_consecutive_turns_reuse_the_session(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    loads = count_calls(monkeypatch, app, 'load_history_window')
+    renders = count_calls(monkeypatch, app, 'build_scenario_entries')
+
+    for message in ('primeiro', 'segundo', 'terceiro'):
+        assert client.post(f'/api/chat/{chat_id}/message', json={'message': message}, headers=headers).status_code == 200
+    assert len(loads) == 1 and len(renders) == 1
+
+    # Mudar o chat invalida a sessão; o próximo turno a reconstrói a partir do banco
+    client.put(f'/api/chat/{chat_id}/status', json={'status': 'started'}, headers=headers)
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'quarto'}, headers=headers).status_code == 200
+    assert len(loads) == 2
+
+def test_message_written_elsewhere_makes_the_session_stale(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'primeiro'}, headers=headers).status_code == 200
+    with app.app.app_context():
+        app.db.session.add(app.Message(chat_id=chat_id, sender='user', content='de outro worker'))
+        app.db.session.commit()
+
+    histories = []
+    generate = app.llm.generate
+    monkeypatch.setattr(app.llm, 'generate',
+                        lambda prompt, **kwargs: histories.append(kwargs.get('history')) or generate(prompt, **kwargs))
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'segundo'}, headers=headers).status_code == 200
+    assert 'de outro worker' in [part for entry in histories[-1] for part in entry['parts']]
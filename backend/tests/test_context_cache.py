@@ -0,0 +1,74 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Context caching do provedor: contexto perdido refaz o turno com o histórico completo
+
+from conftest import create_chat
+import pytest
+
+def metric_value(client, name):
+    for line in client.get('/metrics').get_data(as_text=True).splitlines():
+        if line.startswith(name + ' '):
+            return float(line.split()[1])
+    return 0.0
+
+@pytest.mark.parametrize('route', ['message', 'message/stream'])
+def test_turn_retries_without_evicted_cached_context(app, client, user, monkeypatch, route):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    monkeypatch.setattr(app.context_cache, 'enabled', True)
+    monkeypatch.setattr(app.context_cache, 'min_tokens', 1)
+
+    prepare = app.context_cache.prepare
+    def prepare_then_evict(session):
+        # O provedor perde o contexto logo depois de o turno ser preparado com ele
+        result = prepare(session)
+        app.llm._cached_contexts.clear()
+        return result
+    monkeypatch.setattr(app.context_cache, 'prepare', prepare_then_evict)
+
+    evictions = metric_value(client, 'jogai_context_cache_evictions_total')
+    response = client.post(f'/api/chat/{chat_id}/{route}', json={'message': 'sigo em frente'}, headers=headers)
+    assert response.status_code == 200
+    if route == 'message/stream':
+        assert 'event: done' in response.get_data(as_text=True)
+    assert metric_value(client, 'jogai_context_cache_evictions_total') == evictions + 1
+    assert len(client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']) == 3
+
+def test_failed_cached_context_creation_backs_off(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    monkeypatch.setattr(app.context_cache, 'enabled', True)
+    monkeypatch.setattr(app.context_cache, 'min_tokens', 1)
+    monkeypatch.setattr(app.context_cache, '_failures', {})
+
+    attempts = []
+    def failing_create(history, ttl_seconds):
+        attempts.append(len(history))
+        raise RuntimeError('conteúdo abaixo do mínimo do modelo')
+    monkeypatch.setattr(app.llm, 'create_cached_context', failing_create)
+
+    for message in ('primeiro turno', 'segundo turno'):
+        response = client.post(f'/api/chat/{chat_id}/message', json={'message': message}, headers=headers)
+        assert response.status_code == 200
+    # O segundo turno não repete a criação síncrona que acabou de falhar
+    assert len(attempts) == 1
+    assert metric_value(client, 'jogai_context_cache_turns_total{result="backoff"}') >= 1
+
+    # Vencida a espera, tenta de novo
+    prefix, failures, _ = app.context_cache._failures[chat_id]
+    app.context_cache._failures[chat_id] = (prefix, failures, 0)
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'terceiro turno'}, headers=headers).status_code == 200
+    assert len(attempts) == 2
+    assert app.context_cache._failures[chat_id][1] == 2
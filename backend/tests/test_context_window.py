@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Janela de histórico com orçamento de tokens e resumo contínuo
+
+from types import SimpleNamespace
+from conftest import create_chat
+from context_window import HistoryWindow, WindowMessage, fold_history_window, select_messages_to_fold
+
+def make_window(count, words=40, summary=None):
+    return HistoryWindow(summary, 0, [
+        WindowMessage(index + 1, 'user' if index % 2 else 'gemini', 'palavra ' * words) for index in range(count)])
+
+def test_nothing_is_folded_within_budget():
+    window = make_window(4, words=5)
+    assert select_messages_to_fold(window, token_budget=1000, min_recent_messages=2) == 0
+
+def test_fold_keeps_recent_messages_and_halves_the_window():
+    window = make_window(10) # 80 tokens por mensagem
+    count = select_messages_to_fold(window, token_budget=400, min_recent_messages=2)
+    assert 0 < count <= 8
+    assert window.tokens - sum(80 for _ in range(count)) <= 200
+
+    chat = SimpleNamespace(id=1, history_summary=None, summarized_until_id=None)
+    prompts = []
+    assert fold_history_window(chat, window, lambda prompt: prompts.append(prompt) or 'Resumo novo', 400, 2)
+    assert chat.history_summary == window.summary == 'Resumo novo'
+    assert chat.summarized_until_id == window.summarized_until_id == count
+    assert [message.id for message in window.messages] == list(range(count + 1, 11))
+    assert 'Novos eventos' in prompts[0]
+
+def test_failed_summary_keeps_the_window():
+    window = make_window(10)
+    chat = SimpleNamespace(id=1, history_summary=None, summarized_until_id=None)
+
+    def failing_summary(prompt):
+        raise RuntimeError('modelo indisponível')
+    assert not fold_history_window(chat, window, failing_summary, 400, 2)
+    assert len(window.messages) == 10 and chat.summarized_until_id is None
+
+def test_turn_sends_summary_instead_of_old_messages(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    with app.app.app_context():
+        for index in range(8):
+            app.db.session.add(app.Message(chat_id=chat_id, sender='user' if index % 2 else 'gemini',
+                                           content=f'evento {index} ' + 'detalhe ' * 40))
+        app.db.session.commit()
+    monkeypatch.setattr(app.Config, 'CHAT_HISTORY_TOKEN_BUDGET', 300)
+    monkeypatch.setattr(app.Config, 'CHAT_HISTORY_MIN_RECENT_MESSAGES', 2)
+
+    calls = []
+    generate = app.llm.generate
+    def recording_generate(prompt, **kwargs):
+        calls.append((kwargs.get('call_type'), kwargs.get('history')))
+        return generate(prompt, **kwargs)
+    monkeypatch.setattr(app.llm, 'generate', recording_generate)
+
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'e agora?'}, headers=headers).status_code == 200
+    assert [call_type for call_type, _ in calls] == ['summary', 'turn']
+    with app.app.app_context():
+        chat = app.db.session.get(app.Chat, chat_id)
+        assert chat.history_summary and chat.summarized_until_id
+    history_text = ' '.join(part for entry in calls[1][1] for part in entry['parts'])
+    assert 'evento 0 ' not in history_text
+    assert chat.history_summary in history_text
@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Introdução do chat gerada em segundo plano: uma só vez, com backoff após falhas
+
+from datetime import datetime, timedelta, timezone
+from conftest import create_chat
+from llm import LLMError
+
+def load_chat(app, chat_id):
+    with app.app.app_context():
+        chat = app.db.session.get(app.Chat, chat_id)
+        app.db.session.expunge(chat)
+        return chat
+
+def test_intro_is_generated_once(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    details = client.get(f'/api/chat/{chat_id}', headers=headers).get_json()
+    assert details['intro_status'] == 'ready'
+    assert [message['sender'] for message in details['messages']] == ['gemini']
+
+    calls = []
+    generate = app.llm.generate
+    monkeypatch.setattr(app.llm, 'generate', lambda *args, **kwargs: calls.append(1) or generate(*args, **kwargs))
+    with app.app.app_context():
+        app.generate_chat_intro(chat_id)
+        # Outra tentativa em andamento (outro processo): esta não chama o modelo
+        app.db.session.execute(app.update(app.Chat).where(app.Chat.id == chat_id).values(
+            intro_status='generating', intro_started_at=datetime.now(timezone.utc)))
+        app.db.session.commit()
+        app.generate_chat_intro(chat_id)
+    assert calls == []
+    assert len(client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']) == 1
+
+def test_failed_intro_waits_for_backoff(app, client, user, monkeypatch):
+    user_id, headers = user
+
+    def failing_generate(*args, **kwargs):
+        raise LLMError('falha simulada', status_code=500)
+    monkeypatch.setattr(app.llm, 'generate', failing_generate)
+    chat_id = create_chat(client, user_id, headers)
+    chat = load_chat(app, chat_id)
+    assert (chat.intro_status, chat.intro_attempts) == ('failed', 1)
+
+    monkeypatch.undo()
+    # Ainda dentro do backoff: o GET não dispara outra tentativa
+    assert client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages'] == []
+    assert load_chat(app, chat_id).intro_attempts == 1
+
+    with app.app.app_context():
+        app.db.session.execute(app.update(app.Chat).where(app.Chat.id == chat_id).values(
+            intro_started_at=datetime.now(timezone.utc) - timedelta(seconds=app.Config.INTRO_RETRY_BACKOFF_SECONDS + 1)))
+        app.db.session.commit()
+    client.get(f'/api/chat/{chat_id}', headers=headers)
+    chat = load_chat(app, chat_id)
+    assert (chat.intro_status, chat.intro_attempts) == ('ready', 2)
+    assert len(client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']) == 1
+
+def test_abandoned_generation_is_taken_over(app, client, user, monkeypatch):
+    user_id, headers = user
+    monkeypatch.setattr(app, 'schedule_chat_intro', lambda chat_id: None)
+    chat_id = create_chat(client, user_id, headers)
+    monkeypatch.undo()
+    with app.app.app_context():
+        # Processo que morreu no meio da geração
+        app.db.session.execute(app.update(app.Chat).where(app.Chat.id == chat_id).values(
+            intro_status='generating', intro_attempts=1,
+            intro_started_at=datetime.now(timezone.utc) - timedelta(seconds=app.Config.INTRO_GENERATING_TIMEOUT_SECONDS + 1)))
+        app.db.session.commit()
+
+    client.get(f'/api/chat/{chat_id}', headers=headers)
+    chat = load_chat(app, chat_id)
+    assert (chat.intro_status, chat.intro_attempts) == ('ready', 2)
+    assert len(client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']) == 1
@@ -0,0 +1,75 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Despachante das chamadas ao LLM: limite de concorrência, fila e novas tentativas
+
+from conftest import create_chat
+from llm import LLMError, LLMOverloadedError, LLMResponse
+from llm_dispatcher import LLMDispatcher
+from metrics import MetricsRegistry
+import pytest
+
+class FlakyProvider:
+    name = 'flaky'
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate(self, prompt, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return LLMResponse('ok')
+
+def make_dispatcher(provider, **kwargs):
+    kwargs.setdefault('retry_base_delay', 0)
+    kwargs.setdefault('retry_max_delay', 0)
+    return LLMDispatcher(provider, MetricsRegistry(), **kwargs)
+
+def test_retryable_errors_are_retried():
+    provider = FlakyProvider([LLMError('indisponível', status_code=503), LLMError('limite', status_code=429)])
+    assert make_dispatcher(provider, max_retries=2).generate('oi').text == 'ok'
+    assert provider.calls == 3
+
+def test_other_errors_are_not_retried():
+    provider = FlakyProvider([LLMError('não encontrado', status_code=404)])
+    with pytest.raises(LLMError):
+        make_dispatcher(provider, max_retries=2).generate('oi')
+    assert provider.calls == 1
+
+def test_full_queue_is_rejected():
+    dispatcher = make_dispatcher(FlakyProvider([]), max_concurrency=1, max_queue=0)
+    dispatcher._acquire()
+    try:
+        with pytest.raises(LLMOverloadedError):
+            dispatcher.generate('oi')
+    finally:
+        dispatcher._release()
+    assert dispatcher.generate('oi').text == 'ok'
+
+def test_turn_is_rejected_with_429_when_dispatcher_is_full(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    monkeypatch.setattr(app.llm, 'max_queue', 0)
+    for _ in range(app.llm.max_concurrency):
+        app.llm._slots.acquire()
+    try:
+        response = client.post(f'/api/chat/{chat_id}/message', json={'message': 'oi'}, headers=headers)
+    finally:
+        for _ in range(app.llm.max_concurrency):
+            app.llm._slots.release()
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.post(f'/api/chat/{chat_id}/message', json={'message': 'oi'}, headers=headers).status_code == 200
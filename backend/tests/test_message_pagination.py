@@ -0,0 +1,49 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Paginação por cursor e sincronização incremental das mensagens de um chat
+
+from conftest import create_chat
+
+def add_messages(app, chat_id, count):
+    with app.app.app_context():
+        for index in range(count):
+            app.db.session.add(app.Message(chat_id=chat_id, sender='user' if index % 2 else 'gemini',
+                                           content=f'mensagem {index}'))
+        app.db.session.commit()
+
+def message_ids(app, chat_id):
+    with app.app.app_context():
+        return [message.id for message in
+                app.Message.query.filter_by(chat_id=chat_id).order_by(app.Message.id.asc()).all()]
+
+def test_message_pagination_walks_back_with_before_id(app, client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    add_messages(app, chat_id, 7)
+    expected = message_ids(app, chat_id)
+
+    seen = []
+    query = 'limit=3'
+    while True:
+        page = client.get(f'/api/chat/{chat_id}?{query}', headers=headers).get_json()
+        seen = [message['id'] for message in page['messages']] + seen
+        if not page['pagination']['has_more']:
+            break
+        query = f"limit=3&before_id={page['pagination']['next_before_id']}"
+    assert seen == expected
+
+    page = client.get(f'/api/chat/{chat_id}?since_id={expected[-3]}', headers=headers).get_json()
+    assert [message['id'] for message in page['messages']] == expected[-2:]
+    assert client.get(f'/api/chat/{chat_id}?before_id=1&since_id=1', headers=headers).status_code == 400
@@ -0,0 +1,50 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Hash de senhas configurável e regravação do hash no login
+
+from conftest import PASSWORD, register
+from password_hashing import PasswordHasher
+from werkzeug.security import generate_password_hash
+
+def stored_hash(app, user_id):
+    with app.app.app_context():
+        return app.db.session.get(app.User, user_id).password_hash
+
+def set_stored_hash(app, user_id, password_hash):
+    with app.app.app_context():
+        app.db.session.get(app.User, user_id).password_hash = password_hash
+        app.db.session.commit()
+
+def test_needs_rehash_compares_method_and_salt():
+    hasher = PasswordHasher()
+    hasher.method, hasher.salt_length = 'pbkdf2:sha256:1000', 16
+    assert not hasher.needs_rehash(hasher.hash('segredo'))
+    assert hasher.needs_rehash(generate_password_hash('segredo', method='pbkdf2:sha256:500', salt_length=16))
+    assert hasher.needs_rehash(generate_password_hash('segredo', method='pbkdf2:sha256:1000', salt_length=8))
+
+def test_login_rehashes_with_current_parameters(app, client):
+    user_id = register(client, 'antigo')
+    current_prefix = stored_hash(app, user_id).split('$', 1)[0]
+    set_stored_hash(app, user_id, generate_password_hash(PASSWORD, method='pbkdf2:sha256:500'))
+
+    assert client.post('/api/login', json={'username': 'antigo', 'password': 'errada'}).status_code == 401
+    assert stored_hash(app, user_id).startswith('pbkdf2:sha256:500$')
+
+    assert client.post('/api/login', json={'username': 'antigo', 'password': PASSWORD}).status_code == 200
+    rehashed = stored_hash(app, user_id)
+    assert rehashed.split('$', 1)[0] == current_prefix
+
+    assert client.post('/api/login', json={'username': 'antigo', 'password': PASSWORD}).status_code == 200
+    assert stored_hash(app, user_id) == rehashed
@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Templates de prompt compilados, recarregados pelo mtime e com render memorizado
+
+from jinja2 import Environment
+from prompt_templates import PromptTemplateRegistry
+import os
+import pytest
+
+class CountingEnvironment(Environment):
+    def __init__(self):
+        super().__init__()
+        self.compiled = 0
+
+    def from_string(self, source, *args, **kwargs):
+        self.compiled += 1
+        return super().from_string(source, *args, **kwargs)
+
+@pytest.fixture
+def template_file(tmp_path):
+    path = tmp_path / 'prompt.txt'
+    path.write_text('Universo: {{ universo }}', encoding='utf-8')
+    return path
+
+def set_mtime(path, offset):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset))
+
+def test_template_is_compiled_once_and_render_is_memoized(template_file, monkeypatch):
+    env = CountingEnvironment()
+    registry = PromptTemplateRegistry(env, {'default': str(template_file)})
+    assert registry.render('default', {'universo': 'Fantasia'}) == 'Universo: Fantasia'
+
+    renders = []
+    compiled_template = registry._get_compiled('default')[1]
+    monkeypatch.setattr(compiled_template, 'render', lambda **context: renders.append(context) or 'x')
+    assert registry.render('default', {'universo': 'Fantasia'}) == 'Universo: Fantasia'
+    assert renders == [] and env.compiled == 1
+
+    assert registry.render('default', {'universo': 'Espaço'}) == 'x'
+    assert len(renders) == 1 and env.compiled == 1
+
+def test_template_is_reloaded_when_mtime_changes(template_file):
+    env = CountingEnvironment()
+    registry = PromptTemplateRegistry(env, {'default': str(template_file)})
+    assert registry.render('default', {'universo': 'Fantasia'}) == 'Universo: Fantasia'
+
+    template_file.write_text('Mundo: {{ universo }}', encoding='utf-8')
+    set_mtime(template_file, 1_000_000_000) # Garante mtime diferente em sistemas de arquivos com pouca resolução
+    assert registry.render('default', {'universo': 'Fantasia'}) == 'Mundo: Fantasia'
+    assert env.compiled == 2
+
+def test_render_cache_is_bounded(template_file):
+    registry = PromptTemplateRegistry(Environment(), {'default': str(template_file)}, render_cache_size=2)
+    for universo in ('A', 'B', 'C'):
+        registry.render('default', {'universo': universo})
+    assert len(registry._rendered) == 2
+
+def test_unknown_or_missing_template(template_file):
+    registry = PromptTemplateRegistry(Environment(), {'default': str(template_file)})
+    with pytest.raises(KeyError):
+        registry.render('outro', {})
+    template_file.unlink()
+    with pytest.raises(FileNotFoundError):
+        registry.render('default', {})
@@ -0,0 +1,20 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# flask check-query-plans: consultas dos caminhos quentes sem varredura completa
+
+def test_check_query_plans_on_scratch_database(app):
+    result = app.app.test_cli_runner().invoke(args=['check-query-plans', '--scratch'])
+    assert result.exit_code == 0, result.output
+    assert '[FALHA]' not in result.output
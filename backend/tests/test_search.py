@@ -0,0 +1,56 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Busca (FTS5): índices mantidos pelos triggers e trechos escapados
+
+from conftest import create_chat
+
+def search(client, headers, query, **params):
+    response = client.get('/api/search', query_string={'q': query, **params}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_triggers_keep_index_in_sync(client, user, other_user):
+    user_id, headers = user
+    other_id, other_headers = other_user
+    chat_id = create_chat(client, user_id, headers, inspiracao='um dragão antigo')
+    create_chat(client, other_id, other_headers, inspiracao='outro dragão')
+
+    assert [hit['chat_id'] for hit in search(client, headers, 'dragao')['chats']['results']] == [chat_id]
+
+    client.patch(f'/api/chat/{chat_id}', json={'observations': 'castelo de cristal'}, headers=headers)
+    assert search(client, headers, 'cristal')['chats']['results'][0]['chat_id'] == chat_id
+
+    client.post(f'/api/chat/{chat_id}/message', json={'message': 'procuro a espada flamejante'}, headers=headers)
+    hits = search(client, headers, 'flamejante', type='messages')
+    assert 'chats' not in hits
+    assert [hit['chat_id'] for hit in hits['messages']['results']] == [chat_id]
+
+    client.delete(f'/api/chat/{chat_id}', headers=headers)
+    hits = search(client, headers, 'flamejante')
+    assert hits['chats']['results'] == [] and hits['messages']['results'] == []
+
+def test_snippets_are_html_escaped(client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    client.patch(f'/api/chat/{chat_id}', json={'observations': '<script>x</script> dragão & cia'}, headers=headers)
+
+    snippet = search(client, headers, 'dragao', type='chats')['chats']['results'][0]['snippet']
+    assert snippet == '&lt;script&gt;x&lt;/script&gt; <mark>dragão</mark> &amp; cia'
+
+def test_invalid_search_parameters(client, user):
+    _, headers = user
+    assert client.get('/api/search?q=', headers=headers).status_code == 400
+    assert client.get('/api/search?q=x&type=tudo', headers=headers).status_code == 400
+    assert client.get('/api/search?q=x&limit=0', headers=headers).status_code == 400
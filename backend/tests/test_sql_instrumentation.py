@@ -0,0 +1,49 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Instrumentação de SQL: comando que falha não deixa início pendente para os próximos
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from metrics import MetricsRegistry
+from sql_instrumentation import SQLInstrumentation
+from sqlalchemy import text
+import time
+
+def test_failed_statement_does_not_skew_next_durations():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQL_INSTRUMENTATION_ENABLED=True)
+    db = SQLAlchemy(app)
+    instrumentation = SQLInstrumentation(db, MetricsRegistry(), app)
+
+    @app.route('/consulta')
+    def consulta():
+        try:
+            db.session.execute(text('SELECT * FROM tabela_inexistente'))
+        except Exception:
+            db.session.rollback()
+        time.sleep(0.2) # Com o início do comando que falhou reaproveitado, este tempo entraria na medição
+        db.session.execute(text('SELECT 1'))
+        return 'ok'
+
+    response = app.test_client().get('/consulta')
+    assert response.status_code == 200
+    assert 'desc="1 queries"' in response.headers['Server-Timing']
+    route = instrumentation.snapshot()['GET /consulta']
+    assert route['queries_per_request'] == 1
+    assert route['db_ms_per_request'] < 100
+
+    # Nada do comando que falhou sobra na conexão, que volta ao pool
+    with app.app_context(), db.engine.connect() as connection:
+        assert not [key for key in connection.info if key.startswith('jogai')]
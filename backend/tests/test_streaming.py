@@ -0,0 +1,59 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Envio de mensagem em streaming (SSE)
+
+from conftest import create_chat
+from llm import LLMResponse
+import json
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+def test_stream_sends_chunks_then_saves_the_turn(app, client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+
+    response = client.post(f'/api/chat/{chat_id}/message/stream', json={'message': 'olá'}, headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events[:-1]] == ['chunk'] * (len(events) - 1)
+    name, payload = events[-1]
+    assert name == 'done'
+    assert payload['gemini_message']['content'] == ''.join(data['text'] for _, data in events[:-1])
+    assert payload['chat_status'] == 'started'
+
+    messages = client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']
+    assert [message['id'] for message in messages[-2:]] == [payload['user_message']['id'], payload['gemini_message']['id']]
+
+def test_stream_error_saves_nothing(app, client, user, monkeypatch):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    before = client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']
+
+    def broken_stream(*args, **kwargs):
+        yield LLMResponse('Começo')
+        raise RuntimeError('conexão perdida')
+    monkeypatch.setattr(app.llm, 'stream', lambda *args, **kwargs: broken_stream())
+
+    response = client.post(f'/api/chat/{chat_id}/message/stream', json={'message': 'olá'}, headers=headers)
+    events = parse_events(response.get_data(as_text=True))
+    assert events[0] == ('chunk', {'text': 'Começo'})
+    assert events[-1][0] == 'error'
+    assert client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages'] == before
@@ -0,0 +1,66 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Cache de respostas do LLM usado na geração de títulos
+
+from conftest import create_chat
+from llm_cache import LLMResponseCache
+from metrics import MetricsRegistry
+
+def make_cache(**kwargs):
+    return LLMResponseCache(MetricsRegistry(), **kwargs)
+
+def test_prompt_is_normalized():
+    cache = make_cache(pool_size=1)
+    cache.add('title', 'modelo', 'Aventura  em FANTASIA, gênero Ação', 'Título')
+    assert cache.get('title', 'modelo', 'aventura em fantasia, genero acao') == 'Título'
+    assert cache.get('title', 'outro-modelo', 'aventura em fantasia, genero acao') is None
+    assert cache.get('intro', 'modelo', 'aventura em fantasia, genero acao') is None
+
+def test_pool_is_filled_then_rotated():
+    cache = make_cache(pool_size=2)
+    assert cache.get('title', 'modelo', 'prompt') is None
+    cache.add('title', 'modelo', 'prompt', 'A')
+    assert cache.get('title', 'modelo', 'prompt') is None # Pool ainda incompleto: consultar o modelo
+    cache.add('title', 'modelo', 'prompt', 'B')
+    assert [cache.get('title', 'modelo', 'prompt') for _ in range(3)] == ['A', 'B', 'A']
+
+def test_memory_tier_is_bounded():
+    cache = make_cache(pool_size=1, max_entries=2)
+    for prompt in ('um', 'dois', 'três'):
+        cache.add('title', 'modelo', prompt, prompt.upper())
+    assert cache.get('title', 'modelo', 'um') is None
+    assert cache.get('title', 'modelo', 'três') == 'TRÊS'
+
+def test_disk_tier_is_shared_and_expires(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    make_cache(pool_size=1, db_path=path).add('title', 'modelo', 'prompt', 'Do disco')
+    assert make_cache(pool_size=1, db_path=path).get('title', 'modelo', 'prompt') == 'Do disco'
+    assert make_cache(pool_size=1, db_path=path, ttl_seconds=-1).get('title', 'modelo', 'prompt') is None
+
+def test_same_config_reuses_cached_title(app, client, user, monkeypatch):
+    user_id, headers = user
+    monkeypatch.setattr(app, 'title_cache', make_cache(pool_size=1))
+    calls = []
+    generate = app.llm.generate
+    def recording_generate(prompt, **kwargs):
+        calls.append(kwargs.get('call_type'))
+        return generate(prompt, **kwargs)
+    monkeypatch.setattr(app.llm, 'generate', recording_generate)
+
+    first = create_chat(client, user_id, headers)
+    second = create_chat(client, user_id, headers)
+    assert calls.count('title') == 1
+    titles = [client.get(f'/api/chat/{chat_id}/title', headers=headers).get_json()['title'] for chat_id in (first, second)]
+    assert titles[0] == titles[1]
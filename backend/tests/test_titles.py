@@ -0,0 +1,79 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Título do chat gerado em segundo plano
+
+from concurrent.futures import Future
+from conftest import create_chat
+from llm import LLMError
+
+def hold_title_worker(app, monkeypatch):
+    # O título fica pendente: a tarefa é registrada, mas não roda
+    held = []
+    submit = app.background_tasks.submit
+    def submit_except_title(fn, *args, **kwargs):
+        if fn is not app.generate_chat_title:
+            return submit(fn, *args, **kwargs)
+        held.append(args)
+        future = Future()
+        future.set_result(None)
+        return future
+    monkeypatch.setattr(app.background_tasks, 'submit', submit_except_title)
+    return held
+
+def get_title(client, chat_id, headers):
+    response = client.get(f'/api/chat/{chat_id}/title', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_chat_is_created_with_provisional_title(app, client, user, monkeypatch):
+    user_id, headers = user
+    held = hold_title_worker(app, monkeypatch)
+
+    response = client.post('/api/chats', json={'user_id': user_id, 'universo': 'Fantasia', 'genero': 'Aventura'},
+                           headers=headers)
+    chat = response.get_json()
+    assert response.status_code == 201
+    assert chat['title'] == 'Aventura em Fantasia' and chat['title_pending'] is True
+    assert [args[0] for args in held] == [chat['id']]
+    assert get_title(client, chat['id'], headers)['title_pending'] is True
+
+def test_worker_replaces_provisional_title(client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    title = get_title(client, chat_id, headers)
+    assert title['title_pending'] is False
+    assert title['title'] and title['title'] != 'Aventura em Fantasia'
+
+def test_worker_keeps_title_chosen_by_user(app, client, user, monkeypatch):
+    user_id, headers = user
+    hold_title_worker(app, monkeypatch)
+    chat_id = create_chat(client, user_id, headers)
+    client.put(f'/api/chat/{chat_id}/title', json={'title': 'Minha aventura'}, headers=headers)
+
+    with app.app.app_context():
+        app.generate_chat_title(chat_id, {'universo': 'Fantasia', 'genero': 'Aventura'}, 'Aventura em Fantasia')
+    assert get_title(client, chat_id, headers) == {'id': chat_id, 'title': 'Minha aventura', 'title_pending': False}
+
+def test_failed_generation_keeps_provisional_title(app, client, user, monkeypatch):
+    user_id, headers = user
+
+    def failing_generate(prompt, **kwargs):
+        if kwargs.get('call_type') == 'title':
+            raise LLMError('falha simulada', status_code=500)
+        return generate(prompt, **kwargs)
+    generate = app.llm.generate
+    monkeypatch.setattr(app.llm, 'generate', failing_generate)
+    chat_id = create_chat(client, user_id, headers)
+    assert get_title(client, chat_id, headers) == {'id': chat_id, 'title': 'Aventura em Fantasia', 'title_pending': False}
@@ -0,0 +1,58 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Arquivo de transcrições: leitura do blob e restore no próximo turno
+
+from datetime import datetime, timedelta, timezone
+from conftest import create_chat
+
+def add_messages(app, chat_id, count):
+    with app.app.app_context():
+        for index in range(count):
+            app.db.session.add(app.Message(chat_id=chat_id, sender='user' if index % 2 else 'gemini',
+                                           content=f'mensagem {index}'))
+        app.db.session.commit()
+
+def message_ids(app, chat_id):
+    with app.app.app_context():
+        return [message.id for message in
+                app.Message.query.filter_by(chat_id=chat_id).order_by(app.Message.id.asc()).all()]
+
+def test_archived_transcript_is_read_and_restored(app, client, user):
+    user_id, headers = user
+    chat_id = create_chat(client, user_id, headers)
+    add_messages(app, chat_id, 4)
+    before = client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages']
+    assert client.put(f'/api/chat/{chat_id}/status', json={'status': 'finished'}, headers=headers).status_code == 200
+
+    with app.app.app_context():
+        app.access_recorder.flush() # O GET acima registrou um acesso agora
+        app.db.session.execute(app.update(app.Chat).where(app.Chat.id == chat_id).values(
+            last_accessed_at=datetime.now(timezone.utc) - timedelta(days=60)))
+        app.db.session.commit()
+        totals = app.transcript_archiver.compact(after_days=30)
+    assert totals['chats'] == 1 and totals['messages'] == len(before)
+    assert message_ids(app, chat_id) == []
+
+    # Leitura direto do arquivo, sem devolver as mensagens à tabela
+    assert client.get(f'/api/chat/{chat_id}', headers=headers).get_json()['messages'] == before
+    assert message_ids(app, chat_id) == []
+
+    # Um novo turno restaura a transcrição antes de montar o histórico
+    response = client.post(f'/api/chat/{chat_id}/message', json={'message': 'voltei'}, headers=headers)
+    assert response.status_code == 200
+    assert message_ids(app, chat_id)[:len(before)] == [message['id'] for message in before]
+    assert len(message_ids(app, chat_id)) == len(before) + 2
+    with app.app.app_context():
+        assert app.db.session.get(app.ChatArchive, chat_id) is None
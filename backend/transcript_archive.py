@@ -0,0 +1,189 @@
+# -----------------------------------------------------------------------------
+# Sistema: JogAI
+# Autor: Guilherme Heyse Ribas
+# Criado em: 15 e 16 de maio de 2025
+# Evento: Imersão IA - 3ª Edição (Alura + Google Gemini)
+#
+# Este sistema foi inteiramente desenvolvido com auxílio da inteligência artificial
+# Google Gemini, utilizando Python e Flutter com integração direta ao modelo Gemini.
+#
+# Todos os arquivos deste projeto foram gerados durante a Imersão promovida pela Alura
+# em parceria com o Google, como uma exploração prática do uso de IA em desenvolvimento
+# de software.
+# -----------------------------------------------------------------------------
+
+# Arquivo de transcrições de chats encerrados.
+#
+# Chats com status em ARCHIVE_STATUSES e sem acesso há ARCHIVE_AFTER_DAYS dias têm
+# as mensagens empacotadas num único blob comprimido (zlib) na tabela chat_archive;
+# as linhas da tabela message são removidas e o chat fica marcado com
+# transcript_archived_at. A leitura (get_chat_details) descomprime o blob em
+# memória, sem escrever no banco; um novo turno devolve as mensagens à tabela
+# message (restore) antes de montar o histórico. Os ids originais são mantidos, então
+# summarized_until_id e os cursores de paginação continuam válidos.
+#
+# Uma mensagem gravada durante o arquivamento fica na tabela message; a leitura e
+# o restore juntam as duas fontes.
+#
+# O compactador roda pelo comando "flask archive-transcripts" ou, com
+# ARCHIVE_COMPACTOR_INTERVAL_SECONDS > 0, numa thread de fundo.
+
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+import json
+import threading
+import zlib
+
+CODEC = 'zlib'
+
+def pack_messages(rows, level=6):
+    # rows: (id, sender, content, timestamp) em ordem de id
+    payload = [[row[0], row[1], row[2], row[3].isoformat()] for row in rows]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(raw, level), len(raw)
+
+def unpack_messages(data):
+    # Retorna dicts com id, sender, content e timestamp (datetime)
+    return [{'id': item[0], 'sender': item[1], 'content': item[2], 'timestamp': datetime.fromisoformat(item[3])}
+            for item in json.loads(zlib.decompress(data).decode('utf-8'))]
+
+class TranscriptArchiver:
+    def __init__(self, db, chat_model, message_model, archive_model, app=None, access_recorder=None):
+        self._db = db
+        self._chat = chat_model
+        self._message = message_model
+        self._archive = archive_model
+        self._access_recorder = access_recorder
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock() # Uma compactação por vez neste processo
+        self.after_days = 30
+        self.statuses = ('finished', 'cancelled', 'archived')
+        self.batch_size = 50
+        self.interval_seconds = 0
+        self.compression_level = 6
+        self.on_archived = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._app = app
+        self.after_days = app.config.get('ARCHIVE_AFTER_DAYS', 30)
+        self.statuses = tuple(app.config.get('ARCHIVE_STATUSES', self.statuses))
+        self.batch_size = app.config.get('ARCHIVE_BATCH_SIZE', 50)
+        self.interval_seconds = app.config.get('ARCHIVE_COMPACTOR_INTERVAL_SECONDS', 0)
+        self.compression_level = app.config.get('ARCHIVE_COMPRESSION_LEVEL', 6)
+        app.extensions['transcript_archiver'] = self
+        if self.interval_seconds > 0:
+            self._thread = threading.Thread(target=self._run, name='jogai-archive', daemon=True)
+            self._thread.start()
+
+    # --- Leitura e restore ---
+    def load_messages(self, chat_id):
+        # Transcrição completa de um chat arquivado (blob + mensagens gravadas depois), em ordem de id
+        data = self._db.session.execute(
+            select(self._archive.data).where(self._archive.chat_id == chat_id)).scalar()
+        messages = [self._message(chat_id=chat_id, **item) for item in unpack_messages(data)] if data else []
+        archived_ids = {message.id for message in messages}
+        live = self._message.query.filter(self._message.chat_id == chat_id).order_by(self._message.id.asc()).all()
+        messages.extend(message for message in live if message.id not in archived_ids)
+        messages.sort(key=lambda message: message.id)
+        return messages
+
+    def restore(self, chat_id):
+        # Devolve as mensagens arquivadas à tabela message. Retorna True se restaurou.
+        session = self._db.session
+        data = session.execute(select(self._archive.data).where(self._archive.chat_id == chat_id)).scalar()
+        if data is None:
+            session.execute(update(self._chat).where(self._chat.id == chat_id)
+                            .values(transcript_archived_at=None))
+            session.commit()
+            return False
+
+        rows = [dict(item, chat_id=chat_id) for item in unpack_messages(data)]
+        try:
+            if rows:
+                session.execute(insert(self._message), rows)
+            session.execute(delete(self._archive).where(self._archive.chat_id == chat_id))
+            session.execute(update(self._chat).where(self._chat.id == chat_id).values(transcript_archived_at=None))
+            session.commit()
+        except IntegrityError:
+            # Outro request restaurou o mesmo chat ao mesmo tempo
+            session.rollback()
+            return False
+        return True
+
+    # --- Arquivamento ---
+    def archive_chat(self, chat_id):
+        # Empacota as mensagens de um chat. Retorna (mensagens, bytes originais, bytes comprimidos) ou None.
+        session = self._db.session
+        chat = session.execute(
+            select(self._chat.status, self._chat.transcript_archived_at).where(self._chat.id == chat_id)).first()
+        if chat is None or chat.transcript_archived_at is not None or chat.status not in self.statuses:
+            return None
+
+        rows = session.execute(
+            select(self._message.id, self._message.sender, self._message.content, self._message.timestamp)
+            .where(self._message.chat_id == chat_id).order_by(self._message.id.asc())).all()
+        data, original_bytes = pack_messages(rows, self.compression_level)
+        now = datetime.now(timezone.utc)
+        session.execute(insert(self._archive).values(
+            chat_id=chat_id, codec=CODEC, message_count=len(rows), original_bytes=original_bytes,
+            data=data, archived_at=now))
+        if rows:
+            # Só as mensagens empacotadas; uma gravada no meio do caminho continua na tabela
+            session.execute(delete(self._message).where(
+                self._message.chat_id == chat_id, self._message.id <= rows[-1].id))
+        session.execute(update(self._chat).where(self._chat.id == chat_id).values(transcript_archived_at=now))
+        session.commit()
+        if self.on_archived is not None:
+            self.on_archived(chat_id)
+        return len(rows), original_bytes, len(data)
+
+    def candidates(self, after_days=None, limit=None):
+        after_days = self.after_days if after_days is None else after_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+        query = (select(self._chat.id)
+                 .where(self._chat.status.in_(self.statuses), self._chat.transcript_archived_at.is_(None),
+                        self._chat.last_accessed_at < cutoff)
+                 .order_by(self._chat.last_accessed_at.asc())
+                 .limit(limit or self.batch_size))
+        return self._db.session.execute(query).scalars().all()
+
+    def compact(self, after_days=None, limit=None):
+        # Arquiva até `limit` chats elegíveis (um por transação). Precisa de app context.
+        totals = {'chats': 0, 'messages': 0, 'original_bytes': 0, 'compressed_bytes': 0}
+        with self._lock:
+            if self._access_recorder is not None:
+                # Acessos ainda em memória contam para a idade do chat
+                self._access_recorder.flush()
+            for chat_id in self.candidates(after_days, limit):
+                try:
+                    result = self.archive_chat(chat_id)
+                except Exception as e:
+                    self._db.session.rollback()
+                    print(f"Erro ao arquivar a transcrição do chat {chat_id}: {e}")
+                    continue
+                if result is None:
+                    continue
+                totals['chats'] += 1
+                totals['messages'] += result[0]
+                totals['original_bytes'] += result[1]
+                totals['compressed_bytes'] += result[2]
+        return totals
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self._app.app_context():
+                    totals = self.compact()
+                if totals['chats']:
+                    print(f"Transcrições arquivadas: {totals['chats']} chats, {totals['messages']} mensagens, "
+                          f"{totals['original_bytes']} -> {totals['compressed_bytes']} bytes")
+            except Exception as e:
+                print(f"Erro no compactador de transcrições: {e}")
+
+    def stop(self):
+        self._stop.set()
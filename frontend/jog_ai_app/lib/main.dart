@@ -43,6 +43,9 @@ Future<void> main() async { // main agora é async
   runApp(const MyApp());
 }
 
+// Usado para voltar ao login quando o servidor recusa o token (ver ApiService.onUnauthorized)
+final GlobalKey<NavigatorState> navigatorKey = GlobalKey<NavigatorState>();
+
 // Widget para decidir entre Login e ChatList
 class AuthWrapper extends StatelessWidget {
   final Widget Function(BuildContext context, int? chatId) chatListScreenBuilder;
@@ -91,10 +94,19 @@ class MyApp extends StatelessWidget {
     return MultiProvider(
       providers: [
         Provider<ApiService>(create: (_) => ApiService()),
-        ChangeNotifierProvider<AuthService>(create: (_) => AuthService(ApiService())),
+        ChangeNotifierProvider<AuthService>(create: (_) {
+          final authService = AuthService(ApiService());
+          // Token expirado ou revogado: sai da conta e volta para a tela de login
+          ApiService.onUnauthorized = () async {
+            await authService.logout();
+            navigatorKey.currentState?.pushNamedAndRemoveUntil('/', (route) => false);
+          };
+          return authService;
+        }),
         // Adicione outros providers aqui conforme necessário
       ],
       child: MaterialApp(
+        navigatorKey: navigatorKey,
         title: 'JogAI',
         debugShowCheckedModeBanner: false,
         theme: ThemeData(
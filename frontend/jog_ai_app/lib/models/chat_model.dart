@@ -6,11 +6,15 @@ class Chat {
   final int id;
   final int userId;
   String title;
+  // Título do Gemini ainda sendo gerado em segundo plano (title mostra o provisório)
+  bool titlePending;
   final DateTime createdAt;
   final DateTime lastAccessedAt;
   String status;
   String? observations;
   String? color;
+  // Introdução gerada em segundo plano: pending, generating, ready, failed (null = nunca agendada)
+  String? introStatus;
   // List<Message> messages; // Pode ser carregado separadamente ou incluído aqui
 
   // Campos de pré-configuração
@@ -28,11 +32,13 @@ class Chat {
     required this.id,
     required this.userId,
     required this.title,
+    this.titlePending = false,
     required this.createdAt,
     required this.lastAccessedAt,
     required this.status,
     this.observations,
     this.color,
+    this.introStatus,
     // Campos de pré-configuração
     this.universo,
     this.universoOutro,
@@ -63,11 +69,13 @@ class Chat {
       id: json['id'] as int,
       userId: json['user_id'] as int? ?? 0, 
       title: json['title'] as String? ?? 'Chat Desconhecido',
+      titlePending: json['title_pending'] as bool? ?? false,
       createdAt: parseDate(json['created_at'] as String?),
       lastAccessedAt: parseDate(json['last_accessed_at'] as String?),
       status: json['status'] as String? ?? 'new',
       observations: json['observations'] as String?,
       color: json['color'] as String?,
+      introStatus: json['intro_status'] as String?,
       // Campos de pré-configuração
       universo: config['universo'] as String?,
       universoOutro: config['universo_outro'] as String?,
@@ -88,11 +96,13 @@ class Chat {
     'id': id,
     'user_id': userId,
     'title': title,
+    'title_pending': titlePending,
     'created_at': createdAt.toIso8601String(),
     'last_accessed_at': lastAccessedAt.toIso8601String(),
     'status': status,
     'observations': observations,
     'color': color,
+    'intro_status': introStatus,
     // Campos de pré-configuração
     'config': {
       'universo': universo,
@@ -112,11 +122,13 @@ class Chat {
     int? id,
     int? userId,
     String? title,
+    bool? titlePending,
     DateTime? createdAt,
     DateTime? lastAccessedAt,
     String? status,
     ValueGetter<String?>? observations,
     ValueGetter<String?>? color,
+    ValueGetter<String?>? introStatus,
     ValueGetter<String?>? universo,
     ValueGetter<String?>? universoOutro,
     ValueGetter<String?>? genero,
@@ -131,11 +143,13 @@ class Chat {
       id: id ?? this.id,
       userId: userId ?? this.userId,
       title: title ?? this.title,
+      titlePending: titlePending ?? this.titlePending,
       createdAt: createdAt ?? this.createdAt,
       lastAccessedAt: lastAccessedAt ?? this.lastAccessedAt,
       status: status ?? this.status,
       observations: observations != null ? observations() : this.observations,
       color: color != null ? color() : this.color,
+      introStatus: introStatus != null ? introStatus() : this.introStatus,
       universo: universo != null ? universo() : this.universo,
       universoOutro: universoOutro != null ? universoOutro() : this.universoOutro,
       genero: genero != null ? genero() : this.genero,
@@ -148,6 +162,9 @@ class Chat {
     );
   }
 
+  // A introdução ainda pode chegar: o cliente continua buscando mensagens novas
+  bool get introInProgress => introStatus == 'pending' || introStatus == 'generating';
+
   // Getters para facilitar o acesso aos campos de configuração (já devem existir da etapa anterior)
   String? get getUniverso => universo;
 } 
\ No newline at end of file
@@ -2,7 +2,7 @@ class User {
   final int id;
   final String username;
   // Não armazenamos a senha no frontend após o login
-  // Podemos adicionar um token JWT aqui se implementarmos
+  // O token de acesso fica no AuthService/ApiService, não no modelo
 
   User({required this.id, required this.username});
 
@@ -38,11 +38,15 @@ class _ChangePasswordScreenState extends State<ChangePasswordScreen> {
       }
 
       try {
-        await apiService.changePassword(
+        final response = await apiService.changePassword(
           authService.userId!,
           _currentPasswordController.text,
           _newPasswordController.text,
         );
+        // A troca revoga os tokens anteriores; continua logado com o novo
+        if (response['access_token'] != null) {
+          await authService.updateAccessToken(response['access_token'] as String);
+        }
         if (!mounted) return;
         ScaffoldMessenger.of(context).showSnackBar(
           const SnackBar(content: Text('Senha alterada com sucesso!')),
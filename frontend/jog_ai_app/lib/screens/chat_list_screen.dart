@@ -12,6 +12,7 @@
 // de software.
 // -----------------------------------------------------------------------------
 
+import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:jog_ai_app/models/chat_model.dart';
 import 'package:jog_ai_app/screens/chat_screen.dart';
@@ -45,6 +46,13 @@ class ChatListScreenState extends State<ChatListScreen> {
   bool _isLoadingChats = true;
   String? _loadingError;
 
+  // Chats novos recebem o título do Gemini em segundo plano (title_pending): a lista
+  // consulta GET /chat/<id>/title de cada um até o título final chegar
+  static const Duration _titlePollInterval = Duration(seconds: 2);
+  static const int _titlePollMaxAttempts = 30;
+  Timer? _titlePollTimer;
+  int _titlePollAttempts = 0;
+
   ApiService get _apiService => Provider.of<ApiService>(context, listen: false);
   AuthService get _authService => Provider.of<AuthService>(context, listen: false);
 
@@ -59,6 +67,7 @@ class ChatListScreenState extends State<ChatListScreen> {
 
   @override
   void dispose() {
+    _titlePollTimer?.cancel();
     _searchController.removeListener(_onSearchChanged);
     _searchController.dispose();
     super.dispose();
@@ -86,6 +95,8 @@ class ChatListScreenState extends State<ChatListScreen> {
           _allUserChats = chats;
           _filterChats();
         });
+        _titlePollAttempts = 0;
+        _scheduleTitlePoll();
       } else {
         if (!mounted) return;
         setState(() {
@@ -109,6 +120,33 @@ class ChatListScreenState extends State<ChatListScreen> {
     }
   }
 
+  void _scheduleTitlePoll() {
+    _titlePollTimer?.cancel();
+    if (!mounted || !_allUserChats.any((chat) => chat.titlePending) || _titlePollAttempts >= _titlePollMaxAttempts) {
+      return;
+    }
+    _titlePollTimer = Timer(_titlePollInterval, _pollPendingTitles);
+  }
+
+  Future<void> _pollPendingTitles() async {
+    if (!mounted) return;
+    _titlePollAttempts++;
+    for (final chat in _allUserChats.where((chat) => chat.titlePending).toList()) {
+      try {
+        final response = await _apiService.getChatTitle(chat.id);
+        if (!mounted) return;
+        setState(() {
+          chat.title = response['title'] as String? ?? chat.title;
+          chat.titlePending = response['title_pending'] as bool? ?? false;
+          _filterChats();
+        });
+      } catch (e) {
+        print("Erro ao buscar o título do chat ${chat.id}: ${e.toString()}");
+      }
+    }
+    _scheduleTitlePoll();
+  }
+
   void _filterChats() {
     if (_searchTerm.isEmpty) {
       _filteredUserChats = List.from(_allUserChats);
@@ -1,3 +1,4 @@
+import 'dart:async';
 import 'package:flutter/material.dart';
 import 'package:jog_ai_app/models/message_model.dart';
 import 'package:jog_ai_app/models/chat_model.dart' show Chat;
@@ -29,6 +30,17 @@ class _ChatScreenState extends State<ChatScreen> {
   late TextEditingController _titleEditingController; // Controlador para o TextField do título
   final FocusNode _titleFocusNode = FocusNode(); // Nó de foco para o TextField do título
 
+  // A introdução é gerada em segundo plano: enquanto intro_status estiver pendente,
+  // busca só as mensagens novas (since_id) a cada intervalo, com um limite de tentativas
+  static const Duration _introPollInterval = Duration(seconds: 2);
+  static const int _introPollMaxAttempts = 30;
+  Timer? _introPollTimer;
+  int _introPollAttempts = 0;
+
+  // Mesmo esquema para o título: enquanto title_pending, consulta GET /chat/<id>/title
+  Timer? _titlePollTimer;
+  int _titlePollAttempts = 0;
+
   ApiService get _apiService => Provider.of<ApiService>(context, listen: false);
 
   @override
@@ -49,6 +61,8 @@ class _ChatScreenState extends State<ChatScreen> {
 
   @override
   void dispose() {
+    _introPollTimer?.cancel();
+    _titlePollTimer?.cancel();
     _messageController.dispose();
     _scrollController.dispose();
     _titleEditingController.dispose();
@@ -75,6 +89,10 @@ class _ChatScreenState extends State<ChatScreen> {
         _isLoading = false;
       });
       _scrollToBottom();
+      _introPollAttempts = 0;
+      _scheduleIntroPoll();
+      _titlePollAttempts = 0;
+      _scheduleTitlePoll();
     } catch (e) {
       if (!mounted) return;
       setState(() {
@@ -86,6 +104,66 @@ class _ChatScreenState extends State<ChatScreen> {
     }
   }
 
+  void _scheduleIntroPoll() {
+    _introPollTimer?.cancel();
+    if (!mounted || _chatDetails?.introInProgress != true || _introPollAttempts >= _introPollMaxAttempts) {
+      return;
+    }
+    _introPollTimer = Timer(_introPollInterval, _pollIntro);
+  }
+
+  Future<void> _pollIntro() async {
+    if (!mounted) return;
+    _introPollAttempts++;
+    try {
+      final lastId = _messages.fold<int>(0, (maxId, msg) => msg.id > maxId ? msg.id : maxId);
+      final response = await _apiService.getChatDetails(widget.chatId, sinceId: lastId);
+      if (!mounted) return;
+      final List<dynamic> messagesJson = response['messages'] ?? [];
+      final List<Message> newMessages = messagesJson
+          .map((json) => Message.fromJson(json as Map<String, dynamic>))
+          .where((msg) => !_messages.any((existing) => existing.id == msg.id))
+          .toList();
+      setState(() {
+        _messages.addAll(newMessages);
+        _chatDetails?.introStatus = response['intro_status'] as String?;
+      });
+      if (newMessages.isNotEmpty) {
+        _scrollToBottom();
+      }
+    } catch (e) {
+      print("Erro ao buscar a introdução do chat: ${e.toString()}");
+    }
+    _scheduleIntroPoll();
+  }
+
+  void _scheduleTitlePoll() {
+    _titlePollTimer?.cancel();
+    if (!mounted || _chatDetails?.titlePending != true || _titlePollAttempts >= _introPollMaxAttempts) {
+      return;
+    }
+    _titlePollTimer = Timer(_introPollInterval, _pollTitle);
+  }
+
+  Future<void> _pollTitle() async {
+    if (!mounted) return;
+    _titlePollAttempts++;
+    try {
+      final response = await _apiService.getChatTitle(widget.chatId);
+      if (!mounted || _chatDetails == null) return;
+      setState(() {
+        _chatDetails!.titlePending = response['title_pending'] as bool? ?? false;
+        // Não sobrescreve um título que o usuário está editando
+        if (!_isEditingTitle) {
+          _chatDetails!.title = response['title'] as String? ?? _chatDetails!.title;
+        }
+      });
+    } catch (e) {
+      print("Erro ao buscar o título do chat: ${e.toString()}");
+    }
+    _scheduleTitlePoll();
+  }
+
   Future<void> _sendMessage() async {
     if (_messageController.text.isEmpty || _isSending) {
       return;
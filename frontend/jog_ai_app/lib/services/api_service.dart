@@ -11,6 +11,28 @@ class ApiService {
   // Se estiver rodando o backend em uma máquina diferente na rede, use o IP daquela máquina.
   static const String _baseUrl = "http://127.0.0.1:5000/api"; // Porta padrão do Flask é 5000
 
+  // Token de acesso devolvido pelo /api/login (definido pelo AuthService).
+  // Estático para ser compartilhado por todas as instâncias do ApiService.
+  static String? accessToken;
+
+  // Chamado quando o servidor recusa o token (expirado ou revogado pela troca de senha).
+  // O main.dart o usa para sair da conta e voltar à tela de login.
+  static void Function()? onUnauthorized;
+
+  void _checkUnauthorized(http.Response response) {
+    if (response.statusCode == 401 && accessToken != null) {
+      accessToken = null;
+      onUnauthorized?.call();
+    }
+  }
+
+  Map<String, String> _headers({bool json = false}) {
+    return <String, String>{
+      if (json) 'Content-Type': 'application/json; charset=UTF-8',
+      if (accessToken != null) 'Authorization': 'Bearer $accessToken',
+    };
+  }
+
   Future<Map<String, dynamic>> register(String username, String password) async {
     final response = await http.post(
       Uri.parse('$_baseUrl/register'),
@@ -42,11 +64,7 @@ class ApiService {
   Future<Map<String, dynamic>> createChat(Map<String, dynamic> payload) async {
     final response = await http.post(
       Uri.parse('$_baseUrl/chats'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // Aqui normalmente você enviaria um token de autenticação
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(json: true),
       body: jsonEncode(payload),
     );
     return _handleResponse(response);
@@ -55,9 +73,7 @@ class ApiService {
   Future<List<Chat>> getUserChats(int userId) async {
     final response = await http.get(
       Uri.parse('$_baseUrl/chats/$userId'),
-      headers: <String, String>{
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(),
     );
     final decoded = _handleResponse(response);
     if (decoded is List) {
@@ -66,12 +82,20 @@ class ApiService {
     throw Exception('Resposta inesperada do servidor ao buscar chats.');
   }
 
-  Future<Map<String, dynamic>> getChatDetails(int chatId) async {
+  // Com sinceId, devolve só as mensagens posteriores a ela (sincronização incremental)
+  Future<Map<String, dynamic>> getChatDetails(int chatId, {int? sinceId}) async {
      final response = await http.get(
-      Uri.parse('$_baseUrl/chat/$chatId'),
-      headers: <String, String>{
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      Uri.parse('$_baseUrl/chat/$chatId${sinceId != null ? '?since_id=$sinceId' : ''}'),
+      headers: _headers(),
+    );
+    return _handleResponse(response);
+  }
+
+  // Consulta leve do título: {'id', 'title', 'title_pending'}
+  Future<Map<String, dynamic>> getChatTitle(int chatId) async {
+    final response = await http.get(
+      Uri.parse('$_baseUrl/chat/$chatId/title'),
+      headers: _headers(),
     );
     return _handleResponse(response);
   }
@@ -79,10 +103,7 @@ class ApiService {
   Future<Map<String, dynamic>> sendMessage(int chatId, String message) async {
     final response = await http.post(
       Uri.parse('$_baseUrl/chat/$chatId/message'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(json: true),
       body: jsonEncode(<String, String>{'message': message}),
     );
     return _handleResponse(response);
@@ -91,10 +112,7 @@ class ApiService {
    Future<Map<String, dynamic>> updateChatStatus(int chatId, String status) async {
     final response = await http.put(
       Uri.parse('$_baseUrl/chat/$chatId/status'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(json: true),
       body: jsonEncode(<String, String>{'status': status}),
     );
     return _handleResponse(response);
@@ -103,10 +121,7 @@ class ApiService {
   Future<Map<String, dynamic>> updateChatObservations(int chatId, String observations) async {
     final response = await http.put(
       Uri.parse('$_baseUrl/chat/$chatId/observations'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(json: true),
       body: jsonEncode(<String, String>{'observations': observations}),
     );
     return _handleResponse(response);
@@ -115,16 +130,14 @@ class ApiService {
   Future<Map<String, dynamic>> updateChatTitle(int chatId, String newTitle) async {
     final response = await http.put(
       Uri.parse('$_baseUrl/chat/$chatId/title'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(json: true),
       body: jsonEncode(<String, String>{'title': newTitle}),
     );
     return _handleResponse(response);
   }
 
   dynamic _handleResponse(http.Response response) {
+    _checkUnauthorized(response);
     final decoded = jsonDecode(utf8.decode(response.bodyBytes)); // Decodifica como UTF-8
     if (response.statusCode >= 200 && response.statusCode < 300) {
       return decoded;
@@ -137,10 +150,9 @@ class ApiService {
   Future<void> deleteChat(int chatId) async {
     final response = await http.delete(
       Uri.parse('$_baseUrl/chat/$chatId'),
-      headers: <String, String>{
-        // 'Authorization': 'Bearer YOUR_TOKEN',
-      },
+      headers: _headers(),
     );
+    _checkUnauthorized(response);
 
     if (response.statusCode == 200) {
       // Chat deletado com sucesso
@@ -162,12 +174,10 @@ class ApiService {
   Future<Map<String, dynamic>> updateChatColor(int chatId, String newColorHex) async {
     final response = await http.put(
       Uri.parse('$_baseUrl/chat/$chatId/color'),
-      headers: <String, String>{
-        'Content-Type': 'application/json; charset=UTF-8',
-        // 'Authorization': 'Bearer YOUR_TOKEN', // Adicionar se autenticação estiver implementada
-      },
+      headers: _headers(json: true),
       body: jsonEncode(<String, String>{'color': newColorHex}),
     );
+    _checkUnauthorized(response);
     if (response.statusCode == 200) {
       return jsonDecode(response.body);
     } else {
@@ -179,15 +189,16 @@ class ApiService {
   Future<Map<String, dynamic>> changePassword(int userId, String currentPassword, String newPassword) async {
     final response = await http.put(
       Uri.parse('$_baseUrl/user/change-password'),
-      headers: {'Content-Type': 'application/json'},
+      headers: _headers(json: true),
       body: jsonEncode({
         'user_id': userId,
         'current_password': currentPassword,
         'new_password': newPassword,
       }),
     );
+    _checkUnauthorized(response);
     if (response.statusCode == 200) {
-      return jsonDecode(response.body); // Espera {'message': 'Senha alterada com sucesso!'}
+      return jsonDecode(response.body); // Espera {'message': ..., 'access_token': ...}; os tokens anteriores são revogados
     } else {
       final errorBody = jsonDecode(response.body);
       String errorMessage = errorBody['error'] ?? 'Erro desconhecido ao alterar senha.';
@@ -202,10 +213,9 @@ class ApiService {
     try {
       final response = await http.get(
         Uri.parse('$_baseUrl/user/$userId/last_used_age'),
-        headers: <String, String>{
-          // 'Authorization': 'Bearer YOUR_TOKEN', // Adicionar se autenticação estiver implementada
-        },
+        headers: _headers(),
       );
+      _checkUnauthorized(response);
       
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
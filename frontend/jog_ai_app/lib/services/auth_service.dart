@@ -22,8 +22,16 @@ class AuthService with ChangeNotifier {
   Future<void> _tryAutoLogin() async {
     final storedUserId = await _storage.read(key: 'userId');
     final storedUsername = await _storage.read(key: 'username'); // Adicional, se quisermos persistir username
+    final storedToken = await _storage.read(key: 'accessToken');
+
+    // Sem token (sessões anteriores à autenticação por token) é preciso entrar de novo
+    if (storedUserId != null && storedToken == null) {
+      await logout();
+      return;
+    }
 
     if (storedUserId != null) {
+      ApiService.accessToken = storedToken;
       _userId = int.tryParse(storedUserId);
       if (_userId != null) {
          _isLoggedIn = true;
@@ -42,12 +50,14 @@ class AuthService with ChangeNotifier {
   Future<bool> login(String username, String password) async {
     try {
       final response = await _apiService.login(username, password);
-      if (response.containsKey('user_id')) {
+      if (response.containsKey('user_id') && response.containsKey('access_token')) {
         _userId = response['user_id'] as int;
+        ApiService.accessToken = response['access_token'] as String;
         _currentUser = User(id: _userId!, username: username); // Assumimos que o login não retorna username, usamos o fornecido
         _isLoggedIn = true;
         await _storage.write(key: 'userId', value: _userId.toString());
         await _storage.write(key: 'username', value: username); // Salvar username
+        await _storage.write(key: 'accessToken', value: ApiService.accessToken);
         notifyListeners();
         return true;
       }
@@ -72,11 +82,18 @@ class AuthService with ChangeNotifier {
     return false;
   }
 
+  Future<void> updateAccessToken(String token) async {
+    ApiService.accessToken = token;
+    await _storage.write(key: 'accessToken', value: token);
+  }
+
   Future<void> logout() async {
     _currentUser = null;
     _isLoggedIn = false;
     _userId = null;
+    ApiService.accessToken = null;
     await _storage.delete(key: 'userId');
+    await _storage.delete(key: 'accessToken');
     await _storage.delete(key: 'username');
     notifyListeners();
   }